@@ -28,6 +28,7 @@ setup(
             "checktime-scheduler=checktime.scheduler.service:main",
             "checktime-bot=checktime.bot.listener:main",
             "checktime-web=checktime.web.server:main",
+            "checktime-migrate=checktime.shared.migrate:main",
         ],
     },
 ) 
\ No newline at end of file
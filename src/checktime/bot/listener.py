@@ -2,35 +2,36 @@
 Telegram bot listener for CheckTime application.
 """
 
+import sys
+import threading
 import time
 import logging
 import re
-from datetime import datetime
-from typing import Optional, Dict, Any
+from datetime import datetime, timedelta
+from typing import Optional, Dict, Any, List
+
+from flask import Flask
 
 from checktime.utils.logger import bot_logger, error_logger
-from checktime.utils.telegram import TelegramClient
+from checktime.utils.telegram import TelegramClient, get_telegram_client
+from checktime.bot.worker_pool import KeyedWorkerPool
+from checktime.bot.webhook import register_webhook
+from checktime.shared.services.bot_state_manager import BotStateManager
 from checktime.shared.services.holiday_manager import HolidayManager
 from checktime.shared.services.user_manager import UserManager
-from checktime.shared.config import get_telegram_token
+from checktime.shared.config import (
+    get_telegram_token, get_bot_workers, get_telegram_update_mode, get_bot_metrics_port,
+    get_bot_memory_soft_limit_mb,
+)
+from checktime.shared.metrics import metrics
+from checktime.shared.metrics_exporter import start_metrics_server
+from checktime.shared.watchdog import RESTART_EXIT_CODE, MemoryWatchdog
 from checktime.web import create_app
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler("/var/log/checktime/bot.log"),
-        logging.StreamHandler()
-    ]
-)
 logger = logging.getLogger(__name__)
 
 # Initialize Telegram client
-telegram_client = TelegramClient()
-
-# Create Flask app
-app = create_app()
+telegram_client = get_telegram_client()
 
 # Command pattern for adding a holiday
 ADD_HOLIDAY_PATTERN = r'/addfestivo\s+(\d{4}-\d{2}-\d{2})(?:\s+(.+))?'
@@ -41,19 +42,44 @@ LIST_HOLIDAYS_COMMAND = '/listfestivos'
 # Command for getting chat ID
 GET_CHAT_ID_COMMAND = '/getchatid'
 
+# Seconds to wait before polling again after getUpdates failed
+POLL_ERROR_DELAY = 5
+# Updates fetched per getUpdates call (Telegram's maximum)
+UPDATES_BATCH_SIZE = 100
+# Seconds a draining bot waits for the commands in flight before restarting
+DRAIN_TIMEOUT = 60
+# Seconds between two reads of the webhook queue while it is empty
+QUEUE_POLL_INTERVAL = 1
+# Seconds between two prunings of the handled webhook updates
+QUEUE_PRUNE_INTERVAL = 3600
+# How long handled webhook updates are kept; Telegram stops resending an update after a day
+HANDLED_UPDATE_RETENTION = timedelta(days=1)
+# Buckets, in seconds, of the time between a message being sent and its handling starting
+UPDATE_LAG_BUCKETS = (0.25, 0.5, 1, 2, 5, 10, 30, 60, 300)
+
 class TelegramBotListener:
     """Client for listening and processing Telegram commands."""
     
-    def __init__(self, telegram_client: Optional[TelegramClient] = None):
+    def __init__(self, telegram_client: Optional[TelegramClient] = None, app: Optional[Flask] = None):
         """
         Initialize the Telegram listener.
         
         Args:
             telegram_client (Optional[TelegramClient]): Telegram client
+            app (Optional[Flask]): App whose context command handlers run in;
+                a view-less app is created if not provided.
         """
-        self.telegram = telegram_client or TelegramClient()
+        self.telegram = telegram_client or get_telegram_client()
+        self.app = app or create_app(with_views=False)
         self.user_manager = UserManager()
+        self.state_manager = BotStateManager()
+        # Offset of the next update to fetch; persisted so a restart doesn't replay commands
         self.last_update_id = None
+        # Chats are handled in parallel, the messages of each chat in order
+        self.pool = KeyedWorkerPool(get_bot_workers())
+        # Set to stop polling after the current batch, e.g. when memory runs high
+        self.stopping = threading.Event()
+        metrics.add_collector(lambda: metrics.set('bot_pending_updates', self.pool.pending))
     
     def get_user_by_chat_id(self, chat_id: str):
         """
@@ -86,7 +112,7 @@ class TelegramBotListener:
             return
         
         # For commands that require authentication, find the user
-        with app.app_context():
+        with self.app.app_context():
             user = self.get_user_by_chat_id(chat_id)
             if not user:
                 bot_logger.warning(f"Message ignored from unauthorized chat: {chat_id}")
@@ -163,7 +189,7 @@ class TelegramBotListener:
             date_str = date.strftime("%Y-%m-%d")
             chat_id = user.telegram_chat_id
             
-            with app.app_context():
+            with self.app.app_context():
                 # Create a holiday manager for this user
                 holiday_manager = HolidayManager(user.id)
                 
@@ -192,7 +218,7 @@ class TelegramBotListener:
             date_str = date.strftime("%Y-%m-%d")
             chat_id = user.telegram_chat_id
             
-            with app.app_context():
+            with self.app.app_context():
                 # Create a holiday manager for this user
                 holiday_manager = HolidayManager(user.id)
                 
@@ -219,7 +245,7 @@ class TelegramBotListener:
         try:
             chat_id = user.telegram_chat_id
             
-            with app.app_context():
+            with self.app.app_context():
                 # Create a holiday manager for this user
                 holiday_manager = HolidayManager(user.id)
                 
@@ -246,26 +272,156 @@ class TelegramBotListener:
             error_logger.error(error_msg)
             self.telegram.send_message(f"❌ {error_msg}", user.telegram_chat_id if user else None)
     
-    def listen(self) -> None:
-        """Listen for and process Telegram commands."""
-        bot_logger.info("Starting Telegram bot listener")
-        self.telegram.send_message("🤖 Telegram bot listener started")
+    def handle_update(self, update: Dict[str, Any]) -> bool:
+        """
+        Queue an update for processing on the worker pool.
         
+        Args:
+            update (Dict[str, Any]): Update received from Telegram
+            
+        Returns:
+            bool: True if the update holds a command and was queued
+        """
+        # Process the message if it contains a command
+        message = update.get("message")
+        if not message or "text" not in message or "chat" not in message:
+            return False
+        self.pool.submit(message["chat"]["id"], self.handle_message, message)
+        return True
+    
+    def handle_message(self, message: Dict[str, Any]) -> None:
+        """
+        Process a message on a worker thread, recording how long it waited.
+        
+        Args:
+            message (Dict[str, Any]): Received message
+        """
+        if "date" in message:
+            metrics.observe_histogram('bot_update_lag_seconds', max(0.0, time.time() - message["date"]),
+                                      UPDATE_LAG_BUCKETS)
+        with metrics.timer('bot_command_seconds'):
+            self.process_command(message)
+    
+    def load_offset(self) -> None:
+        """Resume from the update offset saved by the previous run."""
+        with self.app.app_context():
+            offset = self.state_manager.get_update_offset()
+        if offset is not None:
+            self.last_update_id = offset
+            bot_logger.info(f"Resuming from update offset {offset}")
+    
+    def process_updates(self, updates: List[Dict[str, Any]]) -> int:
+        """
+        Queue a batch of updates and persist the offset past it.
+        
+        Updates below the current offset were already handled and are
+        skipped. The offset is saved once the batch is queued, so a crash
+        may lose a command that was still waiting but never runs one twice.
+        
+        Args:
+            updates (List[Dict[str, Any]]): Updates returned by getUpdates
+            
+        Returns:
+            int: Number of new updates in the batch
+        """
+        new = 0
+        for update in updates:
+            update_id = update["update_id"]
+            if self.last_update_id is not None and update_id < self.last_update_id:
+                metrics.inc('bot_updates_total', outcome='duplicate')
+                continue
+            self.last_update_id = update_id + 1
+            new += 1
+            metrics.inc('bot_updates_total', outcome='received')
+            self.handle_update(update)
+        
+        if new:
+            with self.app.app_context():
+                self.state_manager.set_update_offset(self.last_update_id)
+        return new
+    
+    def drain_backlog(self) -> int:
+        """
+        Handle the updates that arrived while the bot was down.
+        
+        Polls without waiting, in full batches, until Telegram has nothing
+        queued past the saved offset.
+        
+        Returns:
+            int: Number of updates handled
+        """
+        total = 0
         while True:
+            updates = self.telegram.get_updates(offset=self.last_update_id, timeout=0,
+                                                limit=UPDATES_BATCH_SIZE)
+            batch = updates.get("result", []) if updates.get("ok", True) else []
+            new = self.process_updates(batch) if batch else 0
+            if not new:
+                break
+            total += new
+        if total:
+            bot_logger.info(f"Handled {total} updates received while the bot was down")
+        return total
+    
+    def process_queued_updates(self) -> int:
+        """
+        Queue a batch of the updates stored by the webhook and mark them handled.
+        
+        The web app already rejected the duplicates when storing them. As in
+        polling mode, an update is marked handled once queued, so a crash may
+        lose a command that was still waiting but never runs one twice.
+        
+        Returns:
+            int: Number of updates in the batch
+        """
+        with self.app.app_context():
+            updates = self.state_manager.get_queued_updates(UPDATES_BATCH_SIZE)
+        if not updates:
+            return 0
+        for update in updates:
+            metrics.inc('bot_updates_total', outcome='received')
+            self.handle_update(update)
+        with self.app.app_context():
+            self.state_manager.mark_updates_handled([update["update_id"] for update in updates])
+        return len(updates)
+    
+    def consume_webhook_queue(self) -> None:
+        """Handle the updates the web app stores from the webhook until `stopping` is set."""
+        bot_logger.info("Starting Telegram bot listener on the webhook queue")
+        self.telegram.send_message("🤖 Telegram bot listener started")
+        last_prune = 0.0
+        
+        while not self.stopping.is_set():
             try:
-                updates = self.telegram.get_updates(offset=self.last_update_id)
+                if time.monotonic() - last_prune >= QUEUE_PRUNE_INTERVAL:
+                    with self.app.app_context():
+                        self.state_manager.prune_handled_updates(HANDLED_UPDATE_RETENTION)
+                    last_prune = time.monotonic()
                 
-                for update in updates.get("result", []):
-                    # Update the last processed update ID
-                    update_id = update["update_id"]
-                    self.last_update_id = update_id + 1
+                if not self.process_queued_updates():
+                    self.stopping.wait(QUEUE_POLL_INTERVAL)
                     
-                    # Process the message if it contains a command
-                    if "message" in update and "text" in update["message"]:
-                        self.process_command(update["message"])
+            except Exception as e:
+                error_msg = f"Error in Telegram webhook queue: {e}"
+                error_logger.error(error_msg)
+                self.stopping.wait(60)  # Longer delay on error
+    
+    def listen(self) -> None:
+        """Listen for and process Telegram commands until `stopping` is set."""
+        bot_logger.info("Starting Telegram bot listener")
+        self.load_offset()
+        self.drain_backlog()
+        self.telegram.send_message("🤖 Telegram bot listener started")
+        
+        while not self.stopping.is_set():
+            try:
+                updates = self.telegram.get_updates(offset=self.last_update_id, limit=UPDATES_BATCH_SIZE)
+                if not updates.get("ok", True):
+                    # The long poll returned at once; don't hammer the API while it fails
+                    time.sleep(POLL_ERROR_DELAY)
+                    continue
                 
-                # Small delay to prevent high CPU usage
-                time.sleep(1)
+                self.process_updates(updates.get("result", []))
                 
             except Exception as e:
                 error_msg = f"Error in Telegram listener: {e}"
@@ -274,19 +430,47 @@ class TelegramBotListener:
 
 def main():
     """Main function that runs the Telegram bot."""
+    # Configure logging
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler("/var/log/checktime/bot.log"),
+            logging.StreamHandler()
+        ]
+    )
     bot_logger.info("Starting Telegram bot")
     
     try:
         token = get_telegram_token()
         if not token:
             bot_logger.error("Telegram token not configured. Bot cannot start.")
-            return
+            sys.exit(1)
         
+        webhook_mode = get_telegram_update_mode() == "webhook"
+        if webhook_mode:
+            # The web app stores the updates Telegram posts; this process handles them
+            if not register_webhook(telegram_client):
+                sys.exit(1)
+        else:
+            # getUpdates is refused while a webhook is set, e.g. after switching back from webhook mode
+            telegram_client.delete_webhook()
+        start_metrics_server(get_bot_metrics_port())
         listener = TelegramBotListener()
-        listener.listen()
+        MemoryWatchdog("bot", get_bot_memory_soft_limit_mb(), on_limit=listener.stopping.set).start()
+        if webhook_mode:
+            listener.consume_webhook_queue()
+        else:
+            listener.listen()
+        # Listening only stops when the memory watchdog asks for a restart
+        bot_logger.warning("Draining the bot before restarting")
+        listener.pool.wait_idle(DRAIN_TIMEOUT)
+        sys.exit(RESTART_EXIT_CODE)
     except Exception as e:
         error_msg = f"Fatal error in Telegram bot: {e}"
         error_logger.error(error_msg)
+        # A non-zero exit makes supervisord restart the bot
+        sys.exit(1)
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
@@ -0,0 +1,119 @@
+#!/usr/bin/env python
+"""
+Telegram webhook management for CheckTime.
+
+Usage:
+    # Register TELEGRAM_WEBHOOK_URL / TELEGRAM_WEBHOOK_SECRET with Telegram
+    python -m checktime.bot.webhook set
+
+    # Go back to getUpdates polling
+    python -m checktime.bot.webhook delete
+
+    # Show what Telegram has registered (URL, pending updates, last error)
+    python -m checktime.bot.webhook info
+
+    # Post recorded updates to a running web app, as Telegram would
+    python -m checktime.bot.webhook replay updates.json --url http://localhost:5000/telegram/webhook
+
+`replay` reads a JSON array of updates, a single update, or one update per
+line (the `result` list of a getUpdates response works as is), so the
+webhook can be exercised locally without exposing the app to Telegram.
+"""
+
+import argparse
+import json
+import sys
+from typing import Any, Dict, List
+
+import requests
+
+from checktime.shared.config import get_telegram_webhook_secret, get_telegram_webhook_url
+from checktime.utils.telegram import TelegramClient
+
+# Header Telegram sends the secret token in
+SECRET_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+
+def register_webhook(client: TelegramClient) -> bool:
+    """
+    Register the configured webhook with Telegram.
+
+    Args:
+        client (TelegramClient): Telegram client
+
+    Returns:
+        bool: True if the webhook was set
+    """
+    url = get_telegram_webhook_url()
+    secret = get_telegram_webhook_secret()
+    if not url or not secret:
+        print("TELEGRAM_WEBHOOK_URL and TELEGRAM_WEBHOOK_SECRET must be set", file=sys.stderr)
+        return False
+    return client.set_webhook(url, secret)
+
+def load_updates(path: str) -> List[Dict[str, Any]]:
+    """
+    Load recorded updates from a file.
+
+    Args:
+        path (str): JSON file, or JSON lines file, with updates
+
+    Returns:
+        List[Dict[str, Any]]: The updates
+    """
+    with open(path, encoding='utf-8') as f:
+        content = f.read()
+    try:
+        data = json.loads(content)
+    except ValueError:
+        return [json.loads(line) for line in content.splitlines() if line.strip()]
+    if isinstance(data, dict):
+        # A whole getUpdates response, or a single update
+        return data.get('result', [data]) if 'update_id' not in data else [data]
+    return data
+
+def replay(path: str, url: str, secret: str) -> int:
+    """
+    Post recorded updates to a webhook URL.
+
+    Args:
+        path (str): File with the updates
+        url (str): Webhook URL
+        secret (str): Secret token to send
+
+    Returns:
+        int: Number of updates the webhook did not accept
+    """
+    failures = 0
+    with requests.Session() as session:
+        for update in load_updates(path):
+            response = session.post(url, json=update, headers={SECRET_HEADER: secret}, timeout=10)
+            print(f"update {update.get('update_id')}: {response.status_code} {response.text.strip()}")
+            failures += response.status_code != 200
+    return failures
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="CheckTime Telegram webhook management")
+    sub = parser.add_subparsers(dest='command', required=True)
+    sub.add_parser('set', help="Register the configured webhook with Telegram")
+    sub.add_parser('delete', help="Remove the webhook and go back to polling")
+    sub.add_parser('info', help="Show the webhook registered with Telegram")
+    p_replay = sub.add_parser('replay', help="Post recorded updates to a webhook URL")
+    p_replay.add_argument('file', help="JSON file with updates")
+    p_replay.add_argument('--url', default='http://localhost:5000/telegram/webhook', help="Webhook URL")
+    p_replay.add_argument('--secret', default=None, help="Secret token (default: TELEGRAM_WEBHOOK_SECRET)")
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'replay':
+        return 1 if replay(args.file, args.url, args.secret or get_telegram_webhook_secret()) else 0
+
+    client = TelegramClient()
+    if args.command == 'set':
+        return 0 if register_webhook(client) else 1
+    if args.command == 'delete':
+        return 0 if client.delete_webhook() else 1
+    print(json.dumps(client.get_webhook_info(), indent=2))
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,100 @@
+"""
+Keyed worker pool for the Telegram bot.
+
+Updates from different chats are handled in parallel, while the updates of
+one chat run one at a time and in the order they arrived, so a user's
+/addfestivo is always applied before the /listfestivos sent after it.
+"""
+
+import logging
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Deque, Dict, Hashable, Tuple
+
+# Create logger
+logger = logging.getLogger(__name__)
+
+class KeyedWorkerPool:
+    """Thread pool that runs tasks with the same key sequentially."""
+
+    def __init__(self, workers: int, max_pending: int = 1000):
+        """
+        Initialize the pool.
+
+        Args:
+            workers (int): Number of worker threads
+            max_pending (int): Tasks waiting or running before submit() blocks
+        """
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='bot-worker')
+        # key -> tasks waiting; a key is present while one of its tasks is queued or running
+        self._queues: Dict[Hashable, Deque[Tuple[Callable, tuple]]] = {}
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._idle = threading.Condition(self._lock)
+        self._pending = 0
+
+    def submit(self, key: Hashable, fn: Callable[..., Any], *args) -> None:
+        """
+        Run fn(*args) after every task submitted earlier with the same key.
+
+        Blocks while max_pending tasks are already waiting or running.
+
+        Args:
+            key (Hashable): Ordering key, e.g. a chat ID
+            fn (Callable[..., Any]): Task; exceptions are logged, not raised
+            *args: Task arguments
+        """
+        self._slots.acquire()
+        with self._lock:
+            self._pending += 1
+            waiting = self._queues.get(key)
+            if waiting is not None:
+                # A worker is already draining this key and will pick it up
+                waiting.append((fn, args))
+                return
+            self._queues[key] = deque([(fn, args)])
+        self._executor.submit(self._drain, key)
+
+    def _drain(self, key: Hashable) -> None:
+        while True:
+            with self._lock:
+                waiting = self._queues[key]
+                if not waiting:
+                    del self._queues[key]
+                    return
+                fn, args = waiting[0]
+            try:
+                fn(*args)
+            except Exception:
+                logger.exception(f"Error processing task for key {key}")
+            finally:
+                with self._lock:
+                    waiting.popleft()
+                    self._pending -= 1
+                    if not self._pending:
+                        self._idle.notify_all()
+                self._slots.release()
+
+    @property
+    def pending(self) -> int:
+        """Tasks waiting or running."""
+        with self._lock:
+            return self._pending
+
+    def wait_idle(self, timeout: float = None) -> bool:
+        """
+        Wait until every submitted task has finished.
+
+        Args:
+            timeout (float): Maximum seconds to wait, or None to wait forever
+
+        Returns:
+            bool: True if the pool is idle
+        """
+        with self._idle:
+            return self._idle.wait_for(lambda: not self._pending, timeout)
+
+    def shutdown(self) -> None:
+        """Finish the submitted tasks and stop the worker threads."""
+        self._executor.shutdown(wait=True)
@@ -1,13 +1,22 @@
+import json
 import logging
 import re
-from playwright.sync_api import sync_playwright, TimeoutError as PWTimeout
+import sys
+import time
+from datetime import datetime
 
 from checktime.shared.config import get_selenium_timeout, get_simulation_mode
+from checktime.shared.metrics import metrics
+from checktime.shared.watchdog import SessionTracker
 
 SIMULATION_MODE = get_simulation_mode()
 
 logger = logging.getLogger(__name__)
 
+# Sesiones de Chromium abiertas en este proceso; el watchdog de memoria solo
+# mata procesos de Chromium huérfanos cuando no hay ninguna.
+browser_sessions = SessionTracker()
+
 
 class CheckJCError(Exception):
     """Base para todos los errores controlados de CheckJC."""
@@ -15,7 +24,12 @@ class CheckJCError(Exception):
 
 class CheckJCIPBlocked(CheckJCError):
     """CheckJC ha bloqueado el IP por demasiados intentos fallidos.
-    Suele liberarse en ~10 minutos."""
+    Suele liberarse en ~10 minutos. `minutes` es lo que indica el banner
+    del server (0 si no lo dice, None si no viene de un banner)."""
+
+    def __init__(self, message, minutes=None):
+        super().__init__(message)
+        self.minutes = minutes
 
 
 class CheckJCLoginRejected(CheckJCError):
@@ -36,6 +50,16 @@ class CheckJCUnexpectedResponse(CheckJCError):
     """Respuesta HTTP fuera de lo esperado o navegación a sitio inesperado."""
 
 
+class CheckJCUnconfirmed(CheckJCError):
+    """Se hizo click en #btn-check pero no se pudo confirmar el resultado.
+    Nunca se reintenta: CheckJC decide entrada/salida en cada click, así que
+    un segundo click desharía el primero. `checked_at` es la hora del click."""
+
+    def __init__(self, message, checked_at=None):
+        super().__init__(message)
+        self.checked_at = checked_at
+
+
 _CHROME_UA = (
     "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 "
     "(KHTML, like Gecko) Chrome/147.0.0.0 Safari/537.36"
@@ -56,7 +80,9 @@ class CheckJCClient:
     localizar los inputs y enviar eventos directos.
     """
 
-    def __init__(self, username, password, subdomain):
+    def __init__(self, username, password, subdomain, proxy=None):
+        """`proxy` es un Proxy de checktime.scheduler.proxy_pool; None sale
+        por la conexión del host."""
         if not username or not password or not subdomain:
             raise ValueError("CheckJC username, password, and subdomain must be provided.")
 
@@ -66,6 +92,7 @@ class CheckJCClient:
         self.base_url = f"https://{subdomain}.checkjc.com"
         self.login_url = f"{self.base_url}/login"
         self.portal_url = f"{self.base_url}/portal/employee"
+        self.proxy = proxy
 
         self._pw = None
         self._browser = None
@@ -73,13 +100,37 @@ class CheckJCClient:
         self._page = None
         self._cdp = None
         self._timeout_ms = get_selenium_timeout() * 1000
+        # Momento exacto del click en #btn-check del último fichaje.
+        self.checked_at = None
+        # Segundos por fase de este run (ver CheckEvent.PHASES).
+        self.phase_timings = {}
+        self._current_phase = None
+        self._phase_started = None
+        self._session_open = False
 
     def __enter__(self):
         if SIMULATION_MODE:
             logger.info(f"Simulation mode enabled for {self.username}")
             return self
 
+        browser_sessions.opened()
+        self._session_open = True
+        try:
+            self._start_browser()
+        except BaseException:
+            # Sin esto, un fallo al arrancar dejaba Chromium vivo y sin medir.
+            self.__exit__(*sys.exc_info())
+            raise
+        return self
+
+    def _start_browser(self):
+        # Playwright se importa aquí y no a nivel de módulo: solo hace falta
+        # cuando un check se ejecuta de verdad, no al arrancar el scheduler.
+        from playwright.sync_api import sync_playwright
+
+        self._phase("playwright_start")
         self._pw = sync_playwright().start()
+        self._phase("browser_launch")
         self._browser = self._pw.chromium.launch(
             headless=True,
             args=[
@@ -88,18 +139,24 @@ class CheckJCClient:
                 "--disable-blink-features=AutomationControlled",
             ],
         )
+        self._phase("context_create")
+        context_options = {}
+        if self.proxy is not None and self.proxy.settings:
+            context_options["proxy"] = self.proxy.settings
         self._context = self._browser.new_context(
             user_agent=_CHROME_UA,
             locale="es-ES",
             viewport={"width": 1280, "height": 800},
+            **context_options,
         )
         self._context.set_default_timeout(self._timeout_ms)
         self._page = self._context.new_page()
         self._cdp = self._context.new_cdp_session(self._page)
-        logger.info(f"Chromium iniciado para {self.username}")
-        return self
+        self._phase(None)
+        logger.info(f"Chromium iniciado para {self.username} (egress {self._egress_name()})")
 
     def __exit__(self, exc_type, exc_val, exc_tb):
+        self._report_phases(exc_type)
         for closer in (
             getattr(self._context, "close", None),
             getattr(self._browser, "close", None),
@@ -109,28 +166,38 @@ class CheckJCClient:
                 continue
             try:
                 closer()
-            except Exception:
-                pass
+            except Exception as e:
+                # Un cierre fallido puede dejar Chromium vivo; el watchdog lo mata después.
+                logger.warning(f"Error cerrando Chromium para {self.username}: {e}")
         if self._browser:
             logger.info(f"Chromium cerrado para {self.username}")
+        if self._session_open:
+            self._session_open = False
+            browser_sessions.closed()
 
     def login(self):
         if SIMULATION_MODE:
             logger.info(f"Simulation: Login successful for {self.username}")
             return True
 
+        from playwright.sync_api import TimeoutError as PWTimeout
+
         logger.info(f"Navigating to {self.login_url}")
+        self._phase("login_goto")
         self._page.goto(self.login_url, wait_until="networkidle")
         # Hidratación de Stencil + render del template shadow DOM closed.
+        self._phase("hydration_wait")
         self._page.wait_for_timeout(2000)
 
         # Detección temprana de IP bloqueada (banner en /etc/login)
+        self._phase("dom_search")
         body_text = self._page.content()
         mins = self._ip_block_minutes(body_text)
         if mins is not None:
             raise CheckJCIPBlocked(
                 f"CheckJC blocked this IP for {self.username}. "
-                f"Retry available in {mins} minutes (per server)."
+                f"Retry available in {mins} minutes (per server).",
+                minutes=mins,
             )
 
         # Buscamos inputs y botón dentro del shadow DOM closed vía CDP.
@@ -141,6 +208,7 @@ class CheckJCClient:
         )
 
         # Rellenar inputs.
+        self._phase("credential_input")
         self._cdp_focus(user_node)
         self._cdp.send("Input.insertText", {"text": self.username})
         self._cdp_focus(pass_node)
@@ -152,6 +220,7 @@ class CheckJCClient:
 
         # Esperar a que el navegador salga de /login. Si tras N seg seguimos
         # ahí, fue rechazo (el server muestra el form de login otra vez).
+        self._phase("url_transition")
         try:
             self._page.wait_for_url(
                 lambda url: "/login" not in url, timeout=15000
@@ -162,7 +231,8 @@ class CheckJCClient:
             if mins is not None:
                 raise CheckJCIPBlocked(
                     f"CheckJC blocked this IP after failed attempts for {self.username}. "
-                    f"Retry available in {mins} minutes (per server)."
+                    f"Retry available in {mins} minutes (per server).",
+                    minutes=mins,
                 )
             raise CheckJCLoginRejected(
                 f"CheckJC rejected the login for {self.username}: "
@@ -170,21 +240,31 @@ class CheckJCClient:
                 f"Check if the user can log in via the web."
             )
 
+        self._phase(None)
         logger.info(f"Login successful for {self.username}, landed at {self._page.url}")
         return True
 
-    def perform_check(self, check_type: str):
+    def perform_check(self, check_type: str, at: datetime = None):
         """Realiza un fichaje (entrada o salida).
 
         CheckJC v7.4 no distingue 'in' / 'out' en el click: registra un
         check en el momento, el server decide qué es. El parámetro se
         mantiene para compatibilidad con la interfaz anterior y logging.
+
+        Con `at`, deja la sesión preparada en el portal con el botón visible
+        y espera hasta ese instante para hacer el click. Si ya pasó, hace el
+        click en cuanto el botón está listo.
         """
         if SIMULATION_MODE:
+            self._wait_until(at)
+            self.checked_at = datetime.now()
             logger.info(f"Simulation: Check {check_type} completed for {self.username}")
             return True
 
+        from playwright.sync_api import TimeoutError as PWTimeout
+
         # Después del login el navegador suele estar ya en /portal/employee.
+        self._phase("portal_load")
         if "/portal/employee" not in self._page.url:
             logger.info(f"Navigating to {self.portal_url}")
             self._page.goto(self.portal_url, wait_until="domcontentloaded")
@@ -199,6 +279,7 @@ class CheckJCClient:
         # `hidden-soft`) hasta que el AJAX a /rest/portal/employee/liveData.json
         # responde con `portal_host` y el JS hace .show(). Esperamos a que sea
         # interactuable; si no llega, capturamos contexto para diagnosticar.
+        self._phase("button_visible")
         try:
             self._page.wait_for_selector("#btn-check", state="visible", timeout=15000)
         except PWTimeout:
@@ -220,7 +301,11 @@ class CheckJCClient:
                 f"Possible cause: the user has no portal_host configured in CheckJC."
             )
 
+        self._phase("slot_wait")
+        self._wait_until(at)
         logger.info(f"Submitting check ({check_type}) for {self.username}")
+        self._phase("click")
+        self.checked_at = datetime.now()
         # Click vía Playwright (selectores normales bastan: #btn-check NO esta
         # en shadow DOM, solo el login). El handler JS de CheckJC decide el
         # flow: para deviceid_self sin confirmacion de ubicacion hace submit
@@ -228,12 +313,15 @@ class CheckJCClient:
         self._page.click("#btn-check")
 
         # Esperar a que la UI reaccione: recarga o actualiza el listado.
+        self._phase("post_click_wait")
         self._page.wait_for_timeout(3000)
+        self._phase(None)
 
         if "/login" in self._page.url or "/logout" in self._page.url:
-            raise CheckJCSessionLost(
+            raise CheckJCUnconfirmed(
                 f"Session dropped after check {check_type} for {self.username} "
-                f"(at {self._page.url!r})."
+                f"(at {self._page.url!r}).",
+                checked_at=self.checked_at,
             )
 
         logger.info(
@@ -241,14 +329,55 @@ class CheckJCClient:
         )
         return True
 
-    def check_in(self):
-        return self.perform_check("in")
+    def check_in(self, at: datetime = None):
+        return self.perform_check("in", at)
 
-    def check_out(self):
-        return self.perform_check("out")
+    def check_out(self, at: datetime = None):
+        return self.perform_check("out", at)
 
     # --- helpers ---
 
+    def _egress_name(self):
+        return self.proxy.name if self.proxy is not None else "direct"
+
+    def _phase(self, name):
+        """Cierra la fase en curso (si hay) y empieza `name` (None: ninguna)."""
+        now = time.perf_counter()
+        if self._current_phase is not None:
+            self.phase_timings[self._current_phase] = round(now - self._phase_started, 3)
+        self._current_phase = name
+        self._phase_started = now
+
+    def _report_phases(self, exc_type):
+        """Emite un registro estructurado con las fases del run: una línea JSON
+        en el log y una observación por fase en las métricas."""
+        failed_phase = self._current_phase if exc_type else None
+        self._phase(None)
+        if not self.phase_timings:
+            return
+        record = {
+            "user": self.username,
+            "subdomain": self.subdomain,
+            "egress": self._egress_name(),
+            "ok": exc_type is None,
+            "error": exc_type.__name__ if exc_type else None,
+            "failed_phase": failed_phase,
+            "phases": self.phase_timings,
+            "total": round(sum(self.phase_timings.values()), 3),
+        }
+        logger.info(f"CheckJC phases: {json.dumps(record)}")
+        for phase, seconds in self.phase_timings.items():
+            metrics.observe("checkjc_phase_seconds", seconds, phase=phase, subdomain=self.subdomain)
+
+    def _wait_until(self, at):
+        """Duerme hasta `at` (hora local). No hace nada si es None o ya pasó."""
+        if at is None:
+            return
+        remaining = (at - datetime.now()).total_seconds()
+        if remaining > 0:
+            logger.info(f"Session ready for {self.username}, waiting {remaining:.1f}s until {at:%H:%M:%S}")
+            time.sleep(remaining)
+
     def _cdp_focus(self, node_id):
         self._cdp.send("DOM.focus", {"nodeId": node_id})
 
@@ -0,0 +1,261 @@
+"""
+Circuit breakers for CheckJC logins.
+
+CheckJC blocks an IP after too many failed logins, and every further attempt
+while blocked only extends the block. The scheduler keeps one breaker per
+CheckJC subdomain and egress route:
+
+- closed: logins go through. An IP block, or several rejected logins in a
+  row (a silent rate limit), opens it.
+- open: no login is attempted until the block the server announced, or the
+  backoff, has passed. Checks due meanwhile are held by the scheduler.
+- half_open: a single check goes through as a probe. A successful login
+  closes the breaker; another block or rejection opens it again for twice
+  as long.
+"""
+
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from checktime.shared.metrics import metrics
+
+# Create logger
+logger = logging.getLogger(__name__)
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+# Block length assumed when the banner doesn't say (CheckJC usually frees the IP in ~10 minutes)
+DEFAULT_BLOCK_MINUTES = 10
+# Rejected logins in a row, over any users, that open the breaker
+REJECTIONS_TO_OPEN = 3
+REJECTION_OPEN_MINUTES = 5
+# Longest the backoff grows to
+MAX_OPEN_MINUTES = 120
+# A probe that never reported back (e.g. its thread died) stops holding the others after this
+PROBE_TIMEOUT_SECONDS = 300
+
+class CircuitBreaker:
+    """Breaker for one CheckJC subdomain and egress route."""
+
+    def __init__(self, subdomain: str, egress: str,
+                 on_change: Optional[Callable[[Dict[str, Any]], None]] = None):
+        """
+        Initialize a closed breaker.
+
+        Args:
+            subdomain (str): CheckJC subdomain
+            egress (str): Egress route name (see checktime.scheduler.proxy_pool)
+            on_change (Optional[Callable]): Called with the new state after every transition
+        """
+        self.subdomain = subdomain
+        self.egress = egress
+        self.on_change = on_change
+        self.state = CLOSED
+        # Wall clock time (time.time()) at which an open breaker lets a probe through
+        self.open_until = 0.0
+        self.opens = 0
+        self.rejections = 0
+        self.last_error = None
+        self._probe_started = None
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """
+        Ask to attempt a login. When half open, only the first caller gets
+        through (the probe) until it reports its result.
+
+        Returns:
+            bool: True if the login may be attempted
+        """
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            now = time.time()
+            if self.state == OPEN:
+                if now < self.open_until:
+                    return False
+                self.state = HALF_OPEN
+                self._probe_started = None
+            elif self._probe_started is not None and now - self._probe_started < PROBE_TIMEOUT_SECONDS:
+                return False
+            self._probe_started = now
+            state = self._state_locked()
+        logger.info(f"Circuit breaker {self.subdomain} via {self.egress} half open, sending a probe")
+        self._changed(state)
+        return True
+
+    def seconds_until_probe(self) -> float:
+        """Seconds until an open breaker lets a probe through (0 if closed or half open)."""
+        with self._lock:
+            if self.state != OPEN:
+                return 0.0
+            return max(0.0, self.open_until - time.time())
+
+    def record_success(self) -> None:
+        """A login went through: close the breaker."""
+        with self._lock:
+            if self.state == CLOSED and not self.rejections:
+                return
+            was = self.state
+            self.state = CLOSED
+            self.opens = 0
+            self.rejections = 0
+            self.open_until = 0.0
+            self._probe_started = None
+            state = self._state_locked()
+        if was != CLOSED:
+            logger.info(f"Circuit breaker {self.subdomain} via {self.egress} closed")
+        self._changed(state)
+
+    def record_block(self, minutes: Optional[int] = None) -> None:
+        """
+        CheckJC blocked the IP: open the breaker.
+
+        Args:
+            minutes (Optional[int]): Minutes the server said the block lasts;
+                0 or None when it didn't say
+        """
+        self._open('blocked', minutes or DEFAULT_BLOCK_MINUTES, DEFAULT_BLOCK_MINUTES,
+                   f"IP blocked for {minutes or DEFAULT_BLOCK_MINUTES} minutes")
+
+    def record_rejection(self) -> None:
+        """CheckJC rejected a login: open after REJECTIONS_TO_OPEN in a row, or if it was the probe."""
+        with self._lock:
+            self.rejections += 1
+            should_open = self.state == HALF_OPEN or self.rejections >= REJECTIONS_TO_OPEN
+            rejections = self.rejections
+            state = self._state_locked()
+        if should_open:
+            self._open('rejected', REJECTION_OPEN_MINUTES, REJECTION_OPEN_MINUTES,
+                       f"Login rejected ({rejections} in a row)")
+        else:
+            self._changed(state)
+
+    def release(self) -> None:
+        """The attempt ended without telling whether the IP is blocked: let another probe through."""
+        with self._lock:
+            self._probe_started = None
+
+    def _open(self, reason: str, minutes: float, base_minutes: float, error: str) -> None:
+        with self._lock:
+            # A probe failing again means the block is still on: back off further
+            backoff = min(MAX_OPEN_MINUTES, base_minutes * 2 ** self.opens) if self.state == HALF_OPEN else 0
+            minutes = max(minutes, backoff)
+            self.state = OPEN
+            self.open_until = max(self.open_until, time.time() + minutes * 60)
+            self.opens += 1
+            self.rejections = 0
+            self.last_error = error
+            self._probe_started = None
+            state = self._state_locked()
+        metrics.inc('checkjc_breaker_opens_total', subdomain=self.subdomain, egress=self.egress, reason=reason)
+        logger.warning(f"Circuit breaker {self.subdomain} via {self.egress} open for {minutes:.0f} minutes: {error}")
+        self._changed(state)
+
+    def _state_locked(self) -> Dict[str, Any]:
+        return {
+            'subdomain': self.subdomain,
+            'egress': self.egress,
+            'state': self.state,
+            'open_until': datetime.fromtimestamp(self.open_until) if self.open_until else None,
+            'opens': self.opens,
+            'rejections': self.rejections,
+            'last_error': self.last_error,
+        }
+
+    def _changed(self, state: Dict[str, Any]) -> None:
+        if self.on_change is None:
+            return
+        try:
+            self.on_change(state)
+        except Exception as e:
+            logger.error(f"Error saving circuit breaker {self.subdomain} via {self.egress}: {e}")
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Get the breaker's state.
+
+        Returns:
+            Dict[str, Any]: subdomain, egress, state, open_until (datetime or
+            None), opens, rejections and last_error
+        """
+        with self._lock:
+            return self._state_locked()
+
+class CircuitBreakerRegistry:
+    """The breakers of this process, created on first use."""
+
+    def __init__(self):
+        """Initialize an empty registry."""
+        self._breakers: Dict[Tuple[str, str], CircuitBreaker] = {}
+        self._lock = threading.Lock()
+        # Called with a breaker's state after each of its transitions
+        self.on_change: Optional[Callable[[Dict[str, Any]], None]] = None
+
+    def get(self, subdomain: str, egress: str) -> CircuitBreaker:
+        """
+        Get the breaker of a subdomain and egress route.
+
+        Args:
+            subdomain (str): CheckJC subdomain
+            egress (str): Egress route name
+
+        Returns:
+            CircuitBreaker: The breaker, closed if it is new
+        """
+        key = (subdomain, egress)
+        with self._lock:
+            breaker = self._breakers.get(key)
+            if breaker is None:
+                breaker = self._breakers[key] = CircuitBreaker(subdomain, egress, self._notify)
+            return breaker
+
+    def _notify(self, state: Dict[str, Any]) -> None:
+        if self.on_change is not None:
+            self.on_change(state)
+
+    def restore(self, states: Iterable[Any]) -> None:
+        """
+        Load saved states, e.g. after a restart.
+
+        Args:
+            states (Iterable[Any]): Objects with the attributes of snapshot()'s keys
+        """
+        for saved in states:
+            breaker = self.get(saved.subdomain, saved.egress)
+            with breaker._lock:
+                breaker.state = saved.state
+                breaker.open_until = saved.open_until.timestamp() if saved.open_until else 0.0
+                breaker.opens = saved.opens or 0
+                breaker.rejections = saved.rejections or 0
+                breaker.last_error = saved.last_error
+            if saved.state != CLOSED:
+                logger.info(f"Restored circuit breaker {saved.subdomain} via {saved.egress}: {saved.state}")
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """Get the state of every breaker."""
+        with self._lock:
+            breakers = list(self._breakers.values())
+        return [breaker.snapshot() for breaker in breakers]
+
+_registry: Optional[CircuitBreakerRegistry] = None
+_registry_lock = threading.Lock()
+
+def get_circuit_breakers() -> CircuitBreakerRegistry:
+    """
+    Get the circuit breaker registry shared by this process.
+
+    Returns:
+        CircuitBreakerRegistry: The registry, created on first use
+    """
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = CircuitBreakerRegistry()
+    return _registry
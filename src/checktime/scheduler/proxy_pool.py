@@ -0,0 +1,131 @@
+"""
+Egress proxy pool for CheckJC sessions.
+
+CheckJC blocks an IP for a while after too many failed logins. Spreading the
+browser sessions over several proxies keeps one blocked IP from stopping
+every user's check: each user sticks to one proxy while it is healthy, and
+users on a blocked proxy move to the least used healthy one until the block
+expires. Whether a proxy is blocked for a subdomain is tracked by the
+circuit breakers in checktime.scheduler.circuit_breaker.
+"""
+
+import logging
+import threading
+from collections import Counter
+from typing import Dict, Hashable, List, Optional, Tuple
+from urllib.parse import unquote, urlsplit
+
+from checktime.scheduler.circuit_breaker import CircuitBreaker, CircuitBreakerRegistry, get_circuit_breakers
+from checktime.shared.config import get_checkjc_proxies
+
+# Create logger
+logger = logging.getLogger(__name__)
+
+# Proxy entry meaning "no proxy, use the host's connection"
+DIRECT = 'direct'
+
+class Proxy:
+    """One egress route."""
+
+    def __init__(self, url: str):
+        """
+        Initialize the proxy.
+
+        Args:
+            url (str): Proxy URL (scheme://[user:pass@]host:port) or 'direct'
+        """
+        self.url = url
+
+        if url == DIRECT:
+            self.name = DIRECT
+            self.settings = None
+            return
+        parts = urlsplit(url)
+        if not parts.scheme or not parts.hostname:
+            raise ValueError(f"Invalid proxy URL: {url!r}")
+        server = f"{parts.scheme}://{parts.hostname}" + (f":{parts.port}" if parts.port else "")
+        # Logs show the proxy without its credentials
+        self.name = server
+        # Playwright takes the credentials apart from the server
+        self.settings = {'server': server}
+        if parts.username:
+            self.settings['username'] = unquote(parts.username)
+            self.settings['password'] = unquote(parts.password or '')
+
+    def __repr__(self):
+        return f"<Proxy {self.name}>"
+
+class ProxyPool:
+    """Assigns CheckJC sessions to healthy proxies, keeping each user on the same one."""
+
+    def __init__(self, urls: Optional[List[str]] = None,
+                 breakers: Optional[CircuitBreakerRegistry] = None):
+        """
+        Initialize the pool.
+
+        Args:
+            urls (Optional[List[str]]): Proxy URLs, defaults to CHECKJC_PROXIES
+                (a direct connection when that is empty)
+            breakers (Optional[CircuitBreakerRegistry]): Block state, defaults to the shared registry
+        """
+        urls = urls if urls is not None else get_checkjc_proxies()
+        self.proxies = [Proxy(url) for url in (urls or [DIRECT])]
+        self.breakers = breakers or get_circuit_breakers()
+        # key (user ID) -> proxy it was last given
+        self._assignments: Dict[Hashable, Proxy] = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, key: Hashable, subdomain: str) -> Optional[Tuple[Proxy, CircuitBreaker]]:
+        """
+        Get the proxy a session should use, and the breaker to report its outcome to.
+
+        Args:
+            key (Hashable): Sticky routing key, e.g. the user ID
+            subdomain (str): CheckJC subdomain the session logs in to
+
+        Returns:
+            Tuple[Proxy, CircuitBreaker] or None: The key's proxy if its breaker
+            lets the login through, otherwise the least used proxy whose
+            breaker does; None if every breaker is open or probing
+        """
+        with self._lock:
+            proxy = self._assignments.get(key)
+            if proxy is not None:
+                breaker = self.breakers.get(subdomain, proxy.name)
+                if breaker.allow():
+                    return proxy, breaker
+
+            load = Counter(self._assignments.values())
+            for candidate in sorted(self.proxies, key=lambda p: load[p]):
+                if candidate is proxy:
+                    continue
+                breaker = self.breakers.get(subdomain, candidate.name)
+                if breaker.allow():
+                    self._assignments[key] = candidate
+                    break
+            else:
+                return None
+        if proxy is not None:
+            logger.info(f"Moving {key} from blocked egress {proxy.name} to {candidate.name}")
+        return candidate, breaker
+
+    def seconds_until_available(self, subdomain: str) -> float:
+        """Seconds until the first open breaker of a subdomain lets a probe through."""
+        return min(self.breakers.get(subdomain, p.name).seconds_until_probe() for p in self.proxies)
+
+_pool: Optional[ProxyPool] = None
+_pool_lock = threading.Lock()
+
+def get_proxy_pool() -> ProxyPool:
+    """
+    Get the proxy pool shared by this process.
+
+    Returns:
+        ProxyPool: The pool, created on first use
+    """
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ProxyPool()
+    return _pool
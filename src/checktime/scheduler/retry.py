@@ -0,0 +1,60 @@
+"""
+Retry policies for failed CheckJC checks.
+
+A check that fails for a transient reason (the session dropped, an odd
+response, a timeout) is tried again by the same check thread, so retries
+never delay other users' checks. Each kind of error has its own policy; all
+of them stop at the check's deadline (CHECK_DEADLINE_MINUTES after the
+scheduled time), since a clock-in that late is no longer useful.
+"""
+
+from typing import NamedTuple, Optional
+
+from checktime.scheduler.checker import (
+    CheckJCIPBlocked,
+    CheckJCSessionLost,
+    CheckJCUnexpectedResponse,
+)
+
+class RetryPolicy(NamedTuple):
+    """How often and how fast to retry one kind of error."""
+    # Attempts in total, including the first one
+    max_attempts: int
+    # Seconds before the first retry; doubled for each further one
+    base_delay: float
+    max_delay: float = 300
+
+    def delay(self, attempt: int) -> float:
+        """Seconds to wait after failed attempt number `attempt` (1-based)."""
+        return min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+
+# Errors not listed here (rejected login, changed HTML) would fail the same way
+# again. CheckJCUnconfirmed (a failure after the click) must never be retried:
+# CheckJC toggles in/out on every click, so a second click would undo the first.
+RETRY_POLICIES = (
+    (CheckJCSessionLost, RetryPolicy(max_attempts=3, base_delay=20)),
+    (CheckJCUnexpectedResponse, RetryPolicy(max_attempts=3, base_delay=30)),
+    # The circuit breaker holds the retry until a route is open again
+    (CheckJCIPBlocked, RetryPolicy(max_attempts=2, base_delay=0)),
+    (TimeoutError, RetryPolicy(max_attempts=3, base_delay=15)),
+)
+
+# Playwright is imported lazily by the checker, so its timeout is matched by name
+PLAYWRIGHT_TIMEOUT_POLICY = RetryPolicy(max_attempts=3, base_delay=15)
+
+def get_retry_policy(exc: Exception) -> Optional[RetryPolicy]:
+    """
+    Get the retry policy for an error.
+
+    Args:
+        exc (Exception): The error a check attempt failed with
+
+    Returns:
+        RetryPolicy or None: The policy, or None if the error is not worth retrying
+    """
+    for exc_class, policy in RETRY_POLICIES:
+        if isinstance(exc, exc_class):
+            return policy
+    if type(exc).__name__ == 'TimeoutError' and type(exc).__module__.startswith('playwright'):
+        return PLAYWRIGHT_TIMEOUT_POLICY
+    return None
@@ -6,24 +6,41 @@ This script starts the scheduler service that checks schedules and performs sche
 
 import logging
 import schedule
+import sys
 import time
-from datetime import datetime
+from datetime import datetime, timedelta
 import threading
 import concurrent.futures
 
 from checktime.scheduler.checker import (
+    browser_sessions,
     CheckJCClient,
     CheckJCIPBlocked,
     CheckJCLoginRejected,
     CheckJCSessionLost,
     CheckJCFormError,
     CheckJCUnexpectedResponse,
+    CheckJCUnconfirmed,
 )
-from checktime.shared.config import get_log_level
-from checktime.utils.telegram import TelegramClient
-from checktime.shared.services.holiday_manager import HolidayManager
+from checktime.scheduler.circuit_breaker import get_circuit_breakers
+from checktime.scheduler.proxy_pool import get_proxy_pool
+from checktime.scheduler.retry import get_retry_policy
+from checktime.shared.config import (
+    get_log_level, get_check_prewarm_seconds, get_check_deadline_minutes, get_check_event_retention_months,
+    get_max_concurrent_checks,
+    get_scheduler_metrics_port, get_scheduler_memory_soft_limit_mb,
+)
+from checktime.shared.models.check_event import CheckEvent
+from checktime.shared.metrics import LATENCY_BUCKETS, metrics
+from checktime.shared.metrics_exporter import start_metrics_server
+from checktime.shared.profiler import get_profiler
+from checktime.shared.watchdog import RESTART_EXIT_CODE, MemoryWatchdog
+from checktime.utils.broadcast import resume_stale_broadcasts
+from checktime.utils.notification_queue import get_notification_queue
+from checktime.shared.services.check_event_manager import CheckEventManager
+from checktime.shared.services.circuit_breaker_manager import CircuitBreakerManager
 from checktime.shared.services.user_manager import UserManager
-from checktime.shared.services.schedule_manager import ScheduleManager
+from checktime.shared.services.year_calendar import get_year_calendar
 from checktime.web import create_app
 
 # Configure logging.
@@ -44,12 +61,14 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
-def _format_error_for_telegram(check_type, username, exc):
+def _format_error_for_telegram(check_type, username, exc, attempts=1):
     """Construye un mensaje claro para Telegram según el tipo de excepción.
     Mantiene la traza para el log de fichero, pero solo manda al usuario lo
     accionable."""
     exc_name = type(exc).__name__
     base = f"Check {check_type} for {username}"
+    if attempts > 1:
+        base += f" (tras {attempts} intentos)"
 
     if isinstance(exc, CheckJCIPBlocked):
         return f"🚫 {base}: {exc}"
@@ -60,8 +79,13 @@ def _format_error_for_telegram(check_type, username, exc):
             f"(intentos seguidos antes del bloqueo duro). "
             f"Confirma haciendo login manual en la web."
         )
+    if isinstance(exc, CheckJCUnconfirmed):
+        return (
+            f"⚠️ {base}: se pulsó el botón de fichar pero no se pudo confirmar el resultado ({exc}). "
+            f"Revisa en CheckJC que quedó registrado; no se reintenta para no deshacer el fichaje."
+        )
     if isinstance(exc, CheckJCSessionLost):
-        return f"⏳ {base}: sesión perdida durante el fichaje. Reintentará en el próximo ciclo."
+        return f"⏳ {base}: sesión perdida durante el fichaje."
     if isinstance(exc, CheckJCFormError):
         return f"🧩 {base}: CheckJC cambió el HTML — los selectores ya no casan. Requiere actualización del checker."
     if isinstance(exc, CheckJCUnexpectedResponse):
@@ -69,15 +93,60 @@ def _format_error_for_telegram(check_type, username, exc):
     # Cualquier otro tipo (timeout de red, error Playwright, etc.)
     return f"❌ {base}: {exc_name}: {exc}"
 
-# Initialize Telegram client
-telegram_client = TelegramClient()
+# Notifications are sent in the background so a slow Telegram API never delays the next check
+notification_queue = get_notification_queue()
+profiler = get_profiler()
 
 # Initialize service managers
 user_manager = UserManager()
-schedule_manager = ScheduleManager()
+check_event_manager = CheckEventManager()
+
+# Egress routes for the CheckJC browser sessions, and a circuit breaker per
+# subdomain and route that stops logins while CheckJC blocks its IP
+proxy_pool = get_proxy_pool()
+circuit_breakers = get_circuit_breakers()
+
+# Each check starts this many seconds before its slot so the login is done
+# by the time the button has to be clicked
+PREWARM_SECONDS = get_check_prewarm_seconds()
+# Browser sessions open at once: each is a Chromium, and shared slots (09:00,
+# 18:00) would otherwise launch one per user together
+MAX_CONCURRENT_CHECKS = get_max_concurrent_checks()
+browser_slots = threading.BoundedSemaphore(MAX_CONCURRENT_CHECKS)
+# Seconds between the pre-warm starts of the checks sharing a slot, so their
+# logins don't reach CheckJC from the same IP at the same instant
+PREWARM_STAGGER_SECONDS = 3
+# Checks are planned once a minute, for the slots starting before the next planning
+PLAN_INTERVAL_SECONDS = 60
+# A slot missed by up to this long (e.g. the scheduler was restarting) still runs at once
+LATE_GRACE_SECONDS = 60
+# A check still failing this long after its slot is given up, retries and holds included
+DEADLINE_MINUTES = get_check_deadline_minutes()
+# Seconds between retries of a held check while another check probes the route
+HOLD_POLL_SECONDS = 15
+# Buckets, in seconds, of the offset between the slot and the actual click
+CHECK_OFFSET_BUCKETS = (0.5, 1, 2, 5, 10, 15, 30, 60, 120)
+
+# (user_id, check_type, slot) of the checks already started; planning windows overlap
+_started_checks = set()
+_started_checks_lock = threading.Lock()
+# Set when the memory soft limit is reached: finish the checks in flight and restart
+draining = threading.Event()
+# While draining, checks coming up keep being planned for this long; then only running ones are awaited
+DRAIN_PLANNING_SECONDS = 300
+
+# Checks still running in the ledger from before this time were left by a previous process
+PROCESS_STARTED_AT = datetime.now()
 
 # Create Flask app
-app = create_app()
+app = create_app(with_views=False)
+
+def save_breaker_state(state):
+    """Persist a circuit breaker transition, for restarts and the admin UI."""
+    with app.app_context():
+        CircuitBreakerManager().save_breaker(state)
+
+circuit_breakers.on_change = save_breaker_state
 
 def is_working_day(user_id=None):
     """
@@ -91,27 +160,20 @@ def is_working_day(user_id=None):
     """
     with app.app_context():
         today = datetime.now().date()
-        weekday = today.weekday()
         
-        # Check if it's a holiday for this user using HolidayManager
-        holiday_manager = HolidayManager(user_id)
-        date_str = today.strftime('%Y-%m-%d')
-        holidays = holiday_manager.load_holidays(user_id)
-        
-        if date_str in holidays:
-            logger.info(f"Holiday found in database for user {user_id}: {today}")
+        # Holidays and schedules come from the user's cached year calendar,
+        # rebuilt only when the user's data version changes
+        year_calendar = get_year_calendar(user_id, today.year)
+        if year_calendar is None:
             return False
         
-        # Check if there's a schedule for today for this user using ScheduleManager
-        active_period = schedule_manager.get_active_period_for_date(today, user_id)
-        if not active_period:
-            logger.info(f"No active period for today: {today} for user {user_id}")
+        if year_calendar.is_holiday(today):
+            logger.info(f"Holiday found in database for user {user_id}: {today}")
             return False
         
-        # Check if there's a schedule configured for this day of the week
-        day_schedule = schedule_manager.get_day_schedule(active_period.id, weekday)
-        if not day_schedule:
-            logger.info(f"No schedule configured for today ({weekday}): {today} for user {user_id}")
+        # Check if an active period has a schedule for this day of the week
+        if not year_calendar.is_scheduled(today):
+            logger.info(f"No active period or no schedule configured for today ({today.weekday()}): {today} for user {user_id}")
             return False
         
         logger.info(f"Today is a working day: {today} for user {user_id}")
@@ -130,8 +192,9 @@ def get_schedule_times(user_id):
     with app.app_context():
         today = datetime.now().date()
         
-        # Get schedule times for today using ScheduleManager
-        check_in_time, check_out_time = schedule_manager.get_schedule_times_for_date(today, user_id)
+        # Overrides take priority over the regular schedule
+        year_calendar = get_year_calendar(user_id, today.year)
+        check_in_time, check_out_time = year_calendar.get_schedule_times(today) if year_calendar else (None, None)
         
         if check_in_time and check_out_time:
             logger.info(f"Using schedule from database for user {user_id}: {check_in_time} - {check_out_time}")
@@ -141,56 +204,225 @@ def get_schedule_times(user_id):
         logger.info(f"No schedule configured in the database for user {user_id}. Automatic clock in/out will not be performed.")
         return None, None
 
-def perform_check_for_user(user, check_type):
+def acquire_egress(user, hold_until):
+    """
+    Get a route to the user's CheckJC whose circuit breaker lets a login
+    through, holding the check while every route is blocked.
+    
+    Args:
+        user (User): The user to perform check for.
+        hold_until (datetime): Give up if no route opens before this time (the check's deadline).
+    
+    Returns:
+        tuple: (Proxy, CircuitBreaker) to use and report the login outcome to.
+    
+    Raises:
+        CheckJCIPBlocked: If every route is still blocked at hold_until.
+    """
+    subdomain = user.checkjc_subdomain
+    while True:
+        acquired = proxy_pool.acquire(user.id, subdomain)
+        if acquired is not None:
+            return acquired
+        # 0 while another check is probing the route: poll until it reports back
+        wait = max(proxy_pool.seconds_until_available(subdomain), HOLD_POLL_SECONDS)
+        if datetime.now() + timedelta(seconds=wait) > hold_until:
+            minutes = int(wait // 60) + 1
+            raise CheckJCIPBlocked(
+                f"CheckJC has blocked every egress IP for {subdomain}. Retry available in {minutes} minutes.",
+                minutes=minutes,
+            )
+        logger.info(f"Holding check for user {user.username} {wait:.0f}s: every egress to {subdomain} is blocked")
+        time.sleep(wait)
+
+def perform_check_for_user(user, check_type, slot=None):
     """
     Perform the check-in/out process for a specific user.
     
     Args:
         user (User): The user to perform check for.
         check_type (str): Type of check ('in' or 'out')
+        slot (datetime, optional): Scheduled time. The browser logs in right
+            away and clicks the check button at this time.
     """
     if not is_working_day(user.id):
         message = f"Today is not a working day or it's a holiday for user {user.username}. No check will be performed."
         logger.info(message)
         return
 
+    # The ledger row is the idempotency key: a restarted or second scheduler skips the check
+    day = (slot or datetime.now()).date()
+    with app.app_context():
+        claimed = check_event_manager.claim_check(user.id, day, check_type, slot)
+    if claimed is False:
+        logger.info(f"Check {check_type} of {day} for user {user.username} was already started; skipping")
+        return
+    if claimed is None:
+        logger.warning(f"Could not record check {check_type} of {day} for user {user.username} in the ledger; "
+                       f"performing it anyway")
+
     logger.info(f"Starting {check_type} check process for user {user.username}...")
     
-    try:
-        with CheckJCClient(username=user.checkjc_username, password=user.checkjc_password, subdomain=user.checkjc_subdomain) as client:
-            client.login()
-            if check_type == "in":
-                client.check_in()
-                icon = "🟢"
-            else:
-                client.check_out()
-                icon = "🔴"
-            logger.info(f"{check_type.capitalize()} check completed successfully for user {user.username}.")
+    deadline = (slot or datetime.now()) + timedelta(minutes=DEADLINE_MINUTES)
+    attempt = 0
+    while True:
+        attempt += 1
+        timings = {}
+        try:
+            checked_at = attempt_check(user, check_type, slot, deadline, timings)
+            with app.app_context():
+                check_event_manager.record_attempt(user.id, day, check_type, attempt, timings)
+                check_event_manager.finish_check(user.id, day, check_type, CheckEvent.RESULT_SUCCEEDED, checked_at)
+            metrics.inc('check_attempts_total', check_type=check_type, outcome='success', error='none')
             if hasattr(user, 'telegram_chat_id') and user.telegram_chat_id:
                 if (hasattr(user, 'telegram_chat_id') and user.telegram_chat_id and getattr(user, 'telegram_notifications_enabled', False)):
-                    telegram_client.send_message(f"{icon} Check {check_type} completed successfully", chat_id=user.telegram_chat_id)
+                    icon = "🟢" if check_type == "in" else "🔴"
+                    notification_queue.enqueue(f"{icon} Check {check_type} completed successfully", chat_id=user.telegram_chat_id)
+            return
+        except Exception as e:
+            with app.app_context():
+                check_event_manager.record_attempt(user.id, day, check_type, attempt, timings, e)
+            if isinstance(e, CheckJCUnconfirmed):
+                # Already clicked: another attempt would click again and undo the check
+                metrics.inc('check_attempts_total', check_type=check_type, outcome='unconfirmed',
+                            error=type(e.__cause__ or e).__name__)
+                with app.app_context():
+                    check_event_manager.finish_check(user.id, day, check_type, CheckEvent.RESULT_UNCONFIRMED,
+                                                     e.checked_at)
+                logger.warning(f"Check {check_type} for user {user.username} was clicked but not confirmed: {e}")
+                if hasattr(user, 'telegram_chat_id') and user.telegram_chat_id and getattr(user, 'telegram_notifications_enabled', False):
+                    notification_queue.enqueue(_format_error_for_telegram(check_type, user.username, e, attempt),
+                                               chat_id=user.telegram_chat_id)
+                return
+            # Retried by this check's own thread, so other users' checks aren't delayed
+            policy = get_retry_policy(e)
+            if policy is not None and attempt < policy.max_attempts:
+                delay = policy.delay(attempt)
+                if datetime.now() + timedelta(seconds=delay) < deadline:
+                    metrics.inc('check_attempts_total', check_type=check_type, outcome='retried',
+                                error=type(e).__name__)
+                    logger.warning(
+                        f"Check {check_type} for user {user.username} failed (attempt {attempt}, "
+                        f"{type(e).__name__}: {e}); retrying in {delay:.0f}s"
+                    )
+                    time.sleep(delay)
+                    continue
+            metrics.inc('check_attempts_total', check_type=check_type, outcome='failed', error=type(e).__name__)
+            with app.app_context():
+                check_event_manager.finish_check(user.id, day, check_type, CheckEvent.RESULT_FAILED)
+            # logger.exception incluye el traceback completo: tipo de excepción,
+            # mensaje y línea exacta donde se lanzó. Va al fichero y a stdout.
+            logger.exception(
+                "Error during check %s for user %s (%s)",
+                check_type, user.username, type(e).__name__,
+            )
+            telegram_msg = _format_error_for_telegram(check_type, user.username, e, attempt)
+            if hasattr(user, 'telegram_chat_id') and user.telegram_chat_id and getattr(user, 'telegram_notifications_enabled', False):
+                notification_queue.enqueue(telegram_msg, chat_id=user.telegram_chat_id)
+            return
+
+def attempt_check(user, check_type, slot, deadline, timings):
+    """
+    Make one attempt at a check: log in and click the check button.
+    
+    Args:
+        user (User): The user to perform check for.
+        check_type (str): Type of check ('in' or 'out')
+        slot (datetime): Scheduled time to click at, or None to click at once.
+        deadline (datetime): Give up holding for a blocked route after this time.
+        timings (dict): Filled with the seconds spent per phase, even if the attempt fails.
+    
+    Returns:
+        datetime: When the check button was clicked.
+    """
+    breaker = None
+    client = None
+    started = time.perf_counter()
+    try:
+        # Each user keeps the same egress IP while CheckJC hasn't blocked it
+        proxy, breaker = acquire_egress(user, deadline)
+        timings['egress'] = round(time.perf_counter() - started, 3)
+        waited = time.perf_counter()
+        if not browser_slots.acquire(blocking=False):
+            logger.info(f"{MAX_CONCURRENT_CHECKS} browser sessions open; check {check_type} for user "
+                        f"{user.username} waits for one to finish")
+            browser_slots.acquire()
+        timings['browser_wait'] = round(time.perf_counter() - waited, 3)
+        metrics.observe_histogram('check_browser_wait_seconds', timings['browser_wait'], LATENCY_BUCKETS)
+        try:
+            client = CheckJCClient(username=user.checkjc_username, password=user.checkjc_password,
+                                   subdomain=user.checkjc_subdomain, proxy=proxy)
+            with client:
+                client.login()
+                breaker.record_success()
+                if check_type == "in":
+                    client.check_in(at=slot)
+                else:
+                    client.check_out(at=slot)
+        finally:
+            browser_slots.release()
+        timings.update(client.phase_timings)
+        logger.info(f"{check_type.capitalize()} check completed successfully for user {user.username}.")
+        if slot and client.checked_at:
+            offset = (client.checked_at - slot).total_seconds()
+            metrics.observe_histogram('check_offset_seconds', offset, CHECK_OFFSET_BUCKETS, check_type=check_type)
+            logger.info(f"Check {check_type} for user {user.username} clicked {offset:+.2f}s from {slot:%H:%M}")
+        return client.checked_at
     except Exception as e:
-        # logger.exception incluye el traceback completo: tipo de excepción,
-        # mensaje y línea exacta donde se lanzó. Va al fichero y a stdout.
-        logger.exception(
-            "Error during check %s for user %s (%s)",
-            check_type, user.username, type(e).__name__,
-        )
-        telegram_msg = _format_error_for_telegram(check_type, user.username, e)
-        if hasattr(user, 'telegram_chat_id') and user.telegram_chat_id and getattr(user, 'telegram_notifications_enabled', False):
-            telegram_client.send_message(telegram_msg, chat_id=user.telegram_chat_id)
+        # Phases up to and including the one that failed
+        timings.setdefault('egress', round(time.perf_counter() - started, 3))
+        if client is not None:
+            timings.update(client.phase_timings)
+        # Block signals feed the breaker; other failures say nothing about the IP
+        if breaker is not None:
+            if isinstance(e, CheckJCIPBlocked):
+                breaker.record_block(e.minutes)
+            elif isinstance(e, CheckJCLoginRejected):
+                breaker.record_rejection()
+            else:
+                breaker.release()
+        if client is not None and client.checked_at is not None and not isinstance(e, CheckJCUnconfirmed):
+            # Whatever failed after the click, the check may have been registered
+            raise CheckJCUnconfirmed(f"{type(e).__name__} after clicking: {e}", checked_at=client.checked_at) from e
+        raise
+
+def report_interrupted_checks():
+    """Close the checks a previous scheduler process left running, and tell their users to verify them."""
+    with app.app_context():
+        for event in check_event_manager.fail_interrupted_checks(PROCESS_STARTED_AT):
+            user = user_manager.get_by_id(event.user_id)
+            username = user.username if user else event.user_id
+            when = f"{event.slot:%H:%M}" if event.slot else f"{event.started_at:%H:%M}"
+            logger.warning(f"Check {event.check_type} of {event.date} at {when} for user {username} "
+                           f"was interrupted by a scheduler restart; marked as failed")
+            if user and user.telegram_chat_id and user.telegram_notifications_enabled:
+                # Mensaje al usuario: no sabemos si llegó a pulsar el botón
+                notification_queue.enqueue(
+                    f"⚠️ Check {event.check_type} for {username} ({event.date} {when}): el scheduler se "
+                    f"reinició durante el fichaje. Revisa en CheckJC si quedó registrado.",
+                    chat_id=user.telegram_chat_id,
+                )
+
+def apply_check_event_retention():
+    """Create the coming months' check history partitions and drop the expired ones."""
+    with app.app_context():
+        check_event_manager.apply_retention(get_check_event_retention_months())
 
-def get_users_to_check_now():
+def get_upcoming_checks(now=None):
     """
-    Returns a list of (user, check_type) tuples for users who need to check in or out at the current time.
+    Returns a list of (user, check_type, slot) tuples for the checks whose
+    pre-warm phase starts before the next planning, plus the slots missed by
+    less than LATE_GRACE_SECONDS.
     """
     with app.app_context():
         users = user_manager.get_all_with_checkjc_configured()
     if not users:
         return []
 
-    current_time = datetime.now().strftime("%H:%M")
-    users_to_check = []
+    now = now or datetime.now()
+    window_start = now - timedelta(seconds=LATE_GRACE_SECONDS)
+    window_end = now + timedelta(seconds=PREWARM_SECONDS + PLAN_INTERVAL_SECONDS)
+    upcoming = []
 
     for user in users:
         if not is_working_day(user.id):
@@ -198,17 +430,88 @@ def get_users_to_check_now():
         check_in_time, check_out_time = get_schedule_times(user.id)
         if check_in_time is None or check_out_time is None:
             continue
-        if current_time == check_in_time:
-            users_to_check.append((user, "in"))
-        elif current_time == check_out_time:
-            users_to_check.append((user, "out"))
-    return users_to_check
+        for check_type, check_time in (("in", check_in_time), ("out", check_out_time)):
+            slot = datetime.combine(now.date(), datetime.strptime(check_time, "%H:%M").time())
+            if window_start <= slot < window_end:
+                upcoming.append((user, check_type, slot))
+    return upcoming
+
+def run_check_at(user, check_type, slot, stagger=0):
+    """Wait for the pre-warm time of a slot, plus `stagger` seconds, then perform its check."""
+    delay = (slot - timedelta(seconds=PREWARM_SECONDS - stagger) - datetime.now()).total_seconds()
+    if delay > 0:
+        time.sleep(delay)
+    perform_check_for_user(user, check_type, slot)
+
+def running_checks():
+    """Number of check threads alive, waiting for their slot or checking."""
+    return sum(1 for thread in threading.enumerate() if thread.name.startswith('check-'))
+
+def count_running_checks():
+    """Publish how many check threads are alive (a metrics collector)."""
+    metrics.set('scheduler_running_checks', running_checks())
+
+metrics.add_collector(count_running_checks)
 
 def schedule_check():
-    """Check if it's time to perform check-in/out based on schedules for all users, and do it sequentially."""
-    users_to_check = get_users_to_check_now()
-    for user, check_type in users_to_check:
-        perform_check_for_user(user, check_type)
+    """Start a pre-warmed check, in its own thread, for every slot coming up."""
+    started = time.perf_counter()
+    try:
+        with profiler.profile('tick', 'schedule_check'):
+            _schedule_check()
+    finally:
+        metrics.observe_histogram('scheduler_tick_seconds', time.perf_counter() - started, LATENCY_BUCKETS)
+
+def _schedule_check():
+    now = datetime.now()
+    with _started_checks_lock:
+        # Forget the slots that can no longer come up again
+        for started in [c for c in _started_checks if c[2] < now - timedelta(seconds=LATE_GRACE_SECONDS)]:
+            _started_checks.discard(started)
+    
+    upcoming = get_upcoming_checks(now)
+    metrics.set('scheduler_upcoming_checks', len(upcoming))
+    # Checks already given a pre-warm start per slot, to stagger the next ones
+    per_slot = {}
+    for user, check_type, slot in upcoming:
+        key = (user.id, check_type, slot)
+        with _started_checks_lock:
+            if key in _started_checks:
+                continue
+            _started_checks.add(key)
+        metrics.inc('scheduler_checks_started_total', check_type=check_type)
+        # Only the sessions that can run together are spread; the rest wait for a browser slot
+        position = per_slot.get(slot, 0)
+        per_slot[slot] = position + 1
+        stagger = min(min(position, MAX_CONCURRENT_CHECKS - 1) * PREWARM_STAGGER_SECONDS, PREWARM_SECONDS // 2)
+        logger.info(f"Check {check_type} for user {user.username} at {slot:%H:%M}: logging in at "
+                    f"{slot - timedelta(seconds=PREWARM_SECONDS - stagger):%H:%M:%S}")
+        blocked_for = proxy_pool.seconds_until_available(user.checkjc_subdomain)
+        if blocked_for > 0:
+            logger.warning(f"Every egress to {user.checkjc_subdomain} is blocked for {blocked_for:.0f}s more; "
+                           f"check {check_type} for user {user.username} will be held")
+        threading.Thread(
+            target=run_check_at, args=(user, check_type, slot, stagger),
+            name=f"check-{user.id}-{check_type}", daemon=True,
+        ).start()
+
+def drain_and_restart():
+    """
+    Let the checks in flight finish, then exit so supervisord starts a fresh process.
+    
+    Slots coming up in the next DRAIN_PLANNING_SECONDS are still planned, so
+    a restart doesn't skip them; the new process's ledger claims keep any
+    check from running twice.
+    """
+    logger.warning(f"Draining the scheduler before restarting ({running_checks()} checks in flight)")
+    started = time.monotonic()
+    while running_checks():
+        if time.monotonic() - started < DRAIN_PLANNING_SECONDS:
+            schedule.run_pending()
+        time.sleep(1)
+    logger.warning("Scheduler drained, restarting")
+    notification_queue.stop(timeout=30)
+    sys.exit(RESTART_EXIT_CODE)
 
 def perform_check_in():
     """Perform the check-in process for all eligible users."""
@@ -221,34 +524,50 @@ def perform_check_out():
 def main():
     """Main function that runs only the scheduler service."""
     logger.info("Starting automatic check-in/out service for all users...")
+    start_metrics_server(get_scheduler_metrics_port())
+    MemoryWatchdog("scheduler", get_scheduler_memory_soft_limit_mb(),
+                   on_limit=draining.set, sessions=browser_sessions).start()
     
     try:
         # Initialize app context once at startup
         with app.app_context():
+            # Keep honouring the blocks seen before a restart
+            circuit_breakers.restore(CircuitBreakerManager().get_all_breakers())
             # Send message inside the app context 
-            telegram_client.send_message("🚀 Starting automatic check-in/out service for all users")
+            notification_queue.enqueue("🚀 Starting automatic check-in/out service for all users")
+
+        # Before planning: the ledger keeps these slots from being checked again
+        report_interrupted_checks()
 
         # Schedule tasks with dynamic schedules
         schedule.every().minute.do(lambda: schedule_check())
+        apply_check_event_retention()
+        schedule.every().day.at("03:30").do(apply_check_event_retention)
+        # Admin broadcasts whose web worker died mid-run
+        schedule.every(5).minutes.do(lambda: resume_stale_broadcasts(app))
 
         # Keep the script running
-        while True:
+        while not draining.is_set():
             try:
                 schedule.run_pending()
-                time.sleep(60)  # Check every minute
+                time.sleep(1)  # The planning job itself runs once a minute
             except Exception as e:
                 error_msg = f"Error in main loop: {str(e)}"
                 logger.error(error_msg)
                 with app.app_context():
-                    telegram_client.send_message(f"❌ {error_msg}")
+                    notification_queue.enqueue(f"❌ {error_msg}")
                 time.sleep(300)  # Wait 5 minutes before retrying
+        # The memory watchdog asked for a restart
+        drain_and_restart()
     except Exception as e:
         logger.error(f"Fatal error in scheduler service: {str(e)}")
         # Try to send error notification with app context
         try:
             with app.app_context():
                 # Mensaje a la cuenta general, no específico de un usuario
-                telegram_client.send_message(f"💥 Fatal error in scheduler service: {str(e)}")
+                notification_queue.enqueue(f"💥 Fatal error in scheduler service: {str(e)}")
+            # The process is about to exit: give the queued messages a chance to go out
+            notification_queue.stop(timeout=30)
         except:
             logger.error("Could not send error notification")
 
@@ -3,7 +3,7 @@ Centralized configuration management for CheckTime.
 """
 
 import os
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
 
 # Cache for configuration values
 _config_cache: Dict[str, Any] = {}
@@ -38,6 +38,10 @@ def get_database_url() -> str:
     
     return f"postgresql://{user}:{password}@{host}:{port}/{db_name}"
 
+def get_skip_schema_check() -> bool:
+    """Whether processes should skip the schema version check at start"""
+    return str(get_config('SKIP_SCHEMA_CHECK', 'false')).lower() == 'true'
+
 def get_database_storage_path() -> str:
     """Get the database storage path for Docker volume"""
     return get_config('DB_STORAGE_PATH', 'postgres_data')
@@ -80,6 +84,86 @@ def get_telegram_bot_name() -> str:
     """Get the Telegram bot name"""
     return get_config('TELEGRAM_BOT_NAME', '@CheckTimeBot')
 
+def get_telegram_connect_timeout() -> float:
+    """Get the timeout in seconds for opening a connection to the Telegram API"""
+    return float(get_config('TELEGRAM_CONNECT_TIMEOUT', '5'))
+
+def get_telegram_read_timeout() -> float:
+    """Get the timeout in seconds for reading a Telegram API response"""
+    return float(get_config('TELEGRAM_READ_TIMEOUT', '15'))
+
+def get_telegram_max_retries() -> int:
+    """Get the number of times a failed Telegram API call is retried"""
+    return int(get_config('TELEGRAM_MAX_RETRIES', '3'))
+
+def get_telegram_max_retry_after() -> float:
+    """Get the longest Telegram retry_after, in seconds, the client waits for before giving up"""
+    return float(get_config('TELEGRAM_MAX_RETRY_AFTER', '30'))
+
+def get_telegram_per_chat_interval() -> float:
+    """Get the minimum time in seconds between two queued messages to the same chat"""
+    return float(get_config('TELEGRAM_PER_CHAT_INTERVAL', '1'))
+
+def get_telegram_global_rate() -> float:
+    """Get the maximum number of queued messages sent per second over all chats"""
+    return float(get_config('TELEGRAM_GLOBAL_RATE', '30'))
+
+# Notification queue configuration
+def get_notification_queue_max_size() -> int:
+    """Get the number of notifications kept waiting before the overflow policy applies"""
+    return int(get_config('NOTIFICATION_QUEUE_MAX_SIZE', '1000'))
+
+def get_notification_queue_overflow() -> str:
+    """Get what to do with a notification when the queue is full: drop_oldest or drop_newest"""
+    return get_config('NOTIFICATION_QUEUE_OVERFLOW', 'drop_oldest').lower()
+
+def get_broadcast_workers() -> int:
+    """Get the number of threads sending an admin broadcast concurrently"""
+    return int(get_config('BROADCAST_WORKERS', '8'))
+
+def get_broadcast_stale_seconds() -> int:
+    """Get the seconds without progress after which an unfinished broadcast is resumed by the scheduler"""
+    return int(get_config('BROADCAST_STALE_SECONDS', '600'))
+
+# Bot configuration
+def get_bot_workers() -> int:
+    """Get the number of threads the bot uses to process updates from different chats"""
+    return int(get_config('BOT_WORKERS', '4'))
+
+def get_telegram_update_mode() -> str:
+    """Get how the bot receives updates: polling (getUpdates) or webhook"""
+    return get_config('TELEGRAM_UPDATE_MODE', 'polling').lower()
+
+def get_telegram_webhook_url() -> str:
+    """Get the public HTTPS URL Telegram posts updates to in webhook mode"""
+    return get_config('TELEGRAM_WEBHOOK_URL', '')
+
+def get_telegram_webhook_secret() -> str:
+    """Get the secret Telegram sends with every webhook request"""
+    return get_config('TELEGRAM_WEBHOOK_SECRET', '')
+
+# Scheduler configuration
+def get_check_prewarm_seconds() -> int:
+    """Get how many seconds before a scheduled check the browser logs in"""
+    return int(get_config('CHECK_PREWARM_SECONDS', '45'))
+
+def get_max_concurrent_checks() -> int:
+    """Get how many CheckJC browser sessions the scheduler runs at the same time"""
+    return max(1, int(get_config('MAX_CONCURRENT_CHECKS', '3')))
+
+def get_check_deadline_minutes() -> int:
+    """Get how many minutes after its scheduled time a failing check is still retried"""
+    return int(get_config('CHECK_DEADLINE_MINUTES', '10'))
+
+def get_check_event_retention_months() -> int:
+    """Get how many months of check history are kept besides the current one"""
+    return int(get_config('CHECK_EVENT_RETENTION_MONTHS', '12'))
+
+def get_checkjc_proxies() -> List[str]:
+    """Get the egress proxy URLs for CheckJC sessions ('direct' for no proxy)"""
+    value = get_config('CHECKJC_PROXIES', '') or ''
+    return [proxy.strip() for proxy in value.split(',') if proxy.strip()]
+
 # Selenium configuration
 def get_selenium_timeout() -> int:
     """Get the Selenium timeout in seconds"""
@@ -96,4 +180,73 @@ def get_log_date_format() -> str:
 
 def get_simulation_mode() -> bool:
     """Get the simulation mode from environment variables."""
-    return os.getenv("SIMULATION_MODE", "false").lower() == "true"
\ No newline at end of file
+    return os.getenv("SIMULATION_MODE", "false").lower() == "true"
+
+# Metrics configuration
+def get_metrics_host() -> str:
+    """Get the address the scheduler and bot metrics servers listen on"""
+    return get_config('METRICS_HOST', '127.0.0.1')
+
+def get_scheduler_metrics_port() -> int:
+    """Get the port of the scheduler's /metrics endpoint (0 disables it)"""
+    return int(get_config('SCHEDULER_METRICS_PORT', '9101'))
+
+def get_bot_metrics_port() -> int:
+    """Get the port of the bot's /metrics endpoint (0 disables it)"""
+    return int(get_config('BOT_METRICS_PORT', '9102'))
+
+def get_metrics_token() -> str:
+    """Get the bearer token /metrics scrapes must send (empty: only local scrapes)"""
+    return get_config('METRICS_TOKEN', '')
+
+def get_metrics_dir() -> str:
+    """Get the directory where web workers share their metrics (empty: this process only)"""
+    return get_config('METRICS_DIR', '')
+
+# Profiling configuration
+def get_profiling_enabled() -> bool:
+    """Whether scheduler ticks and web requests are profiled regardless of the admin toggle"""
+    return str(get_config('PROFILING_ENABLED', 'false')).lower() == 'true'
+
+def get_profile_dir() -> str:
+    """Get the directory where profiles and the admin toggle are kept"""
+    return get_config('PROFILE_DIR', '/var/log/checktime/profiles')
+
+def get_profile_keep() -> int:
+    """Get how many of the slowest profiles are kept per kind (tick, request)"""
+    return int(get_config('PROFILE_KEEP', '20'))
+
+def get_profile_min_seconds() -> float:
+    """Get the shortest run, in seconds, whose profile is kept"""
+    return float(get_config('PROFILE_MIN_SECONDS', '0.5'))
+
+def get_profile_sample_rate() -> float:
+    """Get the share (0 to 1) of the selected web requests that are profiled"""
+    return float(get_config('PROFILE_SAMPLE_RATE', '0.1'))
+
+def get_profile_endpoints() -> List[str]:
+    """Get the endpoints or blueprints whose requests are profiled (empty: all)"""
+    value = get_config('PROFILE_ENDPOINTS', '') or ''
+    return [endpoint.strip() for endpoint in value.split(',') if endpoint.strip()]
+
+# Memory watchdog configuration
+def get_memory_check_seconds() -> float:
+    """Get the seconds between two memory checks of the scheduler and bot"""
+    return float(get_config('MEMORY_CHECK_SECONDS', '60'))
+
+def get_memory_tracemalloc() -> bool:
+    """Whether the memory watchdog traces allocations and logs where memory grows"""
+    return str(get_config('MEMORY_TRACEMALLOC', 'false')).lower() == 'true'
+
+def get_scheduler_memory_soft_limit_mb() -> int:
+    """Get the scheduler's resident memory, in MB, at which it drains and restarts (0 disables it)"""
+    return int(get_config('SCHEDULER_MEMORY_SOFT_LIMIT_MB', '0'))
+
+def get_bot_memory_soft_limit_mb() -> int:
+    """Get the bot's resident memory, in MB, at which it drains and restarts (0 disables it)"""
+    return int(get_config('BOT_MEMORY_SOFT_LIMIT_MB', '0'))
+
+# Web cache configuration
+def get_fragment_cache_max_bytes() -> int:
+    """Get the size limit of the rendered HTML fragment cache of each web worker (0 disables it)"""
+    return int(get_config('FRAGMENT_CACHE_MAX_BYTES', str(4 * 1024 * 1024)))
@@ -0,0 +1,140 @@
+"""
+Per-user data version for CheckTime.
+
+Every flush that adds, changes or deletes a Holiday, DayOverride,
+SchedulePeriod or DaySchedule bumps `User.data_version` for the owning user
+in the same transaction. Caches built from that data (see
+checktime.shared.services.year_calendar) store the version they were built
+at and compare it with the database before being reused, so a write made by
+one process (a gunicorn worker, the bot) invalidates the caches of every
+other process (the scheduler) without any messaging between them.
+"""
+
+import logging
+import threading
+from collections import OrderedDict
+from typing import Callable, Generic, Hashable, Optional, Set, Tuple, TypeVar
+
+from sqlalchemy import event, select, update
+from sqlalchemy.orm import Session
+
+from checktime.shared.db import db
+from checktime.shared.models.user import User
+from checktime.shared.models.holiday import Holiday
+from checktime.shared.models.schedule import SchedulePeriod, DaySchedule, DayOverride
+
+# Create logger
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+# Models whose rows carry user_id directly
+_USER_OWNED = (Holiday, DayOverride, SchedulePeriod)
+
+def _owner_of(session: Session, obj) -> Optional[int]:
+    """Return the user_id a calendar row belongs to, or None if it isn't one."""
+    if isinstance(obj, _USER_OWNED):
+        return obj.user_id
+    if isinstance(obj, DaySchedule):
+        if obj.period is not None:
+            return obj.period.user_id
+        if obj.period_id is not None:
+            return session.connection().execute(
+                select(SchedulePeriod.user_id).where(SchedulePeriod.id == obj.period_id)
+            ).scalar()
+    return None
+
+@event.listens_for(Session, "after_flush")
+def _bump_data_version(session: Session, flush_context) -> None:
+    """Bump the data version of every user whose calendar rows were flushed."""
+    user_ids: Set[int] = set()
+    for obj in list(session.new) + list(session.deleted):
+        user_ids.add(_owner_of(session, obj))
+    for obj in session.dirty:
+        if session.is_modified(obj, include_collections=False):
+            user_ids.add(_owner_of(session, obj))
+    user_ids.discard(None)
+    if not user_ids:
+        return
+
+    session.connection().execute(
+        update(User)
+        .where(User.id.in_(user_ids))
+        .values(data_version=User.data_version + 1)
+        .execution_options(synchronize_session=False)
+    )
+    logger.debug(f"Bumped data version for users {sorted(user_ids)}")
+
+def get_data_version(user_id: int) -> int:
+    """
+    Read the current data version of a user.
+
+    This is a single primary key lookup and always goes to the database, so
+    it sees writes committed by other processes.
+
+    Args:
+        user_id (int): The user ID
+
+    Returns:
+        int: The data version, or -1 if the user does not exist
+    """
+    version = db.session.execute(
+        select(User.data_version).where(User.id == user_id)
+    ).scalar()
+    return -1 if version is None else version
+
+class VersionedCache(Generic[T]):
+    """
+    Per-process LRU cache of values derived from one user's data.
+
+    Entries are keyed by (user_id, key) and remember the data version they
+    were built at; a lookup whose version no longer matches rebuilds the value.
+    """
+
+    def __init__(self, builder: Callable[[int, Hashable, int], T], max_entries: int = 512):
+        """
+        Initialize the cache.
+
+        Args:
+            builder (Callable[[int, Hashable, int], T]): Builds a value from
+                (user_id, key, version); the version is read before the data
+            max_entries (int): Number of entries kept, least recently used first out
+        """
+        self.builder = builder
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[int, Hashable], Tuple[int, T]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id: int, key: Hashable = None) -> T:
+        """
+        Get the value for a user, rebuilding it if the user's data changed.
+
+        Must be called inside an app context.
+
+        Args:
+            user_id (int): The user ID
+            key (Hashable): Extra key, e.g. a year
+
+        Returns:
+            T: The cached or freshly built value
+        """
+        version = get_data_version(user_id)
+        cache_key = (user_id, key)
+        with self._lock:
+            entry = self._entries.get(cache_key)
+            if entry is not None and entry[0] == version:
+                self._entries.move_to_end(cache_key)
+                return entry[1]
+
+        value = self.builder(user_id, key, version)
+        with self._lock:
+            self._entries[cache_key] = (version, value)
+            self._entries.move_to_end(cache_key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return value
+
+    def clear(self) -> None:
+        """Drop every entry."""
+        with self._lock:
+            self._entries.clear()
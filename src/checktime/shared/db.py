@@ -3,13 +3,19 @@ Database connection and utilities for CheckTime.
 """
 
 import logging
+import time
+from typing import Optional
+
 from flask_sqlalchemy import SQLAlchemy
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import OperationalError, ProgrammingError
 from sqlalchemy.orm import scoped_session, sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
 from datetime import datetime
 
 from checktime.shared.config import get_database_url
+from checktime.shared.metrics import LATENCY_BUCKETS, metrics
 
 # Initialize SQLAlchemy objects
 db = SQLAlchemy()
@@ -18,10 +24,43 @@ Base = declarative_base()
 # Create logger
 logger = logging.getLogger(__name__)
 
+# Version of the schema the code expects. Bump it together with a new step
+# in checktime.shared.migrate.MIGRATIONS whenever the models change.
+SCHEMA_VERSION = 9
+
+class SchemaVersionError(RuntimeError):
+    """The database schema does not match the version the code expects."""
+
+# Every engine of the process reports its query times, labelled by statement
+# kind so the label set stays small.
+QUERY_OPERATIONS = ('SELECT', 'INSERT', 'UPDATE', 'DELETE')
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _start_query_timer(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_started', []).append(time.perf_counter())
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _observe_query_time(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info['query_started'].pop()
+    words = statement.split(None, 1)
+    operation = words[0].upper() if words and words[0].upper() in QUERY_OPERATIONS else 'OTHER'
+    metrics.observe_histogram('db_query_duration_seconds', time.perf_counter() - started,
+                              LATENCY_BUCKETS, operation=operation)
+
+@event.listens_for(Engine, "handle_error")
+def _discard_query_timer(context):
+    # A failed statement never reaches after_cursor_execute
+    started = context.connection.info.get('query_started') if context.connection is not None else None
+    if started:
+        started.pop()
+
 def init_db(app=None):
     """
     Initialize the database connection.
     
+    Tables are NOT created here: schema creation and upgrades run once per
+    deploy through `python -m checktime.shared.migrate`.
+    
     Args:
         app: Flask app to initialize with (optional)
     
@@ -31,12 +70,6 @@ def init_db(app=None):
     if app:
         # Flask app integration
         db.init_app(app)
-        
-        # Create tables
-        with app.app_context():
-            db.create_all()
-            logger.info("Database tables created")
-        
         return db
     
     # Standalone SQLAlchemy session (for scheduler or scripts)
@@ -45,12 +78,53 @@ def init_db(app=None):
     Session = scoped_session(session_factory)
     Base.query = Session.query_property()
     
-    # Create tables
-    Base.metadata.create_all(bind=engine)
-    logger.info("Database tables created")
-    
     return Session
 
+def get_schema_version() -> Optional[int]:
+    """
+    Read the schema version stamped in the database.
+    
+    Must be called inside an app context.
+    
+    Returns:
+        Optional[int]: The stamped version, or None if the database has never
+        been migrated (no schema_version table or no row in it)
+    """
+    try:
+        return db.session.execute(text("SELECT MAX(version) FROM schema_version")).scalar()
+    except (OperationalError, ProgrammingError):
+        db.session.rollback()
+        return None
+
+def check_schema_version(app) -> int:
+    """
+    Fail fast if the database schema does not match SCHEMA_VERSION.
+    
+    This is a single-row read, cheap enough to run on every process start
+    (including every gunicorn worker recycle).
+    
+    Args:
+        app: Flask app bound to the database
+    
+    Returns:
+        int: The schema version found in the database
+    
+    Raises:
+        SchemaVersionError: If the database is missing, older or newer than the code
+    """
+    with app.app_context():
+        version = get_schema_version()
+    
+    if version != SCHEMA_VERSION:
+        found = "no schema" if version is None else f"version {version}"
+        raise SchemaVersionError(
+            f"Database has {found} but this code expects schema version {SCHEMA_VERSION}. "
+            f"Run `python -m checktime.shared.migrate` before starting the services."
+        )
+    
+    logger.info(f"Database schema version {version} OK")
+    return version
+
 def get_session():
     """
     Get a database session for standalone operations.
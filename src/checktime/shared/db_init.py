@@ -16,6 +16,7 @@ from checktime.shared.models import User, Holiday, SchedulePeriod, DaySchedule
 from checktime.shared.repository import user_repository, holiday_repository
 from checktime.shared.repository import schedule_period_repository, day_schedule_repository
 from checktime.shared.services.user_manager import UserManager
+from checktime.shared.migrate import upgrade_schema
 
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
@@ -28,14 +29,14 @@ def init_db():
     app = Flask(__name__)
     app.config["SQLALCHEMY_DATABASE_URI"] = get_database_url()
     app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    db.init_app(app)
+    
+    # Create or upgrade tables and stamp the schema version
+    upgrade_schema(app)
+    logger.info("Tables created successfully")
     
     # Initialize the database with the Flask app
     with app.app_context():
-        # Create tables
-        db.init_app(app)
-        db.create_all()
-        logger.info("Tables created successfully")
-        
         # Check if admin user exists
         admin = User.query.filter_by(username='admin').first()
         if not admin:
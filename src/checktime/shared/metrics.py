@@ -0,0 +1,224 @@
+"""
+In-process metrics for CheckTime.
+
+Counters, gauges, latency summaries and histograms are kept per process (the
+web workers, the bot and the scheduler each have their own) and identified by
+a name plus a small set of labels, e.g.
+`metrics.inc('telegram_requests_total', method='sendMessage', outcome='ok')`.
+Each process serves them at /metrics (see checktime.shared.metrics_exporter).
+"""
+
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# (name, sorted label items)
+MetricKey = Tuple[str, Tuple[Tuple[str, str], ...]]
+
+# Default histogram buckets for latencies, in seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+def _key(name: str, labels: Dict[str, object]) -> MetricKey:
+    return name, tuple(sorted((label, str(value)) for label, value in labels.items()))
+
+def percentile(values: List[float], q: float) -> float:
+    """
+    Nearest-rank percentile of a list of values.
+
+    Args:
+        values (List[float]): Observed values, in any order
+        q (float): Percentile, 0 to 100
+
+    Returns:
+        float: The smallest value with at least q% of the values at or below it; 0.0 if empty
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * q // 100))
+    return ordered[min(int(rank), len(ordered)) - 1]
+
+class Summary:
+    """Count, total and maximum of observed values (usually seconds)."""
+
+    __slots__ = ('count', 'total', 'max')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def as_dict(self) -> Dict[str, float]:
+        return {
+            'count': self.count,
+            'sum': self.total,
+            'max': self.max,
+            'avg': self.total / self.count if self.count else 0.0,
+        }
+
+class Histogram:
+    """Count of observed values per bucket, plus their count and total."""
+
+    __slots__ = ('bounds', 'counts', 'count', 'total')
+
+    def __init__(self, bounds: Sequence[float]):
+        self.bounds = tuple(sorted(bounds))
+        # One slot per bound plus a last one for values above every bound
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, value: float) -> None:
+        index = len(self.bounds)
+        for i, bound in enumerate(self.bounds):
+            if value <= bound:
+                index = i
+                break
+        self.counts[index] += 1
+        self.count += 1
+        self.total += value
+
+    def as_dict(self) -> Dict[str, object]:
+        cumulative = 0
+        buckets = {}
+        for bound, count in zip(self.bounds + (float('inf'),), self.counts):
+            cumulative += count
+            buckets[bound] = cumulative
+        return {'buckets': buckets, 'count': self.count, 'sum': self.total}
+
+class Metrics:
+    """Thread-safe registry of counters, gauges, summaries and histograms."""
+
+    def __init__(self):
+        self._counters: Dict[MetricKey, float] = {}
+        self._gauges: Dict[MetricKey, float] = {}
+        self._summaries: Dict[MetricKey, Summary] = {}
+        self._histograms: Dict[MetricKey, Histogram] = {}
+        # Called before every snapshot, to set gauges read from elsewhere (e.g. queue depths)
+        self._collectors: List[Callable[[], None]] = []
+        self._lock = threading.Lock()
+
+    def inc(self, name: str, value: float = 1, **labels) -> None:
+        """
+        Increment a counter.
+
+        Args:
+            name (str): Metric name
+            value (float): Amount to add
+            **labels: Label values identifying the series
+        """
+        key = _key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def set(self, name: str, value: float, **labels) -> None:
+        """
+        Set a gauge.
+
+        Args:
+            name (str): Metric name
+            value (float): Current value
+            **labels: Label values identifying the series
+        """
+        key = _key(name, labels)
+        with self._lock:
+            self._gauges[key] = value
+
+    def add_collector(self, collector: Callable[[], None]) -> None:
+        """Register a function called before every snapshot, e.g. to set gauges."""
+        with self._lock:
+            self._collectors.append(collector)
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        """
+        Record one observation in a summary.
+
+        Args:
+            name (str): Metric name
+            value (float): Observed value
+            **labels: Label values identifying the series
+        """
+        key = _key(name, labels)
+        with self._lock:
+            summary = self._summaries.get(key)
+            if summary is None:
+                summary = self._summaries[key] = Summary()
+            summary.observe(value)
+
+    def observe_histogram(self, name: str, value: float, buckets: Sequence[float], **labels) -> None:
+        """
+        Record one observation in a histogram.
+
+        Args:
+            name (str): Metric name
+            value (float): Observed value
+            buckets (Sequence[float]): Upper bounds of the buckets, used when
+                the series is first observed
+            **labels: Label values identifying the series
+        """
+        key = _key(name, labels)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(buckets)
+            histogram.observe(value)
+
+    @contextmanager
+    def timer(self, name: str, **labels) -> Iterator[None]:
+        """Observe the wall time of a block, in seconds, even if it raises."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def get(self, name: str, **labels) -> float:
+        """Return the current value of a counter (0 if it was never incremented)."""
+        with self._lock:
+            return self._counters.get(_key(name, labels), 0)
+
+    def snapshot(self) -> Dict[str, Dict]:
+        """
+        Copy every metric, after running the collectors.
+
+        Returns:
+            Dict[str, Dict]: {'counters': {key: value}, 'gauges': {key: value},
+            'summaries': {key: {...}}, 'histograms': {key: {...}}}, keyed by
+            (name, labels) tuples; histogram buckets are cumulative counts keyed
+            by upper bound
+        """
+        with self._lock:
+            collectors = list(self._collectors)
+        for collector in collectors:
+            try:
+                collector()
+            except Exception as e:
+                logger.error(f"Error collecting metrics: {e}")
+        with self._lock:
+            return {
+                'counters': dict(self._counters),
+                'gauges': dict(self._gauges),
+                'summaries': {key: summary.as_dict() for key, summary in self._summaries.items()},
+                'histograms': {key: histogram.as_dict() for key, histogram in self._histograms.items()},
+            }
+
+    def reset(self) -> None:
+        """Drop every metric."""
+        with self._lock:
+            self._counters.clear()
+            self._gauges.clear()
+            self._summaries.clear()
+            self._histograms.clear()
+
+# Registry of this process
+metrics = Metrics()
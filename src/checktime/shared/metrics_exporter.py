@@ -0,0 +1,290 @@
+"""
+Prometheus exposition of the in-process metrics.
+
+Each process serves its registry (checktime.shared.metrics) as Prometheus
+text at /metrics:
+
+- the scheduler and the bot start a small HTTP server on a local port
+  (SCHEDULER_METRICS_PORT, BOT_METRICS_PORT);
+- the web app adds a /metrics route. Under gunicorn every worker has its own
+  registry, so each worker writes its snapshot to a file in METRICS_DIR and
+  the worker answering the scrape merges all of them. Files are named after
+  the worker's PID and start time, so a new worker reusing a PID doesn't
+  overwrite an old one's file. Counters, summaries and histograms of workers
+  that have exited are kept, so totals don't go back when gunicorn recycles
+  a worker; their gauges are dropped.
+
+When METRICS_TOKEN is set, scrapes must send it as a bearer token.
+"""
+
+import glob
+import hmac
+import json
+import logging
+import math
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from checktime.shared.config import get_metrics_host, get_metrics_token
+from checktime.shared.metrics import MetricKey, metrics
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+# Shortest time between two writes of a web worker's snapshot file
+WRITE_INTERVAL_SECONDS = 5
+
+# (pid, start time in ms) of this process, set on its first write
+_process_start: Optional[Tuple[int, int]] = None
+
+def _process_file_id() -> str:
+    """Name of this process's snapshot file, without the extension: '<pid>-<start ms>'."""
+    global _process_start
+    pid = os.getpid()
+    # A forked child inherits the parent's value, so compare the PID too
+    if _process_start is None or _process_start[0] != pid:
+        _process_start = (pid, int(time.time() * 1000))
+    return f'{_process_start[0]}-{_process_start[1]}'
+
+def _parse_file_id(path: str) -> Optional[Tuple[int, int]]:
+    try:
+        pid, started = os.path.basename(path)[:-len('.json')].split('-')
+        return int(pid), int(started)
+    except ValueError:
+        return None
+
+def _labels(labels: Iterable[Tuple[str, str]], extra: Optional[Tuple[str, str]] = None) -> str:
+    items = list(labels) + ([extra] if extra else [])
+    if not items:
+        return ''
+    escaped = (
+        f'{label}="' + value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') + '"'
+        for label, value in items
+    )
+    return '{' + ','.join(escaped) + '}'
+
+def _number(value: float) -> str:
+    if math.isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+def render(snapshot: Dict[str, Dict]) -> str:
+    """
+    Format a metrics snapshot in the Prometheus text format.
+
+    Args:
+        snapshot (Dict[str, Dict]): As returned by Metrics.snapshot()
+
+    Returns:
+        str: The exposition, one line per sample
+    """
+    lines: List[str] = []
+
+    def family(name: str, kind: str, series: Dict[MetricKey, object], emit) -> None:
+        lines.append(f'# TYPE {name} {kind}')
+        for (_, labels), value in sorted(series.items()):
+            emit(labels, value)
+
+    def by_name(series: Dict[MetricKey, object]) -> Dict[str, Dict[MetricKey, object]]:
+        grouped: Dict[str, Dict[MetricKey, object]] = {}
+        for key, value in series.items():
+            grouped.setdefault(key[0], {})[key] = value
+        return grouped
+
+    for name, series in sorted(by_name(snapshot.get('counters', {})).items()):
+        family(name, 'counter', series,
+               lambda labels, value: lines.append(f'{name}{_labels(labels)} {_number(value)}'))
+    for name, series in sorted(by_name(snapshot.get('gauges', {})).items()):
+        family(name, 'gauge', series,
+               lambda labels, value: lines.append(f'{name}{_labels(labels)} {_number(value)}'))
+    for name, series in sorted(by_name(snapshot.get('summaries', {})).items()):
+        def summary(labels, value):
+            lines.append(f'{name}_count{_labels(labels)} {value["count"]}')
+            lines.append(f'{name}_sum{_labels(labels)} {_number(value["sum"])}')
+        family(name, 'summary', series, summary)
+        family(f'{name}_max', 'gauge', series,
+               lambda labels, value: lines.append(f'{name}_max{_labels(labels)} {_number(value["max"])}'))
+    for name, series in sorted(by_name(snapshot.get('histograms', {})).items()):
+        def histogram(labels, value):
+            for bound, count in value['buckets'].items():
+                lines.append(f'{name}_bucket{_labels(labels, ("le", _number(float(bound))))} {count}')
+            lines.append(f'{name}_count{_labels(labels)} {value["count"]}')
+            lines.append(f'{name}_sum{_labels(labels)} {_number(value["sum"])}')
+        family(name, 'histogram', series, histogram)
+    return '\n'.join(lines) + '\n'
+
+def is_authorized(authorization: Optional[str], remote_addr: Optional[str]) -> bool:
+    """
+    Decide whether a scrape may read the metrics.
+
+    Args:
+        authorization (Optional[str]): The request's Authorization header
+        remote_addr (Optional[str]): The client address
+
+    Returns:
+        bool: With METRICS_TOKEN set, whether the request sends it as a bearer
+        token; otherwise whether the request comes from this host
+    """
+    token = get_metrics_token()
+    if token:
+        expected = f'Bearer {token}'
+        return hmac.compare_digest((authorization or '').encode(), expected.encode())
+    return remote_addr in ('127.0.0.1', '::1', 'localhost')
+
+class MultiProcessStore:
+    """Snapshot files of the processes sharing one /metrics endpoint (gunicorn workers)."""
+
+    def __init__(self, directory: str):
+        """
+        Initialize the store.
+
+        Args:
+            directory (str): Directory the processes write their snapshots to
+        """
+        self.directory = directory
+        self._last_write = 0.0
+        self._lock = threading.Lock()
+
+    def clear(self) -> None:
+        """Remove every snapshot file, e.g. when the gunicorn master starts."""
+        os.makedirs(self.directory, exist_ok=True)
+        for path in glob.glob(os.path.join(self.directory, '*.json')):
+            os.remove(path)
+
+    def write(self, force: bool = False) -> None:
+        """
+        Write this process's snapshot, at most every WRITE_INTERVAL_SECONDS unless forced.
+
+        Args:
+            force (bool): Write even if the last write was recent
+        """
+        now = time.monotonic()
+        with self._lock:
+            if not force and now - self._last_write < WRITE_INTERVAL_SECONDS:
+                return
+            self._last_write = now
+        snapshot = metrics.snapshot()
+        data = {
+            kind: [[name, list(labels), value] for (name, labels), value in series.items()]
+            for kind, series in snapshot.items()
+        }
+        for _, _, value in data['histograms']:
+            value['buckets'] = list(value['buckets'].items())
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, f'{_process_file_id()}.json')
+        temp = f'{path}.tmp'
+        with open(temp, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        os.replace(temp, path)
+
+    def collect(self) -> Dict[str, Dict]:
+        """
+        Merge the snapshots of every process, this one's written first.
+
+        Returns:
+            Dict[str, Dict]: A snapshot in the format of Metrics.snapshot()
+        """
+        self.write(force=True)
+        merged: Dict[str, Dict] = {'counters': {}, 'gauges': {}, 'summaries': {}, 'histograms': {}}
+        files = {}
+        for path in glob.glob(os.path.join(self.directory, '*.json')):
+            file_id = _parse_file_id(path)
+            if file_id is None:
+                logger.warning(f"Skipping metrics file with an unexpected name: {path}")
+                continue
+            files[path] = file_id
+        # Of several files with one PID only the newest can belong to a live process
+        latest: Dict[int, int] = {}
+        for pid, started in files.values():
+            latest[pid] = max(started, latest.get(pid, started))
+        for path, (pid, started) in files.items():
+            try:
+                with open(path, encoding='utf-8') as f:
+                    data = json.load(f)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Skipping unreadable metrics file {path}: {e}")
+                continue
+            alive = started == latest[pid] and _is_alive(pid)
+            for kind, series in data.items():
+                if kind == 'gauges' and not alive:
+                    continue
+                for name, labels, value in series:
+                    _merge(merged[kind], kind, (name, tuple(tuple(label) for label in labels)), value)
+        return merged
+
+def _is_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+def _merge(series: Dict[MetricKey, object], kind: str, key: MetricKey, value) -> None:
+    current = series.get(key)
+    if kind == 'histograms':
+        value = dict(value, buckets={float(bound): count for bound, count in value['buckets']})
+    if current is None:
+        series[key] = value
+    elif kind in ('counters', 'gauges'):
+        series[key] = current + value
+    elif kind == 'summaries':
+        count = current['count'] + value['count']
+        total = current['sum'] + value['sum']
+        series[key] = {'count': count, 'sum': total, 'max': max(current['max'], value['max']),
+                       'avg': total / count if count else 0.0}
+    elif list(current['buckets']) == list(value['buckets']):
+        series[key] = {
+            'buckets': {bound: count + value['buckets'][bound] for bound, count in current['buckets'].items()},
+            'count': current['count'] + value['count'],
+            'sum': current['sum'] + value['sum'],
+        }
+    else:
+        logger.warning(f"Skipping histogram {key[0]} with different buckets in another process")
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?')[0] != '/metrics':
+            self.send_error(404)
+            return
+        if not is_authorized(self.headers.get('Authorization'), self.client_address[0]):
+            self.send_error(403)
+            return
+        body = render(metrics.snapshot()).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', CONTENT_TYPE)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Scrapes every few seconds would flood the process log
+        pass
+
+def start_metrics_server(port: int, host: Optional[str] = None) -> Optional[ThreadingHTTPServer]:
+    """
+    Serve this process's metrics at http://host:port/metrics from a background thread.
+
+    Args:
+        port (int): Port to listen on; 0 disables the server
+        host (Optional[str]): Address to bind, defaults to METRICS_HOST
+
+    Returns:
+        Optional[ThreadingHTTPServer]: The server, or None if disabled or the port is taken
+    """
+    if not port:
+        return None
+    host = host or get_metrics_host()
+    try:
+        server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    except OSError as e:
+        logger.error(f"Could not start the metrics server on {host}:{port}: {e}")
+        return None
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name='metrics-server', daemon=True).start()
+    logger.info(f"Serving metrics at http://{host}:{port}/metrics")
+    return server
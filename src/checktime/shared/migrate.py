@@ -0,0 +1,230 @@
+#!/usr/bin/env python
+"""
+Schema migration step for CheckTime.
+
+Run once per deploy, before the web, bot and scheduler processes start:
+
+    python -m checktime.shared.migrate
+
+It creates missing tables, applies pending upgrade steps and stamps the
+database with SCHEMA_VERSION. The services never run DDL themselves; on
+start they only compare the stamped version with the one the code expects
+(see checktime.shared.db.check_schema_version).
+"""
+
+import logging
+import sys
+from datetime import date
+from typing import Callable, Dict, Optional
+
+from flask import Flask
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection
+
+from checktime.shared.config import get_database_url
+from checktime.shared.db import db, SCHEMA_VERSION, get_schema_version
+from checktime.shared import models  # noqa: F401 - registers every table in db.metadata
+from checktime.shared.models.schema_version import SchemaVersion
+from checktime.shared.repository.check_event_repository import (
+    CHECK_EVENT_MONTHS_AHEAD, partition_ddl, upcoming_months,
+)
+from checktime.shared.repository.schedule_repository import OVERLAP_CONSTRAINT
+
+logger = logging.getLogger(__name__)
+
+# Name SQLAlchemy gives the index of User.telegram_chat_id (unique=True, index=True)
+CHAT_ID_INDEX = "ix_user_telegram_chat_id"
+
+class MigrationError(RuntimeError):
+    """A migration step could not be applied."""
+
+# Upgrade steps keyed by the schema version they bring the database to.
+# Version 1 is the baseline produced by create_all(), so it has no step.
+# Steps must be idempotent: a database created before schema versioning
+# existed starts at version 0 and runs every step.
+MIGRATIONS: Dict[int, Callable[[Connection], None]] = {}
+
+def migration(version: int):
+    """Register a function as the upgrade step to `version`."""
+    def register(step: Callable[[Connection], None]):
+        MIGRATIONS[version] = step
+        return step
+    return register
+
+def add_column_if_missing(conn: Connection, table: str, column: str, ddl: str) -> None:
+    """
+    Add a column to an existing table unless it is already there.
+
+    Args:
+        conn (Connection): Connection inside the migration transaction
+        table (str): Table name
+        column (str): Column name
+        ddl (str): Column definition, e.g. "INTEGER NOT NULL DEFAULT 0"
+    """
+    existing = {c['name'] for c in inspect(conn).get_columns(table)}
+    if column in existing:
+        return
+    conn.execute(text(f'ALTER TABLE "{table}" ADD COLUMN {column} {ddl}'))
+    logger.info(f"Added column {table}.{column}")
+
+@migration(2)
+def add_user_data_version(conn: Connection) -> None:
+    """Per-user version used to invalidate cached calendars."""
+    add_column_if_missing(conn, "user", "data_version", "INTEGER NOT NULL DEFAULT 0")
+
+@migration(3)
+def add_period_overlap_constraint(conn: Connection) -> None:
+    """
+    Forbid overlapping active schedule periods of the same user (PostgreSQL only).
+    
+    Replaces the check-then-insert race in the schedule routes with an
+    exclusion constraint. Needs the btree_gist extension, which the migration
+    user must be allowed to create.
+    """
+    if conn.dialect.name != "postgresql":
+        logger.info("Skipping schedule period exclusion constraint: not PostgreSQL")
+        return
+    exists = conn.execute(
+        text("SELECT 1 FROM pg_constraint WHERE conname = :name"),
+        {"name": OVERLAP_CONSTRAINT},
+    ).scalar()
+    if exists:
+        return
+    overlaps = conn.execute(text(
+        "SELECT a.user_id, a.id, b.id FROM schedule_period a "
+        "JOIN schedule_period b ON a.user_id = b.user_id AND a.id < b.id "
+        "WHERE a.is_active AND b.is_active "
+        "AND a.start_date <= b.end_date AND b.start_date <= a.end_date"
+    )).fetchall()
+    if overlaps:
+        pairs = ", ".join(f"user {u}: {a}/{b}" for u, a, b in overlaps)
+        raise MigrationError(f"Overlapping active schedule periods must be fixed first ({pairs})")
+    conn.execute(text("CREATE EXTENSION IF NOT EXISTS btree_gist"))
+    conn.execute(text(
+        f"ALTER TABLE schedule_period ADD CONSTRAINT {OVERLAP_CONSTRAINT} "
+        f"EXCLUDE USING gist (user_id WITH =, daterange(start_date, end_date, '[]') WITH &&) "
+        f"WHERE (is_active)"
+    ))
+    logger.info(f"Added constraint {OVERLAP_CONSTRAINT}")
+
+# Version 4 adds the broadcast_job and broadcast_delivery tables, which
+# create_all() creates, so it has no step.
+
+@migration(5)
+def add_unique_telegram_chat_id(conn: Connection) -> None:
+    """
+    Make user.telegram_chat_id unique and indexed, for the bot's chat lookup.
+    
+    Blank chat IDs become NULL and the rest are trimmed first; two users
+    sharing a chat ID must be fixed by hand, since the bot could only ever
+    answer as one of them.
+    """
+    existing = {index['name'] for index in inspect(conn).get_indexes("user")}
+    if CHAT_ID_INDEX in existing:
+        return
+    conn.execute(text(
+        'UPDATE "user" SET telegram_chat_id = NULLIF(TRIM(telegram_chat_id), \'\') '
+        'WHERE telegram_chat_id IS NOT NULL'
+    ))
+    duplicates = conn.execute(text(
+        'SELECT telegram_chat_id, COUNT(*) FROM "user" WHERE telegram_chat_id IS NOT NULL '
+        'GROUP BY telegram_chat_id HAVING COUNT(*) > 1'
+    )).fetchall()
+    if duplicates:
+        chats = ", ".join(f"{chat_id} ({count} users)" for chat_id, count in duplicates)
+        raise MigrationError(f"Telegram chat IDs shared by several users must be fixed first: {chats}")
+    conn.execute(text(f'CREATE UNIQUE INDEX {CHAT_ID_INDEX} ON "user" (telegram_chat_id)'))
+    logger.info(f"Added index {CHAT_ID_INDEX}")
+
+# Version 6 adds the bot_state table, which create_all() creates, so it has
+# no step.
+
+# Version 7 adds the checkjc_breaker table, which create_all() creates, so it
+# has no step.
+
+@migration(8)
+def add_check_event_partitions(conn: Connection) -> None:
+    """
+    Create the first monthly partitions of check_event (PostgreSQL only).
+    
+    create_all() creates check_event partitioned by month, and a partitioned
+    table rejects rows until a partition covers them. From then on the
+    scheduler's daily retention job keeps the coming months covered.
+    """
+    if conn.dialect.name != "postgresql":
+        return
+    for month in upcoming_months(date.today(), CHECK_EVENT_MONTHS_AHEAD):
+        conn.execute(text(partition_ddl(month)))
+    logger.info("Created check_event partitions")
+
+# Version 9 adds the telegram_update table, which create_all() creates, so it
+# has no step.
+
+def create_migration_app() -> Flask:
+    """Create a minimal Flask app bound to the database, without any views."""
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = get_database_url()
+    app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    db.init_app(app)
+    return app
+
+def upgrade_schema(app: Optional[Flask] = None) -> int:
+    """
+    Bring the database schema up to SCHEMA_VERSION.
+
+    Args:
+        app (Optional[Flask]): App already bound to `db`. A minimal one is
+            created from the environment if not provided.
+
+    Returns:
+        int: The schema version the database is at after the upgrade
+
+    Raises:
+        MigrationError: If the database is newer than the code or a step fails
+    """
+    app = app or create_migration_app()
+
+    with app.app_context():
+        current = get_schema_version()
+        if current is not None and current > SCHEMA_VERSION:
+            raise MigrationError(
+                f"Database is at schema version {current}, newer than this code "
+                f"({SCHEMA_VERSION}). Refusing to downgrade."
+            )
+        if current == SCHEMA_VERSION:
+            logger.info(f"Database schema already at version {SCHEMA_VERSION}")
+            return SCHEMA_VERSION
+
+        # New tables are created from the models; existing ones are left alone.
+        db.create_all()
+        logger.info("Database tables created")
+
+        for version in range((current or 0) + 1, SCHEMA_VERSION + 1):
+            step = MIGRATIONS.get(version)
+            try:
+                if step:
+                    logger.info(f"Applying schema migration to version {version}")
+                    step(db.session.connection())
+                db.session.add(SchemaVersion(version=version))
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                raise MigrationError(f"Migration to schema version {version} failed: {e}") from e
+
+        logger.info(f"Database schema upgraded from {current} to version {SCHEMA_VERSION}")
+        return SCHEMA_VERSION
+
+def main():
+    """Run the schema upgrade; exit non-zero so the deploy stops on failure."""
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    )
+    try:
+        upgrade_schema()
+    except Exception as e:
+        logger.error(f"Schema migration failed: {e}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
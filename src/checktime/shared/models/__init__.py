@@ -4,4 +4,12 @@ Exports all models for the CheckTime application.
 
 from checktime.shared.models.user import User
 from checktime.shared.models.holiday import Holiday
-from checktime.shared.models.schedule import SchedulePeriod, DaySchedule, DayOverride 
\ No newline at end of file
+from checktime.shared.models.schedule import SchedulePeriod, DaySchedule, DayOverride
+from checktime.shared.models.schema_version import SchemaVersion
+from checktime.shared.models.broadcast import BroadcastJob, BroadcastDelivery
+from checktime.shared.models.bot_state import BotState, TelegramUpdate
+from checktime.shared.models.circuit_breaker import CheckJCBreaker
+from checktime.shared.models.check_event import CheckEvent
+
+# Registers the session hook that keeps User.data_version up to date
+from checktime.shared import data_version  # noqa: E402,F401
@@ -0,0 +1,36 @@
+"""
+Bot state model for CheckTime.
+"""
+
+from datetime import datetime
+
+from checktime.shared.db import db
+
+class BotState(db.Model):
+    """Small key/value store for state the bot must keep across restarts."""
+    __tablename__ = 'bot_state'
+    
+    key = db.Column(db.String(64), primary_key=True)
+    value = db.Column(db.String(255), nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.now, onupdate=datetime.now, nullable=False)
+    
+    def __repr__(self):
+        return f"<BotState {self.key}={self.value}>"
+
+class TelegramUpdate(db.Model):
+    """
+    An update Telegram posted to the webhook, kept until the bot handles it.
+    
+    The primary key makes a resent update fail to insert, so each update is
+    queued once however many times, and on whichever web worker, it arrives.
+    """
+    __tablename__ = 'telegram_update'
+    
+    update_id = db.Column(db.BigInteger, primary_key=True, autoincrement=False)
+    payload = db.Column(db.Text, nullable=False)
+    received_at = db.Column(db.DateTime, default=datetime.now, nullable=False)
+    # Set when the bot queues the update; handled rows are kept a day to catch resends
+    handled_at = db.Column(db.DateTime, nullable=True, index=True)
+    
+    def __repr__(self):
+        return f"<TelegramUpdate {self.update_id}>"
@@ -0,0 +1,68 @@
+"""
+Admin broadcast models for CheckTime.
+"""
+
+from checktime.shared.db import db, TimestampMixin
+
+class BroadcastJob(db.Model, TimestampMixin):
+    """
+    A Telegram message sent by an admin to every user with a chat configured.
+    Delivery runs in the background; the counters track its progress.
+    """
+    __tablename__ = 'broadcast_job'
+    
+    STATUS_QUEUED = 'queued'
+    STATUS_RUNNING = 'running'
+    STATUS_COMPLETED = 'completed'
+    STATUS_FAILED = 'failed'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    message = db.Column(db.Text, nullable=False)
+    created_by = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    status = db.Column(db.String(20), nullable=False, default=STATUS_QUEUED)
+    total = db.Column(db.Integer, nullable=False, default=0)
+    sent = db.Column(db.Integer, nullable=False, default=0)
+    failed = db.Column(db.Integer, nullable=False, default=0)
+    error = db.Column(db.String(255))
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+    deliveries = db.relationship('BroadcastDelivery', backref='job', lazy=True,
+                                 cascade="all, delete-orphan", order_by='BroadcastDelivery.id')
+    
+    @property
+    def done(self):
+        return self.sent + self.failed
+    
+    @property
+    def progress(self):
+        """Percentage of recipients already handled."""
+        return int(100 * self.done / self.total) if self.total else 100
+    
+    @property
+    def is_finished(self):
+        return self.status in (self.STATUS_COMPLETED, self.STATUS_FAILED)
+    
+    def __repr__(self):
+        return f"<BroadcastJob {self.id} {self.status}: {self.done}/{self.total}>"
+
+class BroadcastDelivery(db.Model):
+    """The result of a broadcast for one recipient."""
+    __tablename__ = 'broadcast_delivery'
+    
+    STATUS_PENDING = 'pending'
+    # Claimed by a sender; left behind if its process died mid-send
+    STATUS_SENDING = 'sending'
+    STATUS_SENT = 'sent'
+    STATUS_FAILED = 'failed'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    job_id = db.Column(db.Integer, db.ForeignKey('broadcast_job.id'), nullable=False, index=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    username = db.Column(db.String(80), nullable=False)
+    chat_id = db.Column(db.String(50), nullable=False)
+    status = db.Column(db.String(20), nullable=False, default=STATUS_PENDING)
+    error = db.Column(db.String(255))
+    sent_at = db.Column(db.DateTime)
+    
+    def __repr__(self):
+        return f"<BroadcastDelivery {self.username}: {self.status}>"
@@ -0,0 +1,65 @@
+"""
+Check history model for CheckTime.
+"""
+
+from checktime.shared.db import db, TimestampMixin
+
+class CheckEvent(db.Model, TimestampMixin):
+    """
+    What the scheduler did for one user's check on one day.
+    
+    The key (user, date, check type) doubles as an idempotency key: the
+    scheduler claims the row before it starts a check, so a restarted
+    scheduler or a second one never clocks the same slot twice. The row is
+    updated after every attempt.
+    
+    On PostgreSQL the table is partitioned by month on `date`; the scheduler
+    creates the coming months' partitions and drops expired ones (see
+    CheckEventManager.apply_retention).
+    """
+    __tablename__ = 'check_event'
+    __table_args__ = (
+        db.Index('ix_check_event_date_result', 'date', 'result'),
+        {'postgresql_partition_by': 'RANGE (date)'},
+    )
+    
+    RESULT_RUNNING = 'running'
+    RESULT_SUCCEEDED = 'succeeded'
+    RESULT_FAILED = 'failed'
+    # The check button was clicked but the outcome couldn't be confirmed; never retried
+    RESULT_UNCONFIRMED = 'unconfirmed'
+    
+    # Keys of phase_timings, in the order a check goes through them: getting
+    # an egress route, then the browser phases timed by CheckJCClient
+    PHASES = (
+        'egress', 'browser_wait',
+        'playwright_start', 'browser_launch', 'context_create',
+        'login_goto', 'hydration_wait', 'dom_search', 'credential_input', 'url_transition',
+        'portal_load', 'button_visible', 'slot_wait', 'click', 'post_click_wait',
+    )
+    
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), primary_key=True)
+    date = db.Column(db.Date, primary_key=True)
+    check_type = db.Column(db.String(3), primary_key=True)
+    # Scheduled time, or NULL for a check started by hand
+    slot = db.Column(db.DateTime)
+    result = db.Column(db.String(20), nullable=False, default=RESULT_RUNNING)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    # Seconds per phase (see PHASES) of the last attempt, e.g. {"egress": 0.0, "login_goto": 3.1, ...}
+    phase_timings = db.Column(db.JSON)
+    error_class = db.Column(db.String(100))
+    error_message = db.Column(db.String(500))
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+    # When the check button was clicked
+    checked_at = db.Column(db.DateTime)
+    
+    @property
+    def offset_seconds(self):
+        """Seconds between the scheduled time and the click, if both are known."""
+        if self.slot and self.checked_at:
+            return (self.checked_at - self.slot).total_seconds()
+        return None
+    
+    def __repr__(self):
+        return f"<CheckEvent user={self.user_id} {self.date} {self.check_type}: {self.result}>"
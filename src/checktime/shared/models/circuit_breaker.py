@@ -0,0 +1,30 @@
+"""
+CheckJC circuit breaker model for CheckTime.
+"""
+
+from checktime.shared.db import db, TimestampMixin
+
+class CheckJCBreaker(db.Model, TimestampMixin):
+    """
+    State of the scheduler's circuit breaker for one CheckJC subdomain and
+    egress route. The scheduler writes it on every transition, so a restart
+    keeps honouring a block and the admin UI can show it.
+    """
+    __tablename__ = 'checkjc_breaker'
+    
+    STATE_CLOSED = 'closed'
+    STATE_OPEN = 'open'
+    STATE_HALF_OPEN = 'half_open'
+    
+    subdomain = db.Column(db.String(100), primary_key=True)
+    egress = db.Column(db.String(255), primary_key=True)
+    state = db.Column(db.String(20), nullable=False, default=STATE_CLOSED)
+    open_until = db.Column(db.DateTime)
+    # Times it opened again without a successful login in between, for the backoff
+    opens = db.Column(db.Integer, nullable=False, default=0)
+    # Consecutive rejected logins while closed
+    rejections = db.Column(db.Integer, nullable=False, default=0)
+    last_error = db.Column(db.String(255))
+    
+    def __repr__(self):
+        return f"<CheckJCBreaker {self.subdomain} via {self.egress}: {self.state}>"
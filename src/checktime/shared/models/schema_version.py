@@ -0,0 +1,17 @@
+"""
+Schema version model for CheckTime.
+"""
+
+from datetime import datetime
+
+from checktime.shared.db import db
+
+class SchemaVersion(db.Model):
+    """One row per applied schema version, written by checktime.shared.migrate."""
+    __tablename__ = 'schema_version'
+    
+    version = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    applied_at = db.Column(db.DateTime, default=datetime.now, nullable=False)
+    
+    def __repr__(self):
+        return f"<SchemaVersion {self.version} applied at {self.applied_at}>"
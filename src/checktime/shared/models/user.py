@@ -22,9 +22,14 @@ class User(UserMixin, db.Model, TimestampMixin):
     auto_checkin_enabled = db.Column(db.Boolean, default=True)
     
     # Telegram settings
-    telegram_chat_id = db.Column(db.String(50), nullable=True)
+    # Unique so the bot can authenticate a chat with one indexed lookup
+    telegram_chat_id = db.Column(db.String(50), nullable=True, unique=True, index=True)
     telegram_notifications_enabled = db.Column(db.Boolean, default=True)
     
+    # Bumped on every write to the user's holidays, overrides and schedules
+    # (see checktime.shared.data_version)
+    data_version = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    
     # Relationships
     holidays = db.relationship('Holiday', backref='user', lazy=True, cascade="all, delete-orphan")
     schedule_periods = db.relationship('SchedulePeriod', backref='user', lazy=True, cascade="all, delete-orphan")
@@ -0,0 +1,218 @@
+"""
+On-demand profiling of scheduler ticks and web requests.
+
+Profiling is off unless PROFILING_ENABLED is set or an admin turns it on
+from /admin/profiles, which drops a flag file in PROFILE_DIR that every
+process (web workers, scheduler) picks up within a few seconds. While off,
+a tick or request only reads the clock, plus a stat of the flag file every
+few seconds.
+
+While on, selected runs are profiled with cProfile and the slowest
+PROFILE_KEEP of each kind are kept in PROFILE_DIR as pstats files, e.g.
+`request-20261019-101502.123456-4242-dashboard.index-1830ms.prof`. Open them with
+`python -m pstats <file>` or snakeviz.
+"""
+
+import cProfile
+import logging
+import os
+import random
+import re
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from checktime.shared.config import (
+    get_profile_dir, get_profile_keep, get_profile_min_seconds, get_profile_sample_rate,
+    get_profiling_enabled,
+)
+
+logger = logging.getLogger(__name__)
+
+# File whose presence turns profiling on for every process
+FLAG_FILE = 'enabled'
+# Seconds a process trusts its last look at the flag file
+FLAG_CHECK_SECONDS = 5
+PROFILE_NAME = re.compile(
+    r'^(?P<kind>[a-z]+)-(?P<stamp>\d{8}-\d{6}\.\d{6})-(?P<pid>\d+)-(?P<name>[\w.-]+)-(?P<ms>\d+)ms\.prof$'
+)
+
+class Profiler:
+    """Profiles selected runs and keeps the slowest ones on disk."""
+
+    def __init__(self, directory: Optional[str] = None, keep: Optional[int] = None,
+                 min_seconds: Optional[float] = None, sample_rate: Optional[float] = None):
+        """
+        Initialize the profiler.
+
+        Args:
+            directory (Optional[str]): Where profiles are kept, defaults to PROFILE_DIR
+            keep (Optional[int]): Slowest profiles kept per kind, defaults to PROFILE_KEEP
+            min_seconds (Optional[float]): Runs faster than this are not kept,
+                defaults to PROFILE_MIN_SECONDS
+            sample_rate (Optional[float]): Share (0 to 1) of the selected web
+                requests profiled, defaults to PROFILE_SAMPLE_RATE
+        """
+        self.directory = directory or get_profile_dir()
+        self.keep = keep if keep is not None else get_profile_keep()
+        self.min_seconds = min_seconds if min_seconds is not None else get_profile_min_seconds()
+        self.sample_rate = sample_rate if sample_rate is not None else get_profile_sample_rate()
+        self._enabled = False
+        self._checked_at = float('-inf')
+        # cProfile hooks the interpreter: one run at a time, the others go unprofiled
+        self._busy = threading.Lock()
+
+    def is_enabled(self) -> bool:
+        """Whether profiling is on, through the environment or the admin flag file."""
+        now = time.monotonic()
+        if now - self._checked_at >= FLAG_CHECK_SECONDS:
+            self._checked_at = now
+            self._enabled = get_profiling_enabled() or os.path.exists(os.path.join(self.directory, FLAG_FILE))
+        return self._enabled
+
+    def set_enabled(self, enabled: bool) -> None:
+        """
+        Turn profiling on or off for every process, through the flag file.
+
+        Args:
+            enabled (bool): True to turn it on
+        """
+        flag = os.path.join(self.directory, FLAG_FILE)
+        if enabled:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(flag, 'w', encoding='utf-8') as f:
+                f.write(datetime.now().isoformat())
+        elif os.path.exists(flag):
+            os.remove(flag)
+        self._checked_at = float('-inf')
+
+    def sampled(self) -> bool:
+        """Whether a selected web request should be profiled (profiling on and picked by the sample rate)."""
+        return self.is_enabled() and random.random() < self.sample_rate
+
+    def start(self, kind: str, name: str) -> Optional[Tuple[str, str, cProfile.Profile, float]]:
+        """
+        Start profiling a run, unless another run of this process is being profiled.
+
+        Args:
+            kind (str): Kind of run, e.g. 'tick' or 'request'
+            name (str): What ran, e.g. the endpoint
+
+        Returns:
+            The handle to pass to finish(), or None if the run isn't profiled
+        """
+        if not self._busy.acquire(blocking=False):
+            return None
+        profile = cProfile.Profile()
+        profile.enable()
+        return kind, name, profile, time.perf_counter()
+
+    def finish(self, run: Optional[Tuple[str, str, cProfile.Profile, float]]) -> Optional[str]:
+        """
+        Stop profiling a run and keep it if it is among the slowest.
+
+        Args:
+            run: The handle returned by start(), or None
+
+        Returns:
+            Optional[str]: Path of the saved profile, or None if it wasn't kept
+        """
+        if run is None:
+            return None
+        kind, name, profile, started = run
+        try:
+            profile.disable()
+            elapsed = time.perf_counter() - started
+        finally:
+            self._busy.release()
+        try:
+            return self._save(kind, name, profile, elapsed)
+        except OSError as e:
+            logger.error(f"Error saving {kind} profile of {name}: {e}")
+            return None
+
+    @contextmanager
+    def profile(self, kind: str, name: str) -> Iterator[None]:
+        """Profile a block when profiling is on; otherwise just run it."""
+        run = self.start(kind, name) if self.is_enabled() else None
+        try:
+            yield
+        finally:
+            self.finish(run)
+
+    def _save(self, kind: str, name: str, profile: cProfile.Profile, elapsed: float) -> Optional[str]:
+        if elapsed < self.min_seconds or self.keep <= 0:
+            return None
+        kept = [p for p in self.list_profiles() if p['kind'] == kind]
+        if len(kept) >= self.keep and elapsed <= kept[self.keep - 1]['seconds']:
+            return None
+        os.makedirs(self.directory, exist_ok=True)
+        slug = re.sub(r'[^\w.-]', '_', name)[:80] or 'run'
+        filename = f"{kind}-{datetime.now():%Y%m%d-%H%M%S.%f}-{os.getpid()}-{slug}-{int(elapsed * 1000)}ms.prof"
+        path = os.path.join(self.directory, filename)
+        profile.dump_stats(path)
+        logger.info(f"Saved {kind} profile of {name} ({elapsed:.2f}s) to {path}")
+        # The ring only keeps the slowest runs of each kind
+        for old in kept[self.keep - 1:]:
+            try:
+                os.remove(os.path.join(self.directory, old['filename']))
+            except FileNotFoundError:
+                pass
+        return path
+
+    def list_profiles(self) -> List[Dict[str, Any]]:
+        """
+        List the kept profiles.
+
+        Returns:
+            List[Dict[str, Any]]: filename, kind, name, seconds, created_at and
+            size of each profile, slowest first
+        """
+        try:
+            filenames = os.listdir(self.directory)
+        except FileNotFoundError:
+            return []
+        profiles = []
+        for filename in filenames:
+            match = PROFILE_NAME.match(filename)
+            if not match:
+                continue
+            try:
+                size = os.path.getsize(os.path.join(self.directory, filename))
+            except OSError:
+                continue
+            profiles.append({
+                'filename': filename,
+                'kind': match.group('kind'),
+                'name': match.group('name'),
+                'seconds': int(match.group('ms')) / 1000,
+                'created_at': datetime.strptime(match.group('stamp'), '%Y%m%d-%H%M%S.%f'),
+                'size': size,
+            })
+        return sorted(profiles, key=lambda p: p['seconds'], reverse=True)
+
+    def path_of(self, filename: str) -> Optional[str]:
+        """Path of a kept profile, or None if `filename` isn't one."""
+        if not PROFILE_NAME.match(filename):
+            return None
+        path = os.path.join(self.directory, filename)
+        return path if os.path.isfile(path) else None
+
+_profiler: Optional[Profiler] = None
+_profiler_lock = threading.Lock()
+
+def get_profiler() -> Profiler:
+    """
+    Get the profiler shared by this process.
+
+    Returns:
+        Profiler: The profiler, created on first use
+    """
+    global _profiler
+    if _profiler is None:
+        with _profiler_lock:
+            if _profiler is None:
+                _profiler = Profiler()
+    return _profiler
@@ -7,6 +7,10 @@ from checktime.shared.repository.holiday_repository import HolidayRepository
 from checktime.shared.repository.user_repository import UserRepository
 from checktime.shared.repository.schedule_repository import SchedulePeriodRepository, DayScheduleRepository
 from checktime.shared.repository.day_override_repository import DayOverrideRepository
+from checktime.shared.repository.broadcast_repository import BroadcastRepository
+from checktime.shared.repository.bot_state_repository import BotStateRepository
+from checktime.shared.repository.circuit_breaker_repository import CircuitBreakerRepository
+from checktime.shared.repository.check_event_repository import CheckEventRepository
 
 # Create singleton instances for easy access
 holiday_repository = HolidayRepository()
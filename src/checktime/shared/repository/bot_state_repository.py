@@ -0,0 +1,76 @@
+"""
+Repository for bot state operations.
+"""
+
+from datetime import datetime
+from typing import List, Optional
+
+from sqlalchemy.exc import IntegrityError
+
+from checktime.shared.db import db
+from checktime.shared.models.bot_state import BotState, TelegramUpdate
+from checktime.shared.repository.base_repository import BaseRepository
+from checktime.shared.repository.check_event_repository import is_unique_violation
+
+class BotStateRepository(BaseRepository[BotState]):
+    """Repository for the bot's persisted key/value state."""
+    
+    def __init__(self):
+        """Initialize the repository."""
+        super().__init__(BotState)
+    
+    def get_value(self, key: str) -> Optional[str]:
+        """Get the value stored under a key."""
+        state = db.session.get(BotState, key)
+        return state.value if state else None
+    
+    def set_value(self, key: str, value: str) -> None:
+        """Store a value under a key, replacing the previous one."""
+        db.session.merge(BotState(key=key, value=value))
+        db.session.commit()
+    
+    def add_update(self, update: TelegramUpdate) -> bool:
+        """
+        Insert a received update, unless one with the same ID was already stored.
+        
+        Returns:
+            bool: True if inserted, False if the update ID was already taken
+            
+        Raises:
+            IntegrityError: For any other violation
+        """
+        db.session.add(update)
+        try:
+            db.session.commit()
+            return True
+        except IntegrityError as e:
+            db.session.rollback()
+            if is_unique_violation(e):
+                return False
+            raise
+    
+    def get_unhandled_updates(self, limit: int) -> List[TelegramUpdate]:
+        """Get the oldest updates the bot has not handled yet, by update ID."""
+        return TelegramUpdate.query.filter(
+            TelegramUpdate.handled_at.is_(None)
+        ).order_by(TelegramUpdate.update_id).limit(limit).all()
+    
+    def mark_handled(self, update_ids: List[int], offset_key: str, offset: int) -> None:
+        """Mark updates as handled and raise the stored offset to `offset`, in one transaction."""
+        TelegramUpdate.query.filter(TelegramUpdate.update_id.in_(update_ids)).update(
+            {TelegramUpdate.handled_at: datetime.now()}, synchronize_session=False
+        )
+        state = db.session.get(BotState, offset_key)
+        if state is None:
+            db.session.add(BotState(key=offset_key, value=str(offset)))
+        elif int(state.value) < offset:
+            state.value = str(offset)
+        db.session.commit()
+    
+    def delete_handled_updates(self, handled_before: datetime) -> int:
+        """Delete the updates handled before a time, and return how many."""
+        deleted = TelegramUpdate.query.filter(
+            TelegramUpdate.handled_at < handled_before
+        ).delete(synchronize_session=False)
+        db.session.commit()
+        return deleted
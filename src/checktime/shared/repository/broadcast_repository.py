@@ -0,0 +1,130 @@
+"""
+Repository for admin broadcast operations.
+"""
+
+from datetime import datetime
+from typing import Iterable, List, Optional, Tuple
+
+from sqlalchemy import update
+
+from checktime.shared.db import db
+from checktime.shared.models.broadcast import BroadcastJob, BroadcastDelivery
+from checktime.shared.models.user import User
+from checktime.shared.repository.base_repository import BaseRepository
+
+# (delivery_id, sent, error) as reported by the sender
+DeliveryResult = Tuple[int, bool, Optional[str]]
+
+class BroadcastRepository(BaseRepository[BroadcastJob]):
+    """Repository for broadcast jobs and their deliveries."""
+    
+    def __init__(self):
+        """Initialize the repository."""
+        super().__init__(BroadcastJob)
+    
+    def get_recent(self, limit: int = 10) -> List[BroadcastJob]:
+        """Get the most recent broadcast jobs, newest first."""
+        return BroadcastJob.query.order_by(BroadcastJob.id.desc()).limit(limit).all()
+    
+    def create_job(self, message: str, created_by: int, recipients: Iterable[User]) -> BroadcastJob:
+        """Create a queued job with one pending delivery per recipient."""
+        job = BroadcastJob(message=message, created_by=created_by)
+        for user in recipients:
+            job.deliveries.append(BroadcastDelivery(
+                user_id=user.id, username=user.username, chat_id=user.telegram_chat_id
+            ))
+        job.total = len(job.deliveries)
+        return super().create(job)
+    
+    def get_pending_deliveries(self, job_id: int) -> List[Tuple[int, str]]:
+        """Get (delivery_id, chat_id) of the deliveries of a job not attempted yet."""
+        rows = db.session.query(BroadcastDelivery.id, BroadcastDelivery.chat_id).filter_by(
+            job_id=job_id, status=BroadcastDelivery.STATUS_PENDING
+        ).order_by(BroadcastDelivery.id).all()
+        return [(row.id, row.chat_id) for row in rows]
+    
+    def claim_delivery(self, delivery_id: int) -> bool:
+        """Move a pending delivery to sending; False if it is not pending anymore."""
+        claimed = db.session.execute(
+            update(BroadcastDelivery).where(
+                BroadcastDelivery.id == delivery_id,
+                BroadcastDelivery.status == BroadcastDelivery.STATUS_PENDING,
+            ).values(status=BroadcastDelivery.STATUS_SENDING)
+        ).rowcount
+        db.session.commit()
+        return claimed == 1
+    
+    def fail_interrupted(self, job_id: int, error: str) -> int:
+        """Mark as failed the deliveries of a job left sending by a sender that died; return how many."""
+        failed = db.session.execute(
+            update(BroadcastDelivery).where(
+                BroadcastDelivery.job_id == job_id,
+                BroadcastDelivery.status == BroadcastDelivery.STATUS_SENDING,
+            ).values(status=BroadcastDelivery.STATUS_FAILED, error=error[:255])
+        ).rowcount
+        if failed:
+            db.session.execute(
+                update(BroadcastJob).where(BroadcastJob.id == job_id).values(failed=BroadcastJob.failed + failed)
+            )
+        db.session.commit()
+        return failed
+    
+    def claim_stale_jobs(self, cutoff: datetime) -> List[int]:
+        """
+        Take over the queued or running jobs not updated since `cutoff`.
+        
+        Each job is claimed by a conditional update, so of several processes
+        sweeping at once only one gets it.
+        """
+        unfinished = (BroadcastJob.STATUS_QUEUED, BroadcastJob.STATUS_RUNNING)
+        candidates = db.session.query(BroadcastJob.id).filter(
+            BroadcastJob.status.in_(unfinished), BroadcastJob.updated_at < cutoff
+        ).order_by(BroadcastJob.id).all()
+        claimed = []
+        for (job_id,) in candidates:
+            result = db.session.execute(
+                update(BroadcastJob).where(
+                    BroadcastJob.id == job_id,
+                    BroadcastJob.status.in_(unfinished),
+                    BroadcastJob.updated_at < cutoff,
+                ).values(updated_at=datetime.now())
+            )
+            if result.rowcount == 1:
+                claimed.append(job_id)
+        db.session.commit()
+        return claimed
+    
+    def set_status(self, job_id: int, status: str, error: Optional[str] = None) -> None:
+        """Move a job to a new status, stamping its start or end time."""
+        values = {'status': status}
+        if status == BroadcastJob.STATUS_RUNNING:
+            values['started_at'] = datetime.now()
+        elif status in (BroadcastJob.STATUS_COMPLETED, BroadcastJob.STATUS_FAILED):
+            values['finished_at'] = datetime.now()
+        if error is not None:
+            values['error'] = error[:255]
+        db.session.execute(update(BroadcastJob).where(BroadcastJob.id == job_id).values(**values))
+        db.session.commit()
+    
+    def record_results(self, job_id: int, results: List[DeliveryResult]) -> None:
+        """Store delivery results and add them to the job counters (which also marks the job as alive)."""
+        if not results:
+            return
+        now = datetime.now()
+        sent = 0
+        for delivery_id, ok, error in results:
+            db.session.execute(
+                update(BroadcastDelivery).where(BroadcastDelivery.id == delivery_id).values(
+                    status=BroadcastDelivery.STATUS_SENT if ok else BroadcastDelivery.STATUS_FAILED,
+                    error=error[:255] if error else None,
+                    sent_at=now if ok else None,
+                )
+            )
+            sent += ok
+        db.session.execute(
+            update(BroadcastJob).where(BroadcastJob.id == job_id).values(
+                sent=BroadcastJob.sent + sent,
+                failed=BroadcastJob.failed + (len(results) - sent),
+            )
+        )
+        db.session.commit()
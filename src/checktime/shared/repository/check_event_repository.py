@@ -0,0 +1,176 @@
+"""
+Repository for check history operations.
+"""
+
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import func, text
+from sqlalchemy.exc import IntegrityError
+
+from checktime.shared.db import db
+from checktime.shared.models.check_event import CheckEvent
+from checktime.shared.models.user import User
+from checktime.shared.repository.base_repository import BaseRepository
+
+# Months of partitions kept ready ahead of the current one
+CHECK_EVENT_MONTHS_AHEAD = 2
+
+def month_start(day: date, months: int = 0) -> date:
+    """First day of the month `months` after the one containing `day`."""
+    index = day.year * 12 + day.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+def _partition_name(month: date) -> str:
+    return f"check_event_{month:%Y_%m}"
+
+def partition_ddl(month: date) -> str:
+    """CREATE statement for the PostgreSQL partition holding the month starting on `month`."""
+    return (
+        f"CREATE TABLE IF NOT EXISTS {_partition_name(month)} PARTITION OF check_event "
+        f"FOR VALUES FROM ('{month.isoformat()}') TO ('{month_start(month, 1).isoformat()}')"
+    )
+
+def upcoming_months(today: date, months_ahead: int) -> List[date]:
+    """First days of this month and the `months_ahead` following ones."""
+    return [month_start(today, offset) for offset in range(months_ahead + 1)]
+
+def is_unique_violation(error: IntegrityError) -> bool:
+    """Whether an IntegrityError is a duplicate key, rather than e.g. a missing partition or user."""
+    orig = error.orig
+    # psycopg2 exposes the SQLSTATE as pgcode, psycopg 3 as sqlstate
+    sqlstate = getattr(orig, 'pgcode', None) or getattr(orig, 'sqlstate', None)
+    if sqlstate is not None:
+        return sqlstate == '23505'
+    message = str(orig)
+    return 'UNIQUE constraint failed' in message or 'Duplicate entry' in message
+
+class CheckEventRepository(BaseRepository[CheckEvent]):
+    """Repository for the scheduler's check history."""
+    
+    def __init__(self):
+        """Initialize the repository."""
+        super().__init__(CheckEvent)
+    
+    def get_event(self, user_id: int, day: date, check_type: str) -> Optional[CheckEvent]:
+        """Get the event of a user's check on a day."""
+        return db.session.get(CheckEvent, (user_id, day, check_type))
+    
+    def claim(self, event: CheckEvent) -> bool:
+        """
+        Insert a new event, unless one with the same key already exists.
+        
+        Returns:
+            bool: True if inserted, False if the key was already taken
+            
+        Raises:
+            IntegrityError: For any other violation, e.g. no partition for the
+                event's date or a user that no longer exists
+        """
+        db.session.add(event)
+        try:
+            db.session.commit()
+            return True
+        except IntegrityError as e:
+            db.session.rollback()
+            if is_unique_violation(e):
+                return False
+            raise
+    
+    def fail_running(self, started_before: datetime, error_class: str, error_message: str) -> List[CheckEvent]:
+        """Mark as failed the events still running that started before a time, and return them."""
+        events = CheckEvent.query.filter(
+            CheckEvent.result == CheckEvent.RESULT_RUNNING,
+            CheckEvent.started_at < started_before
+        ).all()
+        now = datetime.now()
+        for event in events:
+            event.result = CheckEvent.RESULT_FAILED
+            event.error_class = error_class
+            event.error_message = error_message
+            event.finished_at = now
+        db.session.commit()
+        return events
+    
+    def update_event(self, user_id: int, day: date, check_type: str, **fields) -> Optional[CheckEvent]:
+        """Update columns of an existing event."""
+        event = self.get_event(user_id, day, check_type)
+        if event is None:
+            return None
+        for name, value in fields.items():
+            setattr(event, name, value)
+        db.session.commit()
+        return event
+    
+    def get_by_user(self, user_id: int, since: date) -> List[CheckEvent]:
+        """Get a user's events from a date on, newest first."""
+        return CheckEvent.query.filter(
+            CheckEvent.user_id == user_id,
+            CheckEvent.date >= since
+        ).order_by(CheckEvent.date.desc(), CheckEvent.check_type).all()
+    
+    def count_by_result(self, since: date) -> Dict[str, int]:
+        """Count every user's events from a date on, by result."""
+        rows = db.session.query(CheckEvent.result, func.count()).filter(
+            CheckEvent.date >= since
+        ).group_by(CheckEvent.result).all()
+        return {result: count for result, count in rows}
+    
+    def get_phase_timings(self, since: date, limit: int) -> List[Tuple[str, Dict[str, Any]]]:
+        """Get the subdomain and phase timings of the most recent events from a date on."""
+        return db.session.query(User.checkjc_subdomain, CheckEvent.phase_timings).join(
+            User, User.id == CheckEvent.user_id
+        ).filter(
+            CheckEvent.date >= since,
+            CheckEvent.phase_timings.isnot(None)
+        ).order_by(CheckEvent.started_at.desc()).limit(limit).all()
+    
+    def ensure_partitions(self, today: date, months_ahead: int) -> List[str]:
+        """
+        Create the monthly partitions from this month to `months_ahead` months
+        on (PostgreSQL only).
+        
+        Returns:
+            List[str]: Names of the partitions created
+        """
+        if db.session.get_bind().dialect.name != 'postgresql':
+            return []
+        existing = self._partitions()
+        created = []
+        for month in upcoming_months(today, months_ahead):
+            if _partition_name(month) in existing:
+                continue
+            db.session.execute(text(partition_ddl(month)))
+            created.append(_partition_name(month))
+        db.session.commit()
+        return created
+    
+    def purge_before(self, cutoff: date) -> int:
+        """
+        Drop the events of every month before the one containing `cutoff`.
+        On PostgreSQL whole partitions are dropped; elsewhere rows are deleted.
+        
+        Returns:
+            int: Partitions dropped (PostgreSQL) or rows deleted
+        """
+        first_kept = month_start(cutoff)
+        if db.session.get_bind().dialect.name != 'postgresql':
+            deleted = CheckEvent.query.filter(CheckEvent.date < first_kept).delete(synchronize_session=False)
+            db.session.commit()
+            return deleted
+        dropped = 0
+        for name in sorted(self._partitions()):
+            if name < _partition_name(first_kept):
+                db.session.execute(text(f"DROP TABLE IF EXISTS {name}"))
+                dropped += 1
+        db.session.commit()
+        return dropped
+    
+    def _partitions(self) -> List[str]:
+        rows = db.session.execute(text(
+            "SELECT c.relname FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid "
+            "JOIN pg_class p ON p.oid = i.inhparent "
+            "WHERE p.relname = 'check_event'"
+        ))
+        return [row[0] for row in rows]
@@ -0,0 +1,31 @@
+"""
+Repository for CheckJC circuit breaker operations.
+"""
+
+from typing import List
+
+from checktime.shared.db import db
+from checktime.shared.models.circuit_breaker import CheckJCBreaker
+from checktime.shared.repository.base_repository import BaseRepository
+
+class CircuitBreakerRepository(BaseRepository[CheckJCBreaker]):
+    """Repository for the persisted CheckJC circuit breaker states."""
+    
+    def __init__(self):
+        """Initialize the repository."""
+        super().__init__(CheckJCBreaker)
+    
+    def get_all_ordered(self) -> List[CheckJCBreaker]:
+        """Get every breaker, by subdomain and egress."""
+        return CheckJCBreaker.query.order_by(CheckJCBreaker.subdomain, CheckJCBreaker.egress).all()
+    
+    def save_state(self, subdomain: str, egress: str, **fields) -> CheckJCBreaker:
+        """Create or update the breaker of a subdomain and egress."""
+        breaker = db.session.get(CheckJCBreaker, (subdomain, egress))
+        if breaker is None:
+            breaker = CheckJCBreaker(subdomain=subdomain, egress=egress)
+            db.session.add(breaker)
+        for name, value in fields.items():
+            setattr(breaker, name, value)
+        db.session.commit()
+        return breaker
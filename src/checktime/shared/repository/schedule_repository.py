@@ -6,11 +6,18 @@ from datetime import date
 from typing import List, Optional, Tuple
 
 from sqlalchemy import and_
+from sqlalchemy.exc import IntegrityError
 
 from checktime.shared.db import db
 from checktime.shared.models.schedule import SchedulePeriod, DaySchedule
 from checktime.shared.repository.base_repository import BaseRepository
 
+# Exclusion constraint added by schema migration 3 (PostgreSQL only)
+OVERLAP_CONSTRAINT = 'schedule_period_no_overlap'
+
+class PeriodOverlapError(ValueError):
+    """An active schedule period would overlap another active period of the same user."""
+
 class SchedulePeriodRepository(BaseRepository[SchedulePeriod]):
     """Repository for schedule period operations."""
     
@@ -80,7 +87,11 @@ class SchedulePeriodRepository(BaseRepository[SchedulePeriod]):
             is_active=is_active,
             user_id=user_id
         )
-        return super().create(period)
+        try:
+            return super().create(period)
+        except IntegrityError as e:
+            self._raise_if_overlap(e)
+            raise
     
     def update_period(self, period: SchedulePeriod, name: str = None, start_date: date = None, 
                       end_date: date = None, is_active: bool = None) -> SchedulePeriod:
@@ -93,7 +104,17 @@ class SchedulePeriodRepository(BaseRepository[SchedulePeriod]):
             period.end_date = end_date
         if is_active is not None:
             period.is_active = is_active
-        return super().update(period)
+        try:
+            return super().update(period)
+        except IntegrityError as e:
+            self._raise_if_overlap(e)
+            raise
+    
+    def _raise_if_overlap(self, error: IntegrityError) -> None:
+        """Roll back and raise PeriodOverlapError if the error is the overlap constraint."""
+        db.session.rollback()
+        if OVERLAP_CONSTRAINT in str(error.orig):
+            raise PeriodOverlapError("Schedule period overlaps another active period") from error
     
     def check_overlap(self, start_date: date, end_date: date, user_id: int, exclude_id: Optional[int] = None) -> bool:
         """Check if there's an overlap with existing periods for a specific user."""
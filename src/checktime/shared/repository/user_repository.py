@@ -93,6 +93,10 @@ class UserRepository(BaseRepository[User]):
             User.telegram_notifications_enabled == True
         ).all()
         
+    def get_by_telegram_chat_id(self, chat_id: str) -> Optional[User]:
+        """Get a user by Telegram chat ID (unique, indexed)."""
+        return User.query.filter_by(telegram_chat_id=str(chat_id)).first()
+        
     def set_telegram_settings(self, user_id: int, chat_id: str, enabled: bool = True) -> User:
         """
         Set the Telegram settings for a user.
@@ -109,7 +113,8 @@ class UserRepository(BaseRepository[User]):
         if not user:
             return None
             
-        user.telegram_chat_id = chat_id
+        # Blank means "no chat"; stored as NULL so it doesn't collide with other users
+        user.telegram_chat_id = chat_id.strip() if chat_id and chat_id.strip() else None
         user.telegram_notifications_enabled = enabled
         
         return super().update(user) 
\ No newline at end of file
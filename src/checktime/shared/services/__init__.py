@@ -5,4 +5,9 @@ Services module for business logic that is shared across application components.
 from checktime.shared.services.holiday_manager import HolidayManager
 from checktime.shared.services.user_manager import UserManager
 from checktime.shared.services.schedule_manager import ScheduleManager
-from checktime.shared.services.day_override_manager import DayOverrideManager 
\ No newline at end of file
+from checktime.shared.services.day_override_manager import DayOverrideManager
+from checktime.shared.services.broadcast_manager import BroadcastManager
+from checktime.shared.services.bot_state_manager import BotStateManager
+from checktime.shared.services.circuit_breaker_manager import CircuitBreakerManager
+from checktime.shared.services.check_event_manager import CheckEventManager
+from checktime.shared.services.year_calendar import YearCalendar, get_year_calendar, count_days
@@ -0,0 +1,134 @@
+"""
+Bot state management service for CheckTime application.
+"""
+
+import json
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from checktime.shared.models.bot_state import TelegramUpdate
+from checktime.shared.repository.bot_state_repository import BotStateRepository
+
+# Create logger
+logger = logging.getLogger(__name__)
+
+# Key of the next getUpdates offset
+UPDATE_OFFSET_KEY = 'telegram_update_offset'
+
+class BotStateManager:
+    """Manager for the state the Telegram bot keeps across restarts."""
+    
+    def __init__(self):
+        """Initialize the bot state manager."""
+        self.repository = BotStateRepository()
+    
+    def get_update_offset(self) -> Optional[int]:
+        """
+        Get the getUpdates offset saved by the last run.
+        
+        Returns:
+            int or None: The offset, or None if none was saved or on error
+        """
+        try:
+            value = self.repository.get_value(UPDATE_OFFSET_KEY)
+            return int(value) if value is not None else None
+        except Exception as e:
+            error_msg = f"Error loading bot update offset: {e}"
+            logger.error(error_msg)
+            return None
+    
+    def set_update_offset(self, offset: int) -> bool:
+        """
+        Save the getUpdates offset.
+        
+        Args:
+            offset (int): ID of the next update to fetch
+            
+        Returns:
+            bool: True if saved, False otherwise
+        """
+        try:
+            self.repository.set_value(UPDATE_OFFSET_KEY, str(offset))
+            return True
+        except Exception as e:
+            error_msg = f"Error saving bot update offset: {e}"
+            logger.error(error_msg)
+            return False
+    
+    def queue_update(self, update: Dict[str, Any]) -> Optional[bool]:
+        """
+        Store an update posted to the webhook for the bot to handle.
+        
+        An update below the saved offset was already handled, and one whose
+        ID is already stored was already queued; both are rejected, so a
+        resent update is handled once whichever web worker receives it.
+        
+        Args:
+            update (Dict[str, Any]): Update received from Telegram
+            
+        Returns:
+            bool or None: True if queued, False if a duplicate, None on error
+        """
+        try:
+            update_id = int(update["update_id"])
+            value = self.repository.get_value(UPDATE_OFFSET_KEY)
+            if value is not None and update_id < int(value):
+                return False
+            return self.repository.add_update(TelegramUpdate(update_id=update_id, payload=json.dumps(update)))
+        except Exception as e:
+            error_msg = f"Error queuing Telegram update: {e}"
+            logger.error(error_msg)
+            return None
+    
+    def get_queued_updates(self, limit: int) -> List[Dict[str, Any]]:
+        """
+        Get the oldest queued updates the bot has not handled yet.
+        
+        Args:
+            limit (int): Maximum number of updates
+            
+        Returns:
+            List[Dict[str, Any]]: The updates, by update ID; empty on error
+        """
+        try:
+            return [json.loads(row.payload) for row in self.repository.get_unhandled_updates(limit)]
+        except Exception as e:
+            error_msg = f"Error loading queued Telegram updates: {e}"
+            logger.error(error_msg)
+            return []
+    
+    def mark_updates_handled(self, update_ids: List[int]) -> bool:
+        """
+        Mark queued updates as handled and move the offset past them.
+        
+        Args:
+            update_ids (List[int]): IDs of the handled updates
+            
+        Returns:
+            bool: True if saved, False otherwise
+        """
+        try:
+            self.repository.mark_handled(update_ids, UPDATE_OFFSET_KEY, max(update_ids) + 1)
+            return True
+        except Exception as e:
+            error_msg = f"Error marking Telegram updates as handled: {e}"
+            logger.error(error_msg)
+            return False
+    
+    def prune_handled_updates(self, max_age: timedelta) -> int:
+        """
+        Delete the handled updates older than `max_age`.
+        
+        Args:
+            max_age (timedelta): How long handled updates are kept
+            
+        Returns:
+            int: Number of updates deleted, 0 on error
+        """
+        try:
+            return self.repository.delete_handled_updates(datetime.now() - max_age)
+        except Exception as e:
+            error_msg = f"Error pruning handled Telegram updates: {e}"
+            logger.error(error_msg)
+            return 0
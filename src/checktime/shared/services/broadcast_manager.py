@@ -0,0 +1,96 @@
+"""
+Admin broadcast management service for CheckTime application.
+"""
+
+import logging
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+from checktime.shared.models.broadcast import BroadcastJob
+from checktime.shared.models.user import User
+from checktime.shared.repository.broadcast_repository import BroadcastRepository
+
+# Create logger
+logger = logging.getLogger(__name__)
+
+class BroadcastManager:
+    """Manager for admin broadcast jobs."""
+    
+    def __init__(self):
+        """Initialize the broadcast manager."""
+        self.repository = BroadcastRepository()
+    
+    def create_broadcast(self, message: str, created_by: int, recipients: List[User]) -> Optional[BroadcastJob]:
+        """
+        Create a queued broadcast job.
+        
+        Args:
+            message (str): Full text to send
+            created_by (int): ID of the admin sending it
+            recipients (List[User]): Users to send it to; those without a chat ID are skipped
+            
+        Returns:
+            BroadcastJob or None: The job if created, None otherwise
+        """
+        try:
+            recipients = [user for user in recipients if getattr(user, 'telegram_chat_id', None)]
+            job = self.repository.create_job(message, created_by, recipients)
+            logger.info(f"Created broadcast job {job.id} for {job.total} recipients")
+            return job
+        except Exception as e:
+            error_msg = f"Error creating broadcast job: {e}"
+            logger.error(error_msg)
+            return None
+    
+    def get_job(self, job_id: int) -> Optional[BroadcastJob]:
+        """
+        Get a broadcast job by ID.
+        
+        Args:
+            job_id (int): The job ID
+            
+        Returns:
+            BroadcastJob or None: The job if found, None otherwise
+        """
+        try:
+            return self.repository.get_by_id(job_id)
+        except Exception as e:
+            error_msg = f"Error getting broadcast job {job_id}: {e}"
+            logger.error(error_msg)
+            return None
+    
+    def claim_stale_jobs(self, stale_seconds: int) -> List[int]:
+        """
+        Take over the unfinished jobs whose process stopped making progress.
+        
+        Args:
+            stale_seconds (int): Seconds without any update after which a
+                queued or running job is considered abandoned
+            
+        Returns:
+            List[int]: IDs of the jobs claimed by this process, to be resumed
+        """
+        try:
+            cutoff = datetime.now() - timedelta(seconds=stale_seconds)
+            return self.repository.claim_stale_jobs(cutoff)
+        except Exception as e:
+            error_msg = f"Error claiming stale broadcast jobs: {e}"
+            logger.error(error_msg)
+            return []
+    
+    def get_recent_jobs(self, limit: int = 10) -> List[BroadcastJob]:
+        """
+        Get the most recent broadcast jobs.
+        
+        Args:
+            limit (int): Maximum number of jobs
+            
+        Returns:
+            List[BroadcastJob]: The jobs, newest first
+        """
+        try:
+            return self.repository.get_recent(limit)
+        except Exception as e:
+            error_msg = f"Error getting recent broadcast jobs: {e}"
+            logger.error(error_msg)
+            return []
@@ -0,0 +1,222 @@
+"""
+Check history management service for CheckTime application.
+"""
+
+import logging
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from checktime.shared.metrics import percentile
+from checktime.shared.models.check_event import CheckEvent
+from checktime.shared.repository.check_event_repository import (
+    CHECK_EVENT_MONTHS_AHEAD, CheckEventRepository, month_start,
+)
+
+# Create logger
+logger = logging.getLogger(__name__)
+
+# Longest an error message is stored
+MAX_ERROR_LENGTH = 500
+
+class CheckEventManager:
+    """Manager for the ledger of checks performed by the scheduler."""
+    
+    def __init__(self):
+        """Initialize the check event manager."""
+        self.repository = CheckEventRepository()
+    
+    def claim_check(self, user_id: int, day: date, check_type: str,
+                    slot: Optional[datetime] = None) -> Optional[bool]:
+        """
+        Record that a check is starting, unless it was already started.
+        
+        Args:
+            user_id (int): The user ID
+            day (date): Day of the check
+            check_type (str): 'in' or 'out'
+            slot (Optional[datetime]): Scheduled time
+            
+        Returns:
+            bool or None: True if this caller may perform the check, False if
+            it was already started (by this or another scheduler), None if the
+            ledger could not be written
+        """
+        try:
+            event = CheckEvent(user_id=user_id, date=day, check_type=check_type, slot=slot,
+                               result=CheckEvent.RESULT_RUNNING, attempts=0, started_at=datetime.now())
+            return self.repository.claim(event)
+        except Exception as e:
+            error_msg = f"Error claiming check {check_type} of {day} for user {user_id}: {e}"
+            logger.error(error_msg)
+            return None
+    
+    def record_attempt(self, user_id: int, day: date, check_type: str, attempt: int,
+                       phase_timings: Dict[str, float], error: Optional[Exception] = None) -> bool:
+        """
+        Record the outcome of one attempt.
+        
+        Args:
+            user_id (int): The user ID
+            day (date): Day of the check
+            check_type (str): 'in' or 'out'
+            attempt (int): Attempt number, from 1
+            phase_timings (Dict[str, float]): Seconds spent per phase
+            error (Optional[Exception]): The error the attempt failed with
+            
+        Returns:
+            bool: True if recorded, False otherwise
+        """
+        try:
+            self.repository.update_event(
+                user_id, day, check_type,
+                attempts=attempt,
+                phase_timings=phase_timings,
+                error_class=type(error).__name__ if error else None,
+                error_message=str(error)[:MAX_ERROR_LENGTH] if error else None,
+            )
+            return True
+        except Exception as e:
+            error_msg = f"Error recording attempt of check {check_type} of {day} for user {user_id}: {e}"
+            logger.error(error_msg)
+            return False
+    
+    def finish_check(self, user_id: int, day: date, check_type: str, result: str,
+                     checked_at: Optional[datetime] = None) -> bool:
+        """
+        Record the final result of a check.
+        
+        Args:
+            user_id (int): The user ID
+            day (date): Day of the check
+            check_type (str): 'in' or 'out'
+            result (str): CheckEvent.RESULT_SUCCEEDED, RESULT_FAILED or RESULT_UNCONFIRMED
+            checked_at (Optional[datetime]): When the check button was clicked
+            
+        Returns:
+            bool: True if recorded, False otherwise
+        """
+        try:
+            self.repository.update_event(user_id, day, check_type, result=result,
+                                         checked_at=checked_at, finished_at=datetime.now())
+            return True
+        except Exception as e:
+            error_msg = f"Error finishing check {check_type} of {day} for user {user_id}: {e}"
+            logger.error(error_msg)
+            return False
+    
+    def fail_interrupted_checks(self, started_before: datetime) -> List[CheckEvent]:
+        """
+        Close the checks a scheduler process left running when it stopped.
+        
+        Whether their button was clicked is unknown, so they are marked as
+        failed and never started again.
+        
+        Args:
+            started_before (datetime): When the current scheduler process started
+            
+        Returns:
+            List[CheckEvent]: The checks marked as failed; empty on error
+        """
+        try:
+            return self.repository.fail_running(
+                started_before, 'Interrupted',
+                'The scheduler stopped during the check; it may or may not have been registered',
+            )
+        except Exception as e:
+            error_msg = f"Error closing interrupted checks: {e}"
+            logger.error(error_msg)
+            return []
+    
+    def get_user_history(self, user_id: int, days: int = 30) -> List[CheckEvent]:
+        """
+        Get a user's recent checks.
+        
+        Args:
+            user_id (int): The user ID
+            days (int): How many days back to look
+            
+        Returns:
+            List[CheckEvent]: Events, newest first; empty on error
+        """
+        try:
+            return self.repository.get_by_user(user_id, date.today() - timedelta(days=days))
+        except Exception as e:
+            error_msg = f"Error getting check history for user {user_id}: {e}"
+            logger.error(error_msg)
+            return []
+    
+    def get_result_counts(self, days: int = 7) -> Dict[str, int]:
+        """
+        Count every user's recent checks by result.
+        
+        Args:
+            days (int): How many days back to look
+            
+        Returns:
+            Dict[str, int]: Result -> number of checks; empty on error
+        """
+        try:
+            return self.repository.count_by_result(date.today() - timedelta(days=days))
+        except Exception as e:
+            error_msg = f"Error counting checks: {e}"
+            logger.error(error_msg)
+            return {}
+    
+    def get_phase_percentiles(self, days: int = 7, limit: int = 1000) -> Dict[str, Dict[str, Dict[str, float]]]:
+        """
+        Summarize how long each phase of recent checks took, per CheckJC subdomain.
+        
+        Args:
+            days (int): How many days back to look
+            limit (int): Most recent checks to include
+            
+        Returns:
+            Dict[str, Dict[str, Dict[str, float]]]: Subdomain -> phase -> 'p50',
+            'p90', 'max' (seconds) and 'count'; empty on error
+        """
+        try:
+            samples: Dict[str, Dict[str, List[float]]] = {}
+            for subdomain, timings in self.repository.get_phase_timings(date.today() - timedelta(days=days), limit):
+                phases = samples.setdefault(subdomain or '', {})
+                for phase, seconds in (timings or {}).items():
+                    phases.setdefault(phase, []).append(seconds)
+            order = {phase: i for i, phase in enumerate(CheckEvent.PHASES)}
+            return {
+                subdomain: {
+                    phase: {
+                        'p50': percentile(values, 50),
+                        'p90': percentile(values, 90),
+                        'max': max(values),
+                        'count': len(values),
+                    }
+                    for phase, values in sorted(phases.items(), key=lambda item: order.get(item[0], len(order)))
+                }
+                for subdomain, phases in sorted(samples.items())
+            }
+        except Exception as e:
+            error_msg = f"Error computing check phase percentiles: {e}"
+            logger.error(error_msg)
+            return {}
+    
+    def apply_retention(self, retention_months: int,
+                        months_ahead: int = CHECK_EVENT_MONTHS_AHEAD) -> Dict[str, Any]:
+        """
+        Prepare the coming months' partitions and drop the expired history.
+        
+        Args:
+            retention_months (int): Full months of history to keep besides the current one
+            months_ahead (int): Months of partitions to create ahead (PostgreSQL only)
+            
+        Returns:
+            Dict[str, Any]: 'created' partition names and 'purged' count, empty on error
+        """
+        try:
+            today = date.today()
+            created = self.repository.ensure_partitions(today, months_ahead)
+            purged = self.repository.purge_before(month_start(today, -retention_months))
+            logger.info(f"Check history retention: created {created or 'no'} partitions, purged {purged}")
+            return {'created': created, 'purged': purged}
+        except Exception as e:
+            error_msg = f"Error applying check history retention: {e}"
+            logger.error(error_msg)
+            return {}
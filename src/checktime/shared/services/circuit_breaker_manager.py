@@ -0,0 +1,52 @@
+"""
+CheckJC circuit breaker management service for CheckTime application.
+"""
+
+import logging
+from typing import Any, Dict, List
+
+from checktime.shared.models.circuit_breaker import CheckJCBreaker
+from checktime.shared.repository.circuit_breaker_repository import CircuitBreakerRepository
+
+# Create logger
+logger = logging.getLogger(__name__)
+
+class CircuitBreakerManager:
+    """Manager for the persisted state of the scheduler's CheckJC circuit breakers."""
+    
+    def __init__(self):
+        """Initialize the circuit breaker manager."""
+        self.repository = CircuitBreakerRepository()
+    
+    def get_all_breakers(self) -> List[CheckJCBreaker]:
+        """
+        Get every breaker state.
+        
+        Returns:
+            List[CheckJCBreaker]: Breakers ordered by subdomain and egress, empty on error
+        """
+        try:
+            return self.repository.get_all_ordered()
+        except Exception as e:
+            error_msg = f"Error getting CheckJC circuit breakers: {e}"
+            logger.error(error_msg)
+            return []
+    
+    def save_breaker(self, state: Dict[str, Any]) -> bool:
+        """
+        Save a breaker state.
+        
+        Args:
+            state (Dict[str, Any]): subdomain, egress and the columns to store
+            
+        Returns:
+            bool: True if saved, False otherwise
+        """
+        try:
+            fields = dict(state)
+            self.repository.save_state(fields.pop('subdomain'), fields.pop('egress'), **fields)
+            return True
+        except Exception as e:
+            error_msg = f"Error saving CheckJC circuit breaker: {e}"
+            logger.error(error_msg)
+            return False
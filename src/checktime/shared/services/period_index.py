@@ -0,0 +1,160 @@
+"""
+In-memory interval index over a user's schedule periods.
+
+Periods are kept sorted by start date together with a running maximum of
+their end dates, so "the period covering D" and "the periods overlapping
+[a, b]" are a binary search followed by a short backwards scan that stops as
+soon as no earlier period can reach the date. The index is cached per user
+and rebuilt when the user's data version changes (see
+checktime.shared.data_version). It keeps every column of the periods, so a
+lookup against a current index reads no period rows.
+"""
+
+import logging
+from bisect import bisect_right
+from datetime import date, datetime
+from typing import Hashable, List, NamedTuple, Optional
+
+from checktime.shared.data_version import VersionedCache
+from checktime.shared.models.schedule import SchedulePeriod
+from checktime.shared.repository.schedule_repository import SchedulePeriodRepository
+
+# Create logger
+logger = logging.getLogger(__name__)
+
+# Number of users whose index is kept per process
+MAX_CACHED_INDEXES = 1024
+
+class PeriodInterval(NamedTuple):
+    """A schedule period as kept in the index."""
+    start_date: date
+    end_date: date
+    period_id: int
+    is_active: bool
+    user_id: int
+    name: str
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+    @classmethod
+    def from_period(cls, period: SchedulePeriod) -> "PeriodInterval":
+        """Copy the columns of a schedule period."""
+        return cls(period.start_date, period.end_date, period.id, bool(period.is_active),
+                   period.user_id, period.name, period.created_at, period.updated_at)
+
+    def to_period(self) -> SchedulePeriod:
+        """
+        Build a SchedulePeriod from the interval, without reading the database.
+
+        The period is not attached to a session: its day schedules are not
+        loaded (use ScheduleManager.get_day_schedule) and changes to it are
+        not saved.
+
+        Returns:
+            SchedulePeriod: A new, detached period
+        """
+        return SchedulePeriod(id=self.period_id, name=self.name, start_date=self.start_date,
+                              end_date=self.end_date, is_active=self.is_active, user_id=self.user_id,
+                              created_at=self.created_at, updated_at=self.updated_at)
+
+class PeriodIndex:
+    """Sorted interval index over the schedule periods of one user."""
+
+    def __init__(self, intervals: List[PeriodInterval], version: int = 0):
+        """
+        Initialize the index.
+
+        Args:
+            intervals (List[PeriodInterval]): The user's periods, in any order
+            version (int): User data version the intervals were read at
+        """
+        self.version = version
+        self.intervals = sorted(intervals)
+        self.starts = [interval.start_date for interval in self.intervals]
+
+        # max_end[i] is the latest end date among intervals[0..i]
+        self.max_end: List[date] = []
+        for interval in self.intervals:
+            self.max_end.append(max(self.max_end[-1], interval.end_date) if self.max_end else interval.end_date)
+
+    @classmethod
+    def build(cls, user_id: int, key: Hashable = None, version: int = 0) -> "PeriodIndex":
+        """
+        Build the index of a user from the database.
+
+        Args:
+            user_id (int): The user ID
+            key (Hashable): Unused, part of the VersionedCache builder signature
+            version (int): User data version read before loading the periods
+
+        Returns:
+            PeriodIndex: The index
+        """
+        periods = SchedulePeriodRepository().get_all(user_id)
+        intervals = [PeriodInterval.from_period(p) for p in periods]
+        logger.debug(f"Built period index for user {user_id} at version {version}: {len(intervals)} periods")
+        return cls(intervals, version)
+
+    def overlapping(self, start_date: date, end_date: date, active_only: bool = True,
+                    exclude_id: Optional[int] = None) -> List[PeriodInterval]:
+        """
+        Get the periods overlapping [start_date, end_date], ordered by start date.
+
+        Args:
+            start_date (date): First day, inclusive
+            end_date (date): Last day, inclusive
+            active_only (bool): Only return active periods
+            exclude_id (Optional[int]): Period ID to leave out
+
+        Returns:
+            List[PeriodInterval]: The overlapping periods
+        """
+        found = []
+        i = bisect_right(self.starts, end_date) - 1
+        while i >= 0 and self.max_end[i] >= start_date:
+            interval = self.intervals[i]
+            if (interval.end_date >= start_date
+                    and (interval.is_active or not active_only)
+                    and interval.period_id != exclude_id):
+                found.append(interval)
+            i -= 1
+        found.reverse()
+        return found
+
+    def covering(self, target_date: date, active_only: bool = True) -> Optional[PeriodInterval]:
+        """
+        Get the period covering a date.
+
+        Args:
+            target_date (date): The date to check
+            active_only (bool): Only consider active periods
+
+        Returns:
+            Optional[PeriodInterval]: The covering period with the earliest start, or None
+        """
+        found = self.overlapping(target_date, target_date, active_only)
+        return found[0] if found else None
+
+    def has_overlap(self, start_date: date, end_date: date, exclude_id: Optional[int] = None) -> bool:
+        """Whether any period, active or not, overlaps [start_date, end_date]."""
+        return bool(self.overlapping(start_date, end_date, active_only=False, exclude_id=exclude_id))
+
+_cache: "VersionedCache[PeriodIndex]" = VersionedCache(PeriodIndex.build, MAX_CACHED_INDEXES)
+
+def get_period_index(user_id: int) -> PeriodIndex:
+    """
+    Get the period index of a user, rebuilding it if the user's data changed.
+
+    Must be called inside an app context.
+
+    Args:
+        user_id (int): The user ID
+
+    Returns:
+        PeriodIndex: The index
+    """
+    return _cache.get(user_id)
+
+def clear_cache() -> None:
+    """Drop every cached index of this process."""
+    _cache.clear()
@@ -6,9 +6,10 @@ import logging
 from datetime import date
 from typing import List, Optional, Tuple, Dict, Any
 
-from checktime.shared.repository.schedule_repository import SchedulePeriodRepository, DayScheduleRepository
+from checktime.shared.repository.schedule_repository import SchedulePeriodRepository, DayScheduleRepository, PeriodOverlapError
 from checktime.shared.repository.day_override_repository import DayOverrideRepository
 from checktime.shared.models.schedule import SchedulePeriod, DaySchedule
+from checktime.shared.services.period_index import get_period_index
 
 # Create logger
 logger = logging.getLogger(__name__)
@@ -113,7 +114,8 @@ class ScheduleManager:
             user_id (Optional[int]): User ID to filter periods
             
         Returns:
-            Optional[SchedulePeriod]: Active schedule period for the date, or None if not found
+            Optional[SchedulePeriod]: Active schedule period for the date (detached,
+            built from the period index), or None if not found
         """
         try:
             # Use provided user_id or fallback to instance user_id
@@ -122,7 +124,9 @@ class ScheduleManager:
                 logger.warning("No user_id provided for get_active_period_for_date")
                 return None
                 
-            period = self.period_repository.get_active_period_for_date(target_date, user_id)
+            # The user's interval index holds the period's columns: no row to fetch
+            interval = get_period_index(user_id).covering(target_date)
+            period = interval.to_period() if interval else None
             if period:
                 logger.info(f"Found active period {period.name} for date {target_date} and user {user_id}")
             else:
@@ -144,6 +148,7 @@ class ScheduleManager:
             
         Returns:
             List[SchedulePeriod]: List of schedule periods that overlap with the date range
+            (detached, built from the period index)
         """
         try:
             # Use provided user_id or fallback to instance user_id
@@ -152,7 +157,8 @@ class ScheduleManager:
                 logger.warning("No user_id provided for get_periods_for_date_range")
                 return []
                 
-            periods = self.period_repository.get_periods_for_date_range(start_date, end_date, user_id)
+            intervals = get_period_index(user_id).overlapping(start_date, end_date)
+            periods = [interval.to_period() for interval in intervals]
             logger.info(f"Found {len(periods)} schedule periods for date range {start_date} to {end_date}, user {user_id}")
             return periods
         except Exception as e:
@@ -186,6 +192,23 @@ class ScheduleManager:
             logger.error(error_msg)
             return []
     
+    def check_overlap(self, start_date: date, end_date: date, user_id: Optional[int] = None,
+                      exclude_id: Optional[int] = None) -> bool:
+        """
+        Check if a date range overlaps any existing period of a user.
+        
+        Args:
+            start_date (date): Start date
+            end_date (date): End date
+            user_id (Optional[int]): User ID to filter periods
+            exclude_id (Optional[int]): Period ID to ignore (the one being updated)
+            
+        Returns:
+            bool: True if the range overlaps an existing period
+        """
+        user_id = user_id or self.user_id
+        return get_period_index(user_id).has_overlap(start_date, end_date, exclude_id)
+    
     def create_period(self, name: str, start_date: date, end_date: date, 
                      user_id: Optional[int] = None, is_active: bool = True) -> Optional[SchedulePeriod]:
         """
@@ -209,13 +232,16 @@ class ScheduleManager:
                 return None
                 
             # Check for overlap with existing periods
-            if self.period_repository.check_overlap(start_date, end_date, user_id):
+            if self.check_overlap(start_date, end_date, user_id):
                 logger.warning(f"Period overlap detected for user {user_id}: {start_date} to {end_date}")
                 return None
                 
             period = self.period_repository.create_period(name, start_date, end_date, user_id, is_active)
             logger.info(f"Created period {period.name} for user {user_id}")
             return period
+        except PeriodOverlapError:
+            logger.warning(f"Period overlap rejected by the database for user {user_id}: {start_date} to {end_date}")
+            return None
         except Exception as e:
             error_msg = f"Error creating period: {e}"
             logger.error(error_msg)
@@ -244,7 +270,7 @@ class ScheduleManager:
                 return None
                 
             # Check for overlap with existing periods if dates are changing
-            if ('start_date' in data or 'end_date' in data) and self.period_repository.check_overlap(
+            if ('start_date' in data or 'end_date' in data) and self.check_overlap(
                 data.get('start_date', period.start_date),
                 data.get('end_date', period.end_date),
                 user_id,
@@ -264,6 +290,9 @@ class ScheduleManager:
             
             logger.info(f"Updated period {updated_period.name} for user {user_id}")
             return updated_period
+        except PeriodOverlapError:
+            logger.warning(f"Period overlap rejected by the database for user {user_id}")
+            return None
         except Exception as e:
             error_msg = f"Error updating period: {e}"
             logger.error(error_msg)
@@ -566,7 +595,7 @@ class ScheduleManager:
                 return None
                 
             # Check for overlap with existing periods
-            if self.period_repository.check_overlap(new_start_date, new_end_date, user_id):
+            if self.check_overlap(new_start_date, new_end_date, user_id):
                 logger.warning(f"Period overlap detected for user {user_id}: {new_start_date} to {new_end_date}")
                 return None
                 
@@ -3,6 +3,8 @@ User management service for CheckTime application.
 """
 
 import logging
+import threading
+from collections import OrderedDict
 from typing import List, Optional, Any
 
 from checktime.shared.repository.user_repository import UserRepository
@@ -11,6 +13,43 @@ from checktime.shared.models.user import User
 # Create logger
 logger = logging.getLogger(__name__)
 
+# Chats whose user ID is kept per process
+MAX_CACHED_CHATS = 4096
+
+class ChatIdCache:
+    """Per-process LRU map of Telegram chat ID to user ID."""
+    
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, int]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, chat_id: str) -> Optional[int]:
+        with self._lock:
+            user_id = self._entries.get(chat_id)
+            if user_id is not None:
+                self._entries.move_to_end(chat_id)
+            return user_id
+    
+    def set(self, chat_id: str, user_id: int) -> None:
+        with self._lock:
+            self._entries[chat_id] = user_id
+            self._entries.move_to_end(chat_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def discard(self, chat_id: str) -> None:
+        with self._lock:
+            self._entries.pop(chat_id, None)
+    
+    def discard_user(self, user_id: int) -> None:
+        """Forget every chat mapped to a user, e.g. after a profile change."""
+        with self._lock:
+            for chat_id in [c for c, u in self._entries.items() if u == user_id]:
+                del self._entries[chat_id]
+
+_chat_cache = ChatIdCache(MAX_CACHED_CHATS)
+
 class UserManager:
     """Manager for users in the system."""
     
@@ -182,6 +221,12 @@ class UserManager:
         """
         Get user by Telegram chat ID.
         
+        Only users with Telegram notifications enabled are returned. Known
+        chats are resolved through a per-process cache of chat ID to user ID,
+        so the usual case is a primary key fetch; the fetched user is checked
+        against the chat ID, which catches profile changes made by another
+        process.
+        
         Args:
             chat_id (str): Telegram chat ID
             
@@ -189,22 +234,48 @@ class UserManager:
             User or None: User object if found, None otherwise
         """
         try:
-            # Get all users with Telegram configured
-            users = self.get_all_with_telegram_configured()
+            chat_id = str(chat_id)
+            user = None
+            user_id = _chat_cache.get(chat_id)
+            if user_id is not None:
+                user = self.repository.get_by_id(user_id)
+                if user is None or user.telegram_chat_id != chat_id:
+                    _chat_cache.discard(chat_id)
+                    user = None
+            if user is None:
+                user = self.repository.get_by_telegram_chat_id(chat_id)
+                if user is not None:
+                    _chat_cache.set(chat_id, user.id)
             
-            # Find the user with matching chat ID
-            for user in users:
-                if str(user.telegram_chat_id) == str(chat_id):
-                    logger.info(f"Found user {user.username} with chat ID {chat_id}")
-                    return user
-            
-            logger.info(f"No user found with chat ID {chat_id}")
-            return None
+            if user is None or not user.telegram_notifications_enabled:
+                logger.info(f"No user found with chat ID {chat_id}")
+                return None
+            logger.info(f"Found user {user.username} with chat ID {chat_id}")
+            return user
         except Exception as e:
             error_msg = f"Error getting user by chat ID: {e}"
             logger.error(error_msg)
             return None
     
+    def is_chat_id_taken(self, chat_id: str, user_id: Optional[int] = None) -> bool:
+        """
+        Check whether a Telegram chat ID belongs to another user.
+        
+        Args:
+            chat_id (str): Telegram chat ID
+            user_id (Optional[int]): The user that wants it, who may already own it
+            
+        Returns:
+            bool: True if another user has this chat ID
+        """
+        try:
+            user = self.repository.get_by_telegram_chat_id(chat_id.strip())
+            return user is not None and user.id != user_id
+        except Exception as e:
+            error_msg = f"Error checking chat ID: {e}"
+            logger.error(error_msg)
+            return False
+    
     def set_checkjc_credentials(self, user_id: int, username: str, password: str, enabled: bool = True, subdomain: str = None) -> Optional[User]:
         """
         Set the CheckJC credentials for a user.
@@ -243,6 +314,7 @@ class UserManager:
         """
         try:
             user = self.repository.set_telegram_settings(user_id, chat_id, enabled)
+            _chat_cache.discard_user(user_id)
             if user:
                 logger.info(f"Updated Telegram settings for user {user.username}")
             return user
@@ -0,0 +1,244 @@
+"""
+Compact per-user year calendar for CheckTime.
+
+A YearCalendar holds one bit per day of a year for holidays, overrides and
+days covered by an active schedule period, plus the times and labels of the
+days that have them. It is built from the database with four queries and
+cached per (user, year); the cache is checked against User.data_version
+(see checktime.shared.data_version) on every lookup, which is a single
+primary key read, so writes made by any process are picked up immediately.
+
+Membership tests are a shift and a mask, and counting over a date range is
+a popcount of the masked bits.
+"""
+
+import logging
+from datetime import date, timedelta
+from typing import Dict, Iterator, Optional, Tuple
+
+from checktime.shared.data_version import VersionedCache
+from checktime.shared.repository.holiday_repository import HolidayRepository
+from checktime.shared.repository.day_override_repository import DayOverrideRepository
+from checktime.shared.repository.schedule_repository import SchedulePeriodRepository, DayScheduleRepository
+
+# Create logger
+logger = logging.getLogger(__name__)
+
+# Number of (user, year) calendars kept per process
+MAX_CACHED_CALENDARS = 512
+
+def _popcount(mask: int) -> int:
+    return bin(mask).count("1")
+
+class YearCalendar:
+    """Holidays, overrides and scheduled days of one user for one year."""
+
+    def __init__(self, user_id: int, year: int, version: int):
+        """
+        Initialize an empty calendar.
+
+        Args:
+            user_id (int): The user the calendar belongs to
+            year (int): The calendar year
+            version (int): User data version the calendar is built from
+        """
+        self.user_id = user_id
+        self.year = year
+        self.version = version
+        self.first_day = date(year, 1, 1)
+        self.last_day = date(year, 12, 31)
+        self.num_days = (self.last_day - self.first_day).days + 1
+
+        # Bit i is day first_day + i
+        self.holidays = 0
+        self.overrides = 0
+        self.scheduled = 0
+
+        # Day index -> details, only for days that have them
+        self.holiday_names: Dict[int, Optional[str]] = {}
+        self.override_times: Dict[int, Tuple[str, str, Optional[str]]] = {}
+        self.schedule_times: Dict[int, Tuple[str, str, str]] = {}
+
+    @classmethod
+    def build(cls, user_id: int, year: int, version: int) -> "YearCalendar":
+        """
+        Build a calendar from the database.
+
+        Args:
+            user_id (int): The user ID
+            year (int): The calendar year
+            version (int): User data version read before loading the data
+
+        Returns:
+            YearCalendar: The calendar
+        """
+        cal = cls(user_id, year, version)
+
+        for holiday in HolidayRepository().get_holidays_for_date_range(cal.first_day, cal.last_day, user_id):
+            index = cal.index(holiday.date)
+            cal.holidays |= 1 << index
+            cal.holiday_names[index] = holiday.description
+
+        for override in DayOverrideRepository().get_by_user_in_date_range(user_id, cal.first_day, cal.last_day):
+            index = cal.index(override.date)
+            cal.overrides |= 1 << index
+            cal.override_times[index] = (override.check_in_time, override.check_out_time, override.description)
+
+        day_repository = DayScheduleRepository()
+        periods = SchedulePeriodRepository().get_periods_for_date_range(cal.first_day, cal.last_day, user_id)
+        for period in periods:
+            start = cal.index(max(period.start_date, cal.first_day))
+            end = cal.index(min(period.end_date, cal.last_day))
+            for day_schedule in day_repository.get_all_by_period(period.id):
+                # First index in [start, end] falling on this weekday
+                offset = (day_schedule.day_of_week - cal.day(start).weekday()) % 7
+                for index in range(start + offset, end + 1, 7):
+                    if cal.scheduled >> index & 1:
+                        # Overlapping periods: keep the first one, like get_active_period_for_date
+                        continue
+                    cal.scheduled |= 1 << index
+                    cal.schedule_times[index] = (day_schedule.check_in_time, day_schedule.check_out_time, period.name)
+
+        logger.debug(f"Built {year} calendar for user {user_id} at version {version}: "
+                     f"{_popcount(cal.holidays)} holidays, {_popcount(cal.overrides)} overrides, "
+                     f"{_popcount(cal.scheduled)} scheduled days")
+        return cal
+
+    def index(self, target_date: date) -> int:
+        """Return the bit index of a date of this year."""
+        return target_date.toordinal() - self.first_day.toordinal()
+
+    def day(self, index: int) -> date:
+        """Return the date at a bit index."""
+        return self.first_day + timedelta(days=index)
+
+    def contains(self, target_date: date) -> bool:
+        """Whether the date falls in this calendar's year."""
+        return target_date.year == self.year
+
+    def is_holiday(self, target_date: date) -> bool:
+        return bool(self.holidays >> self.index(target_date) & 1)
+
+    def is_override(self, target_date: date) -> bool:
+        return bool(self.overrides >> self.index(target_date) & 1)
+
+    def is_scheduled(self, target_date: date) -> bool:
+        """Whether an active period has a day schedule for the date."""
+        return bool(self.scheduled >> self.index(target_date) & 1)
+
+    @property
+    def working_days(self) -> int:
+        """Mask of scheduled days that are not holidays."""
+        return self.scheduled & ~self.holidays
+
+    @property
+    def active_days(self) -> int:
+        """Mask of days with anything to clock: overrides and working days."""
+        return self.overrides | self.working_days
+
+    def is_working_day(self, target_date: date) -> bool:
+        """Whether the date is scheduled and not a holiday."""
+        return bool(self.working_days >> self.index(target_date) & 1)
+
+    def get_schedule_times(self, target_date: date) -> Tuple[Optional[str], Optional[str]]:
+        """
+        Get check-in and check-out times for a date, overrides first.
+
+        Args:
+            target_date (date): The date to check
+
+        Returns:
+            Tuple[Optional[str], Optional[str]]: Check-in and check-out time, or (None, None)
+        """
+        index = self.index(target_date)
+        if index in self.override_times:
+            return self.override_times[index][:2]
+        if index in self.schedule_times:
+            return self.schedule_times[index][:2]
+        return None, None
+
+    def range_mask(self, start_date: date, end_date: date) -> int:
+        """
+        Mask with the bits of [start_date, end_date] set, clipped to this year.
+
+        Args:
+            start_date (date): First day, inclusive
+            end_date (date): Last day, inclusive
+
+        Returns:
+            int: The mask, 0 if the range doesn't touch this year
+        """
+        start = max(self.index(start_date), 0)
+        end = min(self.index(end_date), self.num_days - 1)
+        if start > end:
+            return 0
+        return ((1 << (end - start + 1)) - 1) << start
+
+    def count(self, mask: int, start_date: date, end_date: date) -> int:
+        """Count the days of `mask` within [start_date, end_date]."""
+        return _popcount(mask & self.range_mask(start_date, end_date))
+
+    def iter_days(self, mask: int) -> Iterator[date]:
+        """Yield the dates whose bit is set in `mask`, in order."""
+        while mask:
+            low = mask & -mask
+            yield self.day(low.bit_length() - 1)
+            mask ^= low
+
+_cache: "VersionedCache[YearCalendar]" = VersionedCache(YearCalendar.build, MAX_CACHED_CALENDARS)
+
+def get_year_calendar(user_id: int, year: int) -> Optional[YearCalendar]:
+    """
+    Get the calendar of a user for a year, rebuilding it if the data changed.
+
+    Must be called inside an app context.
+
+    Args:
+        user_id (int): The user ID
+        year (int): The calendar year
+
+    Returns:
+        Optional[YearCalendar]: The calendar, or None on error
+    """
+    try:
+        if user_id is None:
+            logger.warning("No user_id provided for get_year_calendar")
+            return None
+            
+        return _cache.get(user_id, year)
+    except Exception as e:
+        error_msg = f"Error building calendar for user {user_id}, year {year}: {e}"
+        logger.error(error_msg)
+        return None
+
+def count_days(user_id: int, start_date: date, end_date: date, kind: str = "active") -> int:
+    """
+    Count the days of a kind in a date range, which may span several years.
+
+    Args:
+        user_id (int): The user ID
+        start_date (date): First day, inclusive
+        end_date (date): Last day, inclusive
+        kind (str): 'active', 'working', 'scheduled', 'holidays' or 'overrides'
+
+    Returns:
+        int: Number of matching days
+    """
+    total = 0
+    for year in range(start_date.year, end_date.year + 1):
+        cal = get_year_calendar(user_id, year)
+        if cal is None:
+            continue
+        mask = {
+            "active": cal.active_days,
+            "working": cal.working_days,
+            "scheduled": cal.scheduled,
+            "holidays": cal.holidays,
+            "overrides": cal.overrides,
+        }[kind]
+        total += cal.count(mask, start_date, end_date)
+    return total
+
+def clear_cache() -> None:
+    """Drop every cached calendar of this process."""
+    _cache.clear()
@@ -0,0 +1,276 @@
+"""
+Memory watchdog for the long-running scheduler and bot processes.
+
+Every MEMORY_CHECK_SECONDS a background thread:
+
+- measures the process's resident memory and that of its child processes
+  (Playwright drivers and Chromium in the scheduler) and publishes them as
+  gauges;
+- while no browser session is open, reaps zombie children and kills the
+  Chromium processes left behind: descendants of this process, and
+  Playwright Chromiums orphaned by a driver that died (reparented to PID 1);
+- with MEMORY_TRACEMALLOC on, logs which source lines allocated the most
+  memory since the previous check;
+- once the resident memory passes the process's soft limit, calls the
+  process's drain callback, which finishes the work in flight and exits
+  with RESTART_EXIT_CODE so supervisord starts a fresh process.
+
+Process information is read from /proc; elsewhere only tracemalloc works.
+"""
+
+import logging
+import os
+import signal
+import threading
+import tracemalloc
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from checktime.shared.config import get_memory_check_seconds, get_memory_tracemalloc
+from checktime.shared.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Exit code of a process restarting itself (EX_TEMPFAIL); supervisord restarts it
+RESTART_EXIT_CODE = 75
+# Process names (comm, at most 15 characters) of Chromium and its helpers
+CHROMIUM_NAMES = ('chrome', 'chromium', 'headless_shell')
+# Command line marker of the Chromiums Playwright launches (their temporary profile)
+PLAYWRIGHT_PROFILE_MARKER = 'playwright_chromiumdev_profile'
+TRACEMALLOC_FRAMES = 10
+TRACEMALLOC_TOP = 10
+PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+def _read_stat(pid: int) -> Optional[Dict[str, Any]]:
+    """Name, state, parent and resident bytes of a process, from /proc/<pid>/stat."""
+    try:
+        with open(f'/proc/{pid}/stat', encoding='utf-8', errors='replace') as f:
+            data = f.read()
+    except OSError:
+        return None
+    # The name is in parentheses and may itself contain spaces or parentheses
+    fields = data[data.rindex(')') + 2:].split()
+    return {
+        'pid': pid,
+        'name': data[data.index('(') + 1:data.rindex(')')],
+        'state': fields[0],
+        'ppid': int(fields[1]),
+        'rss': int(fields[21]) * PAGE_SIZE,
+    }
+
+def _read_cmdline(pid: int) -> str:
+    try:
+        with open(f'/proc/{pid}/cmdline', 'rb') as f:
+            return f.read().replace(b'\0', b' ').decode('utf-8', 'replace')
+    except OSError:
+        return ''
+
+def list_processes() -> List[Dict[str, Any]]:
+    """
+    List every process visible in /proc.
+
+    Returns:
+        List[Dict[str, Any]]: pid, name, state, ppid and rss (bytes) of each;
+        empty where /proc is not available
+    """
+    try:
+        pids = [int(entry) for entry in os.listdir('/proc') if entry.isdigit()]
+    except OSError:
+        return []
+    return [stat for stat in map(_read_stat, pids) if stat is not None]
+
+def descendants(processes: List[Dict[str, Any]], pid: int) -> List[Dict[str, Any]]:
+    """Processes below `pid` in the process tree."""
+    children: Dict[int, List[Dict[str, Any]]] = {}
+    for process in processes:
+        children.setdefault(process['ppid'], []).append(process)
+    found, pending = [], [pid]
+    while pending:
+        for child in children.get(pending.pop(), []):
+            found.append(child)
+            pending.append(child['pid'])
+    return found
+
+def is_chromium(process: Dict[str, Any]) -> bool:
+    """Whether a process is Chromium or one of its helpers."""
+    return process['name'].startswith(CHROMIUM_NAMES)
+
+class SessionTracker:
+    """Counts a process's open browser sessions, so Chromium is only reaped while there are none."""
+
+    def __init__(self):
+        """Initialize with no session open."""
+        self.active = 0
+        self._lock = threading.Lock()
+
+    def opened(self) -> None:
+        """A browser session is starting (waits while the watchdog is reaping)."""
+        with self._lock:
+            self.active += 1
+
+    def closed(self) -> None:
+        """A browser session has been closed."""
+        with self._lock:
+            self.active -= 1
+
+    @contextmanager
+    def idle(self) -> Iterator[bool]:
+        """Yield whether no session is open, keeping new ones from starting until the block ends."""
+        with self._lock:
+            yield self.active == 0
+
+class MemoryWatchdog:
+    """Periodic memory accounting, Chromium reaping and soft limit for one process."""
+
+    def __init__(self, name: str, soft_limit_mb: int = 0, interval: Optional[float] = None,
+                 on_limit: Optional[Callable[[], None]] = None,
+                 sessions: Optional[SessionTracker] = None,
+                 trace: Optional[bool] = None):
+        """
+        Initialize the watchdog.
+
+        Args:
+            name (str): Process name, for the logs
+            soft_limit_mb (int): Resident memory, in MB, that triggers on_limit; 0 for none
+            interval (Optional[float]): Seconds between checks, defaults to MEMORY_CHECK_SECONDS
+            on_limit (Optional[Callable]): Called once, from the watchdog thread,
+                when the soft limit is passed; should drain and restart the process
+            sessions (Optional[SessionTracker]): The process's browser
+                sessions; Chromium processes are leftovers while none is open.
+                None for processes that never start a browser.
+            trace (Optional[bool]): Diff tracemalloc snapshots, defaults to MEMORY_TRACEMALLOC
+        """
+        self.name = name
+        self.soft_limit = soft_limit_mb * 1024 * 1024
+        self.interval = interval if interval is not None else get_memory_check_seconds()
+        self.on_limit = on_limit
+        self.sessions = sessions
+        self.trace = trace if trace is not None else get_memory_tracemalloc()
+        self.limit_reached = False
+        self._first_snapshot: Optional[tracemalloc.Snapshot] = None
+        self._last_snapshot: Optional[tracemalloc.Snapshot] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Check in a background thread every `interval` seconds."""
+        if self.trace and not tracemalloc.is_tracing():
+            tracemalloc.start(TRACEMALLOC_FRAMES)
+        self._thread = threading.Thread(target=self._run, name='memory-watchdog', daemon=True)
+        self._thread.start()
+        limit = f"{self.soft_limit // (1024 * 1024)} MB" if self.soft_limit else "none"
+        logger.info(f"Memory watchdog for {self.name} started (every {self.interval:.0f}s, soft limit {limit})")
+
+    def stop(self) -> None:
+        """Stop the background checks."""
+        self._stop.set()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.check()
+            except Exception as e:
+                logger.error(f"Error in the memory watchdog of {self.name}: {e}")
+
+    def check(self) -> Dict[str, Any]:
+        """
+        Run one check.
+
+        Returns:
+            Dict[str, Any]: rss and children_rss (bytes), children, and the
+            zombies and chromium processes reaped
+        """
+        processes = list_processes()
+        me = next((p for p in processes if p['pid'] == os.getpid()), None)
+        below = descendants(processes, os.getpid())
+        result = {
+            'rss': me['rss'] if me else 0,
+            'children': len(below),
+            'children_rss': sum(p['rss'] for p in below),
+            'zombies': 0,
+            'chromium': 0,
+        }
+        metrics.set('process_resident_memory_bytes', result['rss'])
+        metrics.set('process_children', result['children'])
+        metrics.set('process_children_resident_memory_bytes', result['children_rss'])
+
+        # With a browser open its processes are in use, and its driver reaps its own children
+        if self.sessions is None:
+            result['zombies'] = self._reap_zombies(below)
+        else:
+            with self.sessions.idle() as idle:
+                if idle:
+                    result['chromium'] = self._kill_leftover_chromium(processes, below)
+                    result['zombies'] = self._reap_zombies(below)
+
+        if self.trace:
+            self._log_allocations()
+
+        if self.soft_limit and result['rss'] > self.soft_limit and not self.limit_reached:
+            self.limit_reached = True
+            metrics.inc('memory_soft_limit_hits_total')
+            logger.warning(
+                f"{self.name} uses {result['rss'] / 2**20:.0f} MB, over its soft limit of "
+                f"{self.soft_limit / 2**20:.0f} MB: draining and restarting"
+            )
+            if self._first_snapshot is not None:
+                self._log_top(self._take_snapshot(), self._first_snapshot, "since start")
+            if self.on_limit is not None:
+                self.on_limit()
+        return result
+
+    def _reap_zombies(self, below: List[Dict[str, Any]]) -> int:
+        reaped = 0
+        for process in below:
+            if process['ppid'] != os.getpid() or process['state'] != 'Z':
+                continue
+            try:
+                os.waitpid(process['pid'], os.WNOHANG)
+                reaped += 1
+            except ChildProcessError:
+                continue
+        if reaped:
+            metrics.inc('zombies_reaped_total', value=reaped)
+            logger.info(f"Reaped {reaped} zombie child processes of {self.name}")
+        return reaped
+
+    def _kill_leftover_chromium(self, processes: List[Dict[str, Any]], below: List[Dict[str, Any]]) -> int:
+        leftovers = [p for p in below if is_chromium(p) and p['state'] != 'Z']
+        orphans = [
+            p for p in processes
+            if p['ppid'] == 1 and is_chromium(p) and PLAYWRIGHT_PROFILE_MARKER in _read_cmdline(p['pid'])
+        ]
+        killed = 0
+        for reason, victims in (('leftover', leftovers), ('orphan', orphans)):
+            for process in victims:
+                try:
+                    os.kill(process['pid'], signal.SIGKILL)
+                except (ProcessLookupError, PermissionError):
+                    continue
+                killed += 1
+                metrics.inc('chromium_reaped_total', reason=reason)
+        if killed:
+            logger.warning(f"Killed {killed} Chromium processes left behind by {self.name}'s browser sessions")
+        return killed
+
+    def _take_snapshot(self) -> tracemalloc.Snapshot:
+        return tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+        ))
+
+    def _log_allocations(self) -> None:
+        snapshot = self._take_snapshot()
+        metrics.set('tracemalloc_traced_bytes', tracemalloc.get_traced_memory()[0])
+        if self._last_snapshot is not None:
+            self._log_top(snapshot, self._last_snapshot, f"in the last {self.interval:.0f}s")
+        else:
+            self._first_snapshot = snapshot
+        self._last_snapshot = snapshot
+
+    def _log_top(self, snapshot: tracemalloc.Snapshot, baseline: tracemalloc.Snapshot, period: str) -> None:
+        growth = [stat for stat in snapshot.compare_to(baseline, 'lineno') if stat.size_diff > 0]
+        if not growth:
+            return
+        lines = "\n".join(f"  {stat}" for stat in growth[:TRACEMALLOC_TOP])
+        logger.info(f"Top memory growth of {self.name} {period}:\n{lines}")
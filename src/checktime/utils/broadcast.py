@@ -0,0 +1,175 @@
+"""
+Background delivery of admin broadcasts for CheckTime.
+
+The admin view only creates the job (see
+checktime.shared.services.broadcast_manager) and calls `start_broadcast`,
+which returns at once. A thread in the web worker then sends the message to
+every recipient through a small pool of sender threads, paced to stay under
+Telegram's global limit. The status page follows the progress from any worker.
+
+Each delivery is claimed (pending -> sending) before its message goes out and
+its result is written right after, so a job is never sent twice to anyone:
+if the web worker dies mid-run, the deliveries it left sending are reported as
+failed rather than retried. The scheduler resumes the jobs that stopped making
+progress (`resume_stale_broadcasts`).
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List, Optional
+
+from flask import Flask, current_app
+
+from checktime.shared.config import (
+    get_broadcast_stale_seconds, get_broadcast_workers, get_telegram_global_rate,
+)
+from checktime.shared.metrics import metrics
+from checktime.shared.models.broadcast import BroadcastJob
+from checktime.shared.repository.broadcast_repository import BroadcastRepository
+from checktime.shared.services.broadcast_manager import BroadcastManager
+from checktime.utils.telegram import TelegramClient, get_telegram_client
+
+# Create logger
+logger = logging.getLogger(__name__)
+
+# Error of the deliveries whose sender died between claiming and recording them
+INTERRUPTED_ERROR = "Interrupted while sending, the message may or may not have been delivered"
+
+class RateLimiter:
+    """Spaces calls from any number of threads at least 1/rate seconds apart."""
+
+    def __init__(self, rate: float):
+        """
+        Initialize the limiter.
+
+        Args:
+            rate (float): Maximum calls per second (0 or less disables the limit)
+        """
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """Block until the caller may make its call."""
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next)
+            self._next = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+def _deliver(app: Flask, client: TelegramClient, limiter: RateLimiter, job_id: int,
+             delivery_id: int, chat_id: str, message: str) -> Optional[bool]:
+    """Send one delivery and record its result; None if another sender already claimed it."""
+    limiter.acquire()
+    with app.app_context():
+        repository = BroadcastRepository()
+        if not repository.claim_delivery(delivery_id):
+            return None
+        try:
+            client.deliver_message(message, chat_id)
+            result = (delivery_id, True, None)
+        except Exception as e:
+            result = (delivery_id, False, str(e))
+        repository.record_results(job_id, [result])
+        return result[1]
+
+def run_broadcast(job_id: int, client: Optional[TelegramClient] = None,
+                  workers: Optional[int] = None, rate: Optional[float] = None) -> None:
+    """
+    Deliver a broadcast job. Must be called inside an app context.
+
+    Only pending deliveries are sent, so running a job again after an
+    interruption does not message anyone twice. Deliveries left sending by
+    the interrupted run are marked as failed first.
+
+    Args:
+        job_id (int): The job ID
+        client (Optional[TelegramClient]): Client used to send, defaults to the shared one
+        workers (Optional[int]): Concurrent senders, defaults to BROADCAST_WORKERS
+        rate (Optional[float]): Messages per second, defaults to TELEGRAM_GLOBAL_RATE
+    """
+    app = current_app._get_current_object()
+    repository = BroadcastRepository()
+    client = client or get_telegram_client()
+    limiter = RateLimiter(rate if rate is not None else get_telegram_global_rate())
+
+    try:
+        job = repository.get_by_id(job_id)
+        if job is None:
+            logger.error(f"Broadcast job {job_id} not found")
+            return
+        message = job.message
+        interrupted = repository.fail_interrupted(job_id, INTERRUPTED_ERROR)
+        if interrupted:
+            logger.warning(f"Broadcast job {job_id}: {interrupted} deliveries were interrupted mid-send, "
+                           f"marked as failed")
+        pending = repository.get_pending_deliveries(job_id)
+        repository.set_status(job_id, BroadcastJob.STATUS_RUNNING)
+        logger.info(f"Broadcast job {job_id}: sending to {len(pending)} recipients")
+
+        start = time.monotonic()
+        with ThreadPoolExecutor(max_workers=workers or get_broadcast_workers(),
+                                thread_name_prefix=f'broadcast-{job_id}') as pool:
+            futures = [pool.submit(_deliver, app, client, limiter, job_id, delivery_id, chat_id, message)
+                       for delivery_id, chat_id in pending]
+            for future in as_completed(futures):
+                sent = future.result()
+                if sent is not None:
+                    metrics.inc('broadcast_deliveries_total', outcome='sent' if sent else 'failed')
+
+        repository.set_status(job_id, BroadcastJob.STATUS_COMPLETED)
+        logger.info(f"Broadcast job {job_id} completed in {time.monotonic() - start:.1f}s")
+    except Exception as e:
+        logger.exception(f"Broadcast job {job_id} failed")
+        try:
+            repository.set_status(job_id, BroadcastJob.STATUS_FAILED, error=str(e))
+        except Exception as status_error:
+            logger.error(f"Could not mark broadcast job {job_id} as failed: {status_error}")
+
+def start_broadcast(app: Flask, job_id: int) -> threading.Thread:
+    """
+    Deliver a broadcast job in a background thread.
+
+    Args:
+        app (Flask): The application, for the thread's app context
+        job_id (int): The job ID
+
+    Returns:
+        threading.Thread: The started thread
+    """
+    def target():
+        with app.app_context():
+            run_broadcast(job_id)
+
+    thread = threading.Thread(target=target, name=f'broadcast-{job_id}', daemon=True)
+    thread.start()
+    return thread
+
+def resume_stale_broadcasts(app: Flask, stale_seconds: Optional[int] = None) -> List[int]:
+    """
+    Resume the broadcast jobs left unfinished by a process that is gone.
+
+    A queued or running job without any progress for `stale_seconds` is
+    claimed by this process and delivered again in a background thread.
+
+    Args:
+        app (Flask): The application
+        stale_seconds (Optional[int]): Seconds without progress, defaults to BROADCAST_STALE_SECONDS
+
+    Returns:
+        List[int]: IDs of the resumed jobs
+    """
+    with app.app_context():
+        job_ids = BroadcastManager().claim_stale_jobs(
+            stale_seconds if stale_seconds is not None else get_broadcast_stale_seconds()
+        )
+    for job_id in job_ids:
+        logger.warning(f"Resuming broadcast job {job_id}, abandoned by its process")
+        metrics.inc('broadcast_jobs_resumed_total')
+        start_broadcast(app, job_id)
+    return job_ids
@@ -4,15 +4,18 @@ Utilities for encrypting and decrypting sensitive data.
 
 import os
 import base64
-from cryptography.fernet import Fernet
-from cryptography.hazmat.primitives import hashes
-from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
+
+# cryptography is imported inside the functions: every process imports the
+# User model, but only the ones that actually read CheckJC passwords need it.
 
 def get_encryption_key():
     """
     Get or generate the encryption key using environment variable.
     The key is derived using PBKDF2 from a master key.
     """
+    from cryptography.hazmat.primitives import hashes
+    from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
+
     # Get master key from environment
     master_key = os.getenv('ENCRYPTION_KEY')
     if not master_key:
@@ -42,6 +45,7 @@ def encrypt_string(text: str) -> str:
     if not text:
         return text
         
+    from cryptography.fernet import Fernet
     f = Fernet(get_encryption_key())
     encrypted_data = f.encrypt(text.encode())
     return encrypted_data.decode()
@@ -59,6 +63,7 @@ def decrypt_string(encrypted_text: str) -> str:
     if not encrypted_text:
         return encrypted_text
         
+    from cryptography.fernet import Fernet
     f = Fernet(get_encryption_key())
     decrypted_data = f.decrypt(encrypted_text.encode())
     return decrypted_data.decode() 
\ No newline at end of file
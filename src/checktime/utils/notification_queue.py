@@ -0,0 +1,350 @@
+"""
+Outbound Telegram notification queue for CheckTime.
+
+Callers on a latency-sensitive path (the scheduler's check loop) enqueue
+messages and return immediately; a background thread delivers them through
+the shared TelegramClient. The sender keeps under Telegram's rate limits (one
+message per second per chat, about thirty per second overall) and, when
+several messages for the same chat are waiting, sends them as one.
+
+If Telegram rejects the markup of a coalesced send (one unbalanced `_` or
+`*` rejects the whole text), its messages go back to the front of the chat's
+queue and are sent one by one. A single message with bad markup is sent again
+as plain text.
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Deque, Dict, List, NamedTuple, Optional
+
+from checktime.shared.config import (
+    get_notification_queue_max_size, get_notification_queue_overflow,
+    get_telegram_per_chat_interval, get_telegram_global_rate,
+)
+from checktime.shared.metrics import metrics
+from checktime.utils.telegram import TelegramClient, TelegramError, get_telegram_client
+
+# Create logger
+logger = logging.getLogger(__name__)
+
+# Telegram rejects longer texts, so coalesced messages stay under it
+MAX_MESSAGE_LENGTH = 4096
+
+# Separator between coalesced messages
+COALESCE_SEPARATOR = "\n\n"
+
+# Overflow policies
+DROP_OLDEST = 'drop_oldest'
+DROP_NEWEST = 'drop_newest'
+OVERFLOW_POLICIES = (DROP_OLDEST, DROP_NEWEST)
+
+class Notification(NamedTuple):
+    """A message waiting to be sent."""
+    text: str
+    parse_mode: str
+    enqueued_at: float
+    # Sent on its own: its coalesced send was rejected
+    solo: bool = False
+
+def is_markup_error(error: TelegramError) -> bool:
+    """Whether Telegram rejected a message because it could not parse its Markdown or HTML."""
+    return error.status_code == 400 and "parse" in str(error).lower()
+
+class NotificationQueue:
+    """Bounded queue of Telegram messages drained by a background sender."""
+
+    def __init__(self, client: Optional[TelegramClient] = None, max_size: Optional[int] = None,
+                 overflow: Optional[str] = None, per_chat_interval: Optional[float] = None,
+                 global_rate: Optional[float] = None):
+        """
+        Initialize the queue. The sender thread starts with the first message.
+
+        Args:
+            client (Optional[TelegramClient]): Client used to send, defaults to the shared one
+            max_size (Optional[int]): Messages kept waiting before the overflow policy applies
+            overflow (Optional[str]): 'drop_oldest' or 'drop_newest'
+            per_chat_interval (Optional[float]): Minimum seconds between two sends to one chat
+            global_rate (Optional[float]): Maximum sends per second over all chats
+        """
+        self.client = client
+        self.max_size = max_size if max_size is not None else get_notification_queue_max_size()
+        self.overflow = overflow or get_notification_queue_overflow()
+        if self.overflow not in OVERFLOW_POLICIES:
+            logger.warning(f"Unknown notification overflow policy '{self.overflow}', using {DROP_OLDEST}")
+            self.overflow = DROP_OLDEST
+        self.per_chat_interval = (per_chat_interval if per_chat_interval is not None
+                                  else get_telegram_per_chat_interval())
+        rate = global_rate if global_rate is not None else get_telegram_global_rate()
+        self.global_interval = 1.0 / rate if rate > 0 else 0.0
+
+        # chat_id -> waiting messages; chats are served round robin in this order
+        self._pending: "OrderedDict[str, Deque[Notification]]" = OrderedDict()
+        self._size = 0
+        # chat_id -> earliest time the next message to it may be sent
+        self._next_send: Dict[str, float] = {}
+        self._global_next_send = 0.0
+        self._sending = 0
+
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+
+        self._stats = {
+            'enqueued': 0,
+            'sent': 0,
+            'failed': 0,
+            'dropped': 0,
+            'coalesced': 0,
+            'split': 0,
+            'max_depth': 0,
+        }
+
+    def enqueue(self, message: str, chat_id: Optional[str] = None, parse_mode: str = "Markdown") -> bool:
+        """
+        Queue a message without waiting for it to be sent.
+
+        Args:
+            message (str): Message to send
+            chat_id (Optional[str]): Chat ID, or None for the client's default chat
+            parse_mode (str): Parse mode for the message (Markdown or HTML)
+
+        Returns:
+            bool: False if the message was dropped because the queue is full
+        """
+        key = str(chat_id) if chat_id else ''
+        with self._cond:
+            if self._size >= self.max_size:
+                if self.overflow == DROP_NEWEST or not self._pending:
+                    self._count_drop()
+                    return False
+                # Drop the oldest message of the chat at the head of the rotation
+                head, waiting = next(iter(self._pending.items()))
+                waiting.popleft()
+                self._size -= 1
+                if not waiting:
+                    del self._pending[head]
+                self._count_drop()
+
+            self._pending.setdefault(key, deque()).append(Notification(message, parse_mode, time.monotonic()))
+            self._size += 1
+            self._stats['enqueued'] += 1
+            self._stats['max_depth'] = max(self._stats['max_depth'], self._size)
+            self._start_locked()
+            self._cond.notify()
+        metrics.inc('notifications_total', outcome='enqueued')
+        return True
+
+    def _count_drop(self) -> None:
+        self._stats['dropped'] += 1
+        metrics.inc('notifications_total', outcome='dropped')
+        logger.warning(f"Notification queue full ({self.max_size}), dropped a message ({self.overflow})")
+
+    def _start_locked(self) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            self._stopping = False
+            self._thread = threading.Thread(target=self._run, name='notification-sender', daemon=True)
+            self._thread.start()
+
+    def _take_batch(self, chat_id: str) -> List[Notification]:
+        """Pop the messages of one chat that fit in a single send (same parse mode, length limit)."""
+        waiting = self._pending[chat_id]
+        batch = [waiting.popleft()]
+        length = len(batch[0].text)
+        while (waiting and not batch[0].solo and not waiting[0].solo
+               and waiting[0].parse_mode == batch[0].parse_mode):
+            length += len(COALESCE_SEPARATOR) + len(waiting[0].text)
+            if length > MAX_MESSAGE_LENGTH:
+                break
+            batch.append(waiting.popleft())
+        self._size -= len(batch)
+
+        # Round robin: the chat goes to the back of the rotation
+        if waiting:
+            self._pending.move_to_end(chat_id)
+        else:
+            del self._pending[chat_id]
+        return batch
+
+    def _next_ready(self):
+        """Return (chat_id, batch) for the first chat allowed to send now, or (None, seconds to wait)."""
+        now = time.monotonic()
+        wait = None
+        for chat_id in self._pending:
+            ready_at = max(self._next_send.get(chat_id, 0.0), self._global_next_send)
+            if ready_at <= now:
+                return chat_id, self._take_batch(chat_id)
+            wait = ready_at - now if wait is None else min(wait, ready_at - now)
+        return None, wait
+
+    def _run(self) -> None:
+        client = self.client or get_telegram_client()
+        while True:
+            with self._cond:
+                chat_id, batch = None, None
+                while True:
+                    if not self._pending:
+                        if self._stopping:
+                            return
+                        self._cond.wait()
+                        continue
+                    chat_id, result = self._next_ready()
+                    if chat_id is not None:
+                        batch = result
+                        break
+                    self._cond.wait(result)
+                self._sending = len(batch)
+
+                now = time.monotonic()
+                self._next_send[chat_id] = now + self.per_chat_interval
+                self._global_next_send = now + self.global_interval
+
+            ok = self._send(client, chat_id, batch)
+            if ok is None:
+                self._split(chat_id, batch)
+                continue
+
+            delay = time.monotonic() - batch[0].enqueued_at
+            metrics.observe('notification_delay_seconds', delay)
+            outcome = 'sent' if ok else 'failed'
+            metrics.inc('notifications_total', value=len(batch), outcome=outcome)
+            if len(batch) > 1:
+                metrics.inc('notifications_total', value=len(batch) - 1, outcome='coalesced')
+
+            with self._cond:
+                self._stats[outcome] += len(batch)
+                self._stats['coalesced'] += len(batch) - 1
+                self._sending = 0
+                # Forget rate limit state of chats that are idle again
+                if chat_id not in self._pending:
+                    self._prune_next_send_locked()
+                self._cond.notify_all()
+
+    def _send(self, client: TelegramClient, chat_id: str, batch: List[Notification]) -> Optional[bool]:
+        """
+        Send a batch as one message.
+
+        Returns:
+            Optional[bool]: Whether it was sent, or None if Telegram rejected the
+            markup of a coalesced batch and its messages must be sent one by one
+        """
+        text = COALESCE_SEPARATOR.join(notification.text for notification in batch)
+        parse_mode = batch[0].parse_mode
+        target_chat_id = chat_id or client.default_chat_id
+        if not client.token or not target_chat_id:
+            logger.warning("Telegram credentials not configured, queued notification not sent")
+            return False
+        try:
+            client.deliver_message(text, target_chat_id, parse_mode)
+            return True
+        except TelegramError as e:
+            if not (parse_mode and is_markup_error(e)):
+                logger.error(f"Error sending queued notification to chat {target_chat_id}: {e}")
+                return False
+            if len(batch) > 1:
+                return None
+            logger.warning(f"Telegram rejected the markup of a notification to chat {target_chat_id} ({e}), "
+                           f"sending it as plain text")
+        except Exception as e:
+            logger.error(f"Error sending queued notification to chat {target_chat_id}: {e}")
+            return False
+        try:
+            client.deliver_message(text, target_chat_id, None)
+            return True
+        except Exception as e:
+            logger.error(f"Error sending queued notification to chat {target_chat_id} as plain text: {e}")
+            return False
+
+    def _split(self, chat_id: str, batch: List[Notification]) -> None:
+        """Put the messages of a rejected coalesced send back at the front of their chat, to go one by one."""
+        logger.warning(f"Telegram rejected the markup of {len(batch)} coalesced notifications to chat "
+                       f"{chat_id or 'default'}, sending them one by one")
+        metrics.inc('notification_splits_total')
+        with self._cond:
+            waiting = self._pending.setdefault(chat_id, deque())
+            for notification in reversed(batch):
+                waiting.appendleft(notification._replace(solo=True))
+            self._size += len(batch)
+            self._stats['split'] += 1
+            self._sending = 0
+            self._cond.notify_all()
+
+    def _prune_next_send_locked(self) -> None:
+        now = time.monotonic()
+        for chat_id in [c for c, t in self._next_send.items() if t <= now and c not in self._pending]:
+            del self._next_send[chat_id]
+
+    def flush(self, timeout: float = 10.0) -> bool:
+        """
+        Wait until every queued message has been sent or has failed.
+
+        Args:
+            timeout (float): Maximum seconds to wait
+
+        Returns:
+            bool: True if the queue was drained in time
+        """
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while self._pending or self._sending:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def stop(self, timeout: float = 10.0) -> bool:
+        """
+        Send what is queued and stop the sender thread.
+
+        Args:
+            timeout (float): Maximum seconds to wait for the queue to drain
+
+        Returns:
+            bool: True if the queue was drained in time
+        """
+        drained = self.flush(timeout)
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        return drained
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get the delivery statistics of the queue.
+
+        Returns:
+            Dict[str, int]: Counters (enqueued, sent, failed, dropped, coalesced,
+            split, max_depth) plus the current depth and number of chats waiting
+        """
+        with self._cond:
+            stats = dict(self._stats)
+            stats['depth'] = self._size
+            stats['chats'] = len(self._pending)
+        return stats
+
+    def collect_metrics(self) -> None:
+        """Publish the current depth as gauges (a metrics collector)."""
+        with self._cond:
+            depth, chats = self._size, len(self._pending)
+        metrics.set('notification_queue_depth', depth)
+        metrics.set('notification_queue_chats', chats)
+
+_queue: Optional[NotificationQueue] = None
+_queue_lock = threading.Lock()
+
+def get_notification_queue() -> NotificationQueue:
+    """
+    Get the notification queue shared by this process.
+
+    Returns:
+        NotificationQueue: The queue, created on first use
+    """
+    global _queue
+    if _queue is None:
+        with _queue_lock:
+            if _queue is None:
+                _queue = NotificationQueue()
+                metrics.add_collector(_queue.collect_metrics)
+    return _queue
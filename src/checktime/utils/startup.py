@@ -0,0 +1,217 @@
+#!/usr/bin/env python
+"""
+Startup profiling tools for the CheckTime entry points.
+
+Usage:
+    # `python -X importtime` report for one entry point, slowest modules first
+    python -m checktime.utils.startup importtime scheduler --top 30
+
+    # Time-to-ready benchmark for every entry point, appended to a history file
+    python -m checktime.utils.startup bench --runs 5
+
+Every measurement runs in a fresh interpreter so module caches don't hide
+the real cold-start cost. "Ready" means the entry point module has been
+imported, which includes building its Flask app and the schema check.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from datetime import datetime
+from typing import Dict, List, Optional
+
+# Entry point name -> module that supervisord starts
+ENTRY_POINTS = {
+    'web': 'checktime.web.server',
+    'bot': 'checktime.bot.listener',
+    'scheduler': 'checktime.scheduler.service',
+}
+
+DEFAULT_HISTORY_FILE = '/var/log/checktime/startup_bench.jsonl'
+
+# Snippet run in the child interpreter: prints the import time in seconds
+_READY_SNIPPET = (
+    "import time; _t = time.perf_counter(); "
+    "import {module}; "
+    "print(time.perf_counter() - _t)"
+)
+
+def _child_env(skip_schema_check: bool) -> Dict[str, str]:
+    env = dict(os.environ)
+    if skip_schema_check:
+        env['SKIP_SCHEMA_CHECK'] = 'true'
+    return env
+
+def parse_importtime(stderr: str) -> List[Dict[str, object]]:
+    """
+    Parse the output of `python -X importtime`.
+
+    Args:
+        stderr (str): Raw stderr of the child interpreter
+
+    Returns:
+        List[Dict[str, object]]: One entry per module with self_us, cumulative_us and module
+    """
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        try:
+            _, data = line.split(':', 1)
+            self_us, cumulative_us, module = data.split('|', 2)
+            rows.append({
+                'self_us': int(self_us.strip()),
+                'cumulative_us': int(cumulative_us.strip()),
+                'module': module.rstrip(),
+            })
+        except ValueError:
+            continue
+    return rows
+
+def importtime_report(entry: str, top: int = 25, sort: str = 'cumulative',
+                      skip_schema_check: bool = False) -> List[Dict[str, object]]:
+    """
+    Import an entry point under `-X importtime` and return the slowest modules.
+
+    Args:
+        entry (str): Entry point name (web, bot, scheduler)
+        top (int): Number of rows to return
+        sort (str): 'cumulative' or 'self'
+        skip_schema_check (bool): Don't hit the database while importing
+
+    Returns:
+        List[Dict[str, object]]: The slowest modules
+    """
+    module = ENTRY_POINTS[entry]
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        capture_output=True, text=True, env=_child_env(skip_schema_check),
+    )
+    rows = parse_importtime(result.stderr)
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{result.stderr[-2000:]}")
+    key = 'self_us' if sort == 'self' else 'cumulative_us'
+    return sorted(rows, key=lambda r: r[key], reverse=True)[:top]
+
+def measure_ready(entry: str, runs: int = 5, skip_schema_check: bool = False) -> Dict[str, object]:
+    """
+    Measure time-to-ready for an entry point over several cold starts.
+
+    Args:
+        entry (str): Entry point name (web, bot, scheduler)
+        runs (int): Number of fresh interpreters to start
+        skip_schema_check (bool): Don't hit the database while importing
+
+    Returns:
+        Dict[str, object]: Median/min/max in milliseconds and the raw samples
+    """
+    module = ENTRY_POINTS[entry]
+    samples = []
+    for _ in range(runs):
+        result = subprocess.run(
+            [sys.executable, '-c', _READY_SNIPPET.format(module=module)],
+            capture_output=True, text=True, env=_child_env(skip_schema_check),
+        )
+        if result.returncode != 0:
+            raise RuntimeError(f"Importing {module} failed:\n{result.stderr[-2000:]}")
+        samples.append(float(result.stdout.strip().splitlines()[-1]) * 1000)
+    return {
+        'entry': entry,
+        'module': module,
+        'median_ms': round(statistics.median(samples), 1),
+        'min_ms': round(min(samples), 1),
+        'max_ms': round(max(samples), 1),
+        'samples_ms': [round(s, 1) for s in samples],
+    }
+
+def _last_results(history_file: str) -> Dict[str, Dict[str, object]]:
+    """Return the most recent recorded result per entry point."""
+    last = {}
+    if not os.path.exists(history_file):
+        return last
+    with open(history_file) as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            last[record.get('entry')] = record
+    return last
+
+def benchmark(entries: List[str], runs: int = 5, history_file: Optional[str] = DEFAULT_HISTORY_FILE,
+              skip_schema_check: bool = False) -> List[Dict[str, object]]:
+    """
+    Benchmark time-to-ready for the given entry points and record the results.
+
+    Args:
+        entries (List[str]): Entry point names
+        runs (int): Cold starts per entry point
+        history_file (Optional[str]): JSON lines file to append results to (None to skip)
+        skip_schema_check (bool): Don't hit the database while importing
+
+    Returns:
+        List[Dict[str, object]]: One result per entry point, with the previous
+        median (if any) under 'previous_median_ms'
+    """
+    previous = _last_results(history_file) if history_file else {}
+    results = []
+    for entry in entries:
+        result = measure_ready(entry, runs, skip_schema_check)
+        result['timestamp'] = datetime.now().isoformat(timespec='seconds')
+        if entry in previous:
+            result['previous_median_ms'] = previous[entry].get('median_ms')
+        results.append(result)
+
+    if history_file:
+        os.makedirs(os.path.dirname(history_file) or '.', exist_ok=True)
+        with open(history_file, 'a') as f:
+            for result in results:
+                record = {k: v for k, v in result.items() if k != 'previous_median_ms'}
+                f.write(json.dumps(record) + '\n')
+    return results
+
+def main(argv: Optional[List[str]] = None):
+    """Command line interface."""
+    parser = argparse.ArgumentParser(description="CheckTime startup profiling")
+    parser.add_argument('--skip-schema-check', action='store_true',
+                        help="don't connect to the database while importing")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    report = sub.add_parser('importtime', help="import-time report for one entry point")
+    report.add_argument('entry', choices=sorted(ENTRY_POINTS))
+    report.add_argument('--top', type=int, default=25)
+    report.add_argument('--sort', choices=['cumulative', 'self'], default='cumulative')
+
+    bench = sub.add_parser('bench', help="time-to-ready benchmark")
+    bench.add_argument('entries', nargs='*', metavar='entry',
+                       help=f"entry points to benchmark ({', '.join(ENTRY_POINTS)}); all by default")
+    bench.add_argument('--runs', type=int, default=5)
+    bench.add_argument('--history', default=DEFAULT_HISTORY_FILE,
+                       help="JSON lines file the results are appended to ('' to disable)")
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'importtime':
+        rows = importtime_report(args.entry, args.top, args.sort, args.skip_schema_check)
+        print(f"{'self [ms]':>10} {'cumul [ms]':>11}  module")
+        for row in rows:
+            print(f"{row['self_us'] / 1000:10.1f} {row['cumulative_us'] / 1000:11.1f}  {row['module']}")
+        return
+
+    entries = args.entries or list(ENTRY_POINTS)
+    unknown = [e for e in entries if e not in ENTRY_POINTS]
+    if unknown:
+        parser.error(f"unknown entry point(s): {', '.join(unknown)}")
+    results = benchmark(entries, args.runs, args.history or None, args.skip_schema_check)
+    for result in results:
+        line = (f"{result['entry']:<10} median {result['median_ms']:8.1f} ms "
+                f"(min {result['min_ms']:.1f}, max {result['max_ms']:.1f})")
+        if result.get('previous_median_ms') is not None:
+            line += f"  previous {result['previous_median_ms']:.1f} ms"
+        print(line)
+
+if __name__ == '__main__':
+    main()
@@ -4,13 +4,36 @@ Telegram integration for CheckTime application.
 
 import requests
 import logging
+import threading
+import time
 from typing import Optional, Dict, Any, List, Union
 
-from checktime.shared.config import get_telegram_token, get_telegram_chat_id
+from requests.adapters import HTTPAdapter
+
+from checktime.shared.config import (
+    get_telegram_token, get_telegram_chat_id, get_telegram_connect_timeout,
+    get_telegram_read_timeout, get_telegram_max_retries, get_telegram_max_retry_after,
+)
+from checktime.shared.metrics import LATENCY_BUCKETS, metrics
 
 # Create logger
 logger = logging.getLogger(__name__)
 
+# Connections kept open to api.telegram.org per process
+POOL_MAXSIZE = 10
+
+# Exponential backoff between retries of network errors and 5xx responses
+RETRY_BACKOFF = 0.5
+RETRY_BACKOFF_MAX = 8.0
+
+class TelegramError(Exception):
+    """A Telegram API call failed after its retries."""
+
+    def __init__(self, message: str, status_code: Optional[int] = None, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
 class TelegramClient:
     """Client for interacting with the Telegram API."""
     
@@ -25,6 +48,93 @@ class TelegramClient:
         self.token = token or get_telegram_token()
         self.default_chat_id = chat_id or get_telegram_chat_id()
         self.base_url = f"https://api.telegram.org/bot{self.token}"
+        self.connect_timeout = get_telegram_connect_timeout()
+        self.read_timeout = get_telegram_read_timeout()
+        self.max_retries = get_telegram_max_retries()
+        self.max_retry_after = get_telegram_max_retry_after()
+        
+        # Keep-alive connections reused by every call, instead of a new TCP+TLS handshake each time
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=POOL_MAXSIZE)
+        self.session.mount("https://", adapter)
+    
+    def _call(self, api_method: str, data: Optional[Dict[str, Any]] = None,
+              params: Optional[Dict[str, Any]] = None, read_timeout: Optional[float] = None,
+              max_retries: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Call a Telegram Bot API method, retrying transient failures.
+        
+        Network errors and 5xx responses are retried with exponential backoff.
+        A 429 is retried after the `retry_after` Telegram asks for, unless it
+        is longer than TELEGRAM_MAX_RETRY_AFTER. Other 4xx are not retried.
+        
+        Args:
+            api_method (str): Bot API method, e.g. 'sendMessage'
+            data (Optional[Dict[str, Any]]): Form data; the call is a POST if given, else a GET
+            params (Optional[Dict[str, Any]]): Query parameters
+            read_timeout (Optional[float]): Read timeout, defaults to TELEGRAM_READ_TIMEOUT
+            max_retries (Optional[int]): Retries, defaults to TELEGRAM_MAX_RETRIES
+            
+        Returns:
+            Dict[str, Any]: The decoded response
+            
+        Raises:
+            TelegramError: If the call still fails after its retries
+        """
+        url = f"{self.base_url}/{api_method}"
+        timeout = (self.connect_timeout, read_timeout or self.read_timeout)
+        retries = self.max_retries if max_retries is None else max_retries
+        
+        attempt = 0
+        while True:
+            start = time.perf_counter()
+            error = None
+            try:
+                if data is not None:
+                    response = self.session.post(url, data=data, params=params, timeout=timeout)
+                else:
+                    response = self.session.get(url, params=params, timeout=timeout)
+            except requests.RequestException as e:
+                outcome = 'network_error'
+                error = TelegramError(f"{type(e).__name__}: {e}")
+                wait = min(RETRY_BACKOFF * 2 ** attempt, RETRY_BACKOFF_MAX)
+            else:
+                if response.status_code == 200:
+                    outcome = 'ok'
+                else:
+                    try:
+                        body = response.json()
+                    except ValueError:
+                        body = {}
+                    description = body.get('description') or response.reason
+                    retry_after = (body.get('parameters') or {}).get('retry_after')
+                    error = TelegramError(f"{response.status_code} {description}",
+                                          response.status_code, retry_after)
+                    if response.status_code == 429:
+                        outcome = 'rate_limited'
+                        wait = float(retry_after or 1)
+                        if wait > self.max_retry_after:
+                            retries = attempt
+                    elif response.status_code >= 500:
+                        outcome = 'server_error'
+                        wait = min(RETRY_BACKOFF * 2 ** attempt, RETRY_BACKOFF_MAX)
+                    else:
+                        outcome = 'client_error'
+                        retries = attempt
+            
+            metrics.observe_histogram('telegram_request_seconds', time.perf_counter() - start,
+                                      LATENCY_BUCKETS, method=api_method)
+            metrics.inc('telegram_requests_total', method=api_method, outcome=outcome)
+            
+            if error is None:
+                return response.json()
+            if attempt >= retries:
+                raise error
+            
+            attempt += 1
+            metrics.inc('telegram_retries_total', method=api_method, reason=outcome)
+            logger.warning(f"Telegram {api_method} failed ({error}), retry {attempt}/{retries} in {wait:.1f}s")
+            time.sleep(wait)
     
     def send_message(self, message: str, chat_id: Optional[str] = None, parse_mode: str = "Markdown") -> bool:
         """
@@ -44,17 +154,9 @@ class TelegramClient:
         if not self.token or not target_chat_id:
             logger.warning("Telegram credentials not configured, message not sent")
             return False
-            
-        url = f"{self.base_url}/sendMessage"
-        data = {
-            "chat_id": target_chat_id,
-            "text": message,
-            "parse_mode": parse_mode
-        }
         
         try:
-            response = requests.post(url, data=data)
-            response.raise_for_status()
+            self.deliver_message(message, target_chat_id, parse_mode)
             logger.info(f"Message sent to Telegram chat {target_chat_id}: {message[:50]}...")
             return True
         except Exception as e:
@@ -62,6 +164,28 @@ class TelegramClient:
             logger.error(error_msg)
             return False
             
+    def deliver_message(self, message: str, chat_id: str, parse_mode: str = "Markdown") -> Dict[str, Any]:
+        """
+        Send a message to a chat, raising on failure.
+        
+        Args:
+            message (str): Message to send
+            chat_id (str): Chat ID where message will be sent
+            parse_mode (str): Parse mode for the message (Markdown or HTML)
+            
+        Returns:
+            Dict[str, Any]: Response from the Telegram API
+            
+        Raises:
+            TelegramError: If the message could not be sent
+        """
+        data = {
+            "chat_id": chat_id,
+            "text": message,
+            "parse_mode": parse_mode
+        }
+        return self._call("sendMessage", data=data)
+    
     def send_message_to_users(self, message: str, users: List[Dict], parse_mode: str = "Markdown") -> Dict[str, bool]:
         """
         Send a message to multiple users.
@@ -110,13 +234,17 @@ class TelegramClient:
         # Otherwise, send to default chat ID
         return self.send_message(message, parse_mode=parse_mode)
     
-    def get_updates(self, offset: Optional[int] = None, timeout: int = 100) -> Dict[str, Any]:
+    def get_updates(self, offset: Optional[int] = None, timeout: int = 100,
+                    limit: int = 100) -> Dict[str, Any]:
         """
         Get updates from the bot.
         
+        Only messages are requested; the bot ignores every other update type.
+        
         Args:
-            offset (Optional[int]): ID of the last update received
+            offset (Optional[int]): ID of the first update to return
             timeout (int): Maximum wait time for the response
+            limit (int): Maximum number of updates to return (1-100)
         
         Returns:
             Dict[str, Any]: Response from the Telegram API
@@ -125,16 +253,84 @@ class TelegramClient:
             logger.warning("Telegram token not configured, cannot get updates")
             return {"result": []}
             
-        url = f"{self.base_url}/getUpdates"
-        params = {"timeout": timeout}
+        params = {"timeout": timeout, "limit": limit, "allowed_updates": '["message"]'}
         if offset is not None:
             params["offset"] = offset
         
         try:
-            response = requests.get(url, params=params, timeout=timeout + 20)
-            response.raise_for_status()
-            return response.json()
+            # The listener loop polls again right away, so a failed poll is not retried here
+            return self._call("getUpdates", params=params, read_timeout=timeout + 20, max_retries=0)
         except Exception as e:
             error_msg = f"Error getting updates from Telegram: {e}"
             logger.error(error_msg)
-            return {"result": []} 
\ No newline at end of file
+            return {"ok": False, "result": []}
+    
+    def set_webhook(self, url: str, secret_token: str, max_connections: int = 40) -> bool:
+        """
+        Make Telegram POST updates to a URL instead of queuing them for getUpdates.
+        
+        Args:
+            url (str): Public HTTPS URL of the webhook
+            secret_token (str): Sent back in the X-Telegram-Bot-Api-Secret-Token header
+            max_connections (int): Maximum concurrent webhook requests
+            
+        Returns:
+            bool: True if the webhook was set, False otherwise
+        """
+        data = {
+            "url": url,
+            "secret_token": secret_token,
+            "max_connections": max_connections,
+            "allowed_updates": '["message"]',
+        }
+        try:
+            self._call("setWebhook", data=data)
+            logger.info(f"Telegram webhook set to {url}")
+            return True
+        except Exception as e:
+            logger.error(f"Error setting Telegram webhook: {e}")
+            return False
+    
+    def delete_webhook(self) -> bool:
+        """
+        Remove the webhook so updates can be fetched with getUpdates again.
+        
+        Returns:
+            bool: True if the webhook was removed (or there was none), False otherwise
+        """
+        try:
+            self._call("deleteWebhook", data={})
+            return True
+        except Exception as e:
+            logger.error(f"Error deleting Telegram webhook: {e}")
+            return False
+    
+    def get_webhook_info(self) -> Dict[str, Any]:
+        """
+        Get the current webhook status.
+        
+        Returns:
+            Dict[str, Any]: The webhook info, or an empty dict on error
+        """
+        try:
+            return self._call("getWebhookInfo").get("result", {})
+        except Exception as e:
+            logger.error(f"Error getting Telegram webhook info: {e}")
+            return {}
+
+_client: Optional[TelegramClient] = None
+_client_lock = threading.Lock()
+
+def get_telegram_client() -> TelegramClient:
+    """
+    Get the Telegram client shared by this process.
+    
+    Returns:
+        TelegramClient: The client, created on first use
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = TelegramClient()
+    return _client
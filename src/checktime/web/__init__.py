@@ -2,16 +2,24 @@ import os
 from flask import Flask, request, session, redirect, url_for, g, render_template
 from flask_login import LoginManager, current_user
 
-from checktime.shared.db import db, init_db
-from checktime.shared.config import get_secret_key, get_database_url
+from checktime.shared.db import db, init_db, check_schema_version
+from checktime.shared.config import get_secret_key, get_database_url, get_skip_schema_check
 from checktime.shared.models.user import User
 from checktime.shared.services.user_manager import UserManager
-from checktime.web.translations import t
 
 login_manager = LoginManager()
 
-def create_app(test_config=None):
-    """Create and configure the Flask application."""
+def create_app(test_config=None, with_views=True):
+    """
+    Create and configure the Flask application.
+    
+    Args:
+        test_config: Optional config overrides
+        with_views: Register blueprints, login handling and translations.
+            The bot and the scheduler only need the app for its database
+            context and pass False, so they never import the route modules
+            (flask_wtf, wtforms, translations...) at startup.
+    """
     app = Flask(
         __name__,
         instance_relative_config=True,
@@ -27,6 +35,7 @@ def create_app(test_config=None):
         # Babel configuration
         LANGUAGES = ['en', 'es'],
         BABEL_DEFAULT_LOCALE = 'en',
+        SKIP_SCHEMA_CHECK=get_skip_schema_check(),
     )
     
     # Override with test config if passed
@@ -35,11 +44,18 @@ def create_app(test_config=None):
     
     # Initialize extensions
     init_db(app)
-    login_manager.init_app(app)
     
-    # Create database tables
-    with app.app_context():
-        db.create_all()
+    # Tables are created by `python -m checktime.shared.migrate` once per
+    # deploy; here we only fail fast if that step was not run.
+    if not app.config['SKIP_SCHEMA_CHECK']:
+        check_schema_version(app)
+    
+    if not with_views:
+        return app
+    
+    from checktime.web.translations import get_translator, BUNDLE_HASHES
+    
+    login_manager.init_app(app)
     
     # Register blueprints
     from checktime.web.routes.auth import auth_bp
@@ -49,6 +65,7 @@ def create_app(test_config=None):
     from checktime.web.routes.overrides import bp as overrides_bp
     from checktime.web.routes.translations import translations_bp
     from checktime.web.routes.admin import admin_bp
+    from checktime.web.routes.telegram import telegram_bp
 
     app.register_blueprint(auth_bp)
     app.register_blueprint(dashboard_bp)
@@ -57,6 +74,15 @@ def create_app(test_config=None):
     app.register_blueprint(overrides_bp)
     app.register_blueprint(translations_bp)
     app.register_blueprint(admin_bp)
+    app.register_blueprint(telegram_bp)
+    
+    # Fingerprinted static assets (asset_url template global and /assets route)
+    from checktime.web import assets
+    assets.init_app(app)
+    
+    # Request latency and the /metrics endpoint
+    from checktime.web import monitoring
+    monitoring.init_app(app)
     
     @login_manager.user_loader
     def load_user(user_id):
@@ -96,19 +122,18 @@ def create_app(test_config=None):
     # Add template context processor for translations
     @app.context_processor
     def inject_translations():
-        def translate(key, default=None):
-            # Use the language from the flask g object (set in before_request)
-            translation = t(key, g.language)
-            # If translation is the same as key and a default is provided, use default
-            if translation == key and default is not None:
-                return default
-            return translation
+        # Use the language from the flask g object (set in before_request)
+        language = g.get('language', app.config['BABEL_DEFAULT_LOCALE'])
+        if language not in BUNDLE_HASHES:
+            language = app.config['BABEL_DEFAULT_LOCALE']
         
         # Make translate function and languages available in all templates
         return dict(
-            _=translate,  # shortcut function for translation
+            _=get_translator(language),  # shortcut function for translation
             languages=app.config['LANGUAGES'],
-            current_language=g.get('language', app.config['BABEL_DEFAULT_LOCALE'])
+            current_language=g.get('language', app.config['BABEL_DEFAULT_LOCALE']),
+            translation_bundle_url=url_for('translations.get_translation_bundle',
+                                           lang=language, bundle_hash=BUNDLE_HASHES[language])
         )
             
     return app 
\ No newline at end of file
@@ -0,0 +1,267 @@
+#!/usr/bin/env python
+"""
+Static asset pipeline for the CheckTime web interface.
+
+Usage:
+    # Minify, fingerprint and precompress web/static/js and web/static/css
+    python -m checktime.web.assets build
+
+The build writes `web/dist/`: one `<name>.<hash>.<ext>` file per asset,
+its `.gz` (and `.br` when the brotli package is installed) variants and a
+`manifest.json` mapping the source names to the hashed ones. At runtime
+`asset_url('js/dashboard.js')` resolves through the manifest to
+`/assets/js/dashboard.<hash>.js`, served with immutable cache headers and
+the best precompressed variant the client accepts. Without a manifest (a
+development checkout) it falls back to the plain static URL.
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import logging
+import mimetypes
+import os
+import re
+import shutil
+import sys
+from importlib.util import find_spec
+from typing import Dict, Optional
+
+from flask import Flask, abort, request, send_file, url_for
+
+# Optional dependencies: better minifiers and brotli variants
+HAS_RJSMIN = find_spec('rjsmin') is not None
+HAS_RCSSMIN = find_spec('rcssmin') is not None
+HAS_BROTLI = find_spec('brotli') is not None
+
+# Create logger
+logger = logging.getLogger(__name__)
+
+WEB_DIR = os.path.dirname(os.path.abspath(__file__))
+STATIC_DIR = os.path.join(WEB_DIR, 'static')
+DIST_DIR = os.path.join(WEB_DIR, 'dist')
+MANIFEST_FILE = 'manifest.json'
+
+# Static subdirectories processed by the build, with their minifiers
+ASSET_DIRS = ('js', 'css')
+
+# Hashed names never change content, so clients may keep them for a year
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+# Content-Encoding -> file suffix, in order of preference
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+def minify_js(source: str) -> str:
+    """
+    Minify JavaScript.
+
+    Uses rjsmin when installed. The fallback only drops comment lines, blank
+    lines and indentation, and keeps the line breaks so automatic semicolon
+    insertion behaves exactly as in the source.
+
+    Args:
+        source (str): JavaScript source
+
+    Returns:
+        str: Minified source
+    """
+    if HAS_RJSMIN:
+        import rjsmin
+        return rjsmin.jsmin(source)
+
+    lines = []
+    in_comment = False
+    for line in source.splitlines():
+        stripped = line.strip()
+        if in_comment:
+            in_comment = '*/' not in stripped
+            continue
+        if stripped.startswith('/*'):
+            if '*/' not in stripped:
+                in_comment = True
+                continue
+            if stripped.endswith('*/'):
+                continue
+        if not stripped or stripped.startswith('//'):
+            continue
+        lines.append(stripped)
+    return '\n'.join(lines) + '\n'
+
+def minify_css(source: str) -> str:
+    """
+    Minify CSS.
+
+    Uses rcssmin when installed, else removes comments and collapses
+    whitespace around braces, semicolons and commas.
+
+    Args:
+        source (str): CSS source
+
+    Returns:
+        str: Minified source
+    """
+    if HAS_RCSSMIN:
+        import rcssmin
+        return rcssmin.cssmin(source)
+
+    source = re.sub(r'/\*.*?\*/', '', source, flags=re.S)
+    source = re.sub(r'\s+', ' ', source)
+    source = re.sub(r'\s*([{};,])\s*', r'\1', source)
+    return source.replace(';}', '}').strip() + '\n'
+
+MINIFIERS = {'.js': minify_js, '.css': minify_css}
+
+def hashed_name(name: str, content: bytes) -> str:
+    """
+    Insert the content hash of a file into its name.
+
+    Args:
+        name (str): Relative name, e.g. 'js/dashboard.js'
+        content (bytes): File content
+
+    Returns:
+        str: The fingerprinted name, e.g. 'js/dashboard.3f2a9c1b7d04.js'
+    """
+    root, ext = os.path.splitext(name)
+    return f"{root}.{hashlib.sha256(content).hexdigest()[:12]}{ext}"
+
+def _write(path: str, content: bytes) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(content)
+
+def build(static_dir: str = STATIC_DIR, dist_dir: str = DIST_DIR) -> Dict[str, str]:
+    """
+    Build the fingerprinted, precompressed assets and their manifest.
+
+    The output directory is recreated from scratch.
+
+    Args:
+        static_dir (str): Directory with the source assets
+        dist_dir (str): Output directory
+
+    Returns:
+        Dict[str, str]: The manifest, source name -> hashed name
+    """
+    if os.path.isdir(dist_dir):
+        shutil.rmtree(dist_dir)
+
+    manifest = {}
+    for subdir in ASSET_DIRS:
+        source_dir = os.path.join(static_dir, subdir)
+        if not os.path.isdir(source_dir):
+            continue
+        for filename in sorted(os.listdir(source_dir)):
+            minifier = MINIFIERS.get(os.path.splitext(filename)[1])
+            if minifier is None:
+                continue
+            name = f"{subdir}/{filename}"
+            with open(os.path.join(source_dir, filename), encoding='utf-8') as f:
+                content = minifier(f.read()).encode('utf-8')
+
+            target = hashed_name(name, content)
+            path = os.path.join(dist_dir, target)
+            _write(path, content)
+            # mtime=0 keeps the gzip output identical across builds
+            _write(path + '.gz', gzip.compress(content, compresslevel=9, mtime=0))
+            if HAS_BROTLI:
+                import brotli
+                _write(path + '.br', brotli.compress(content))
+            manifest[name] = target
+
+    _write(os.path.join(dist_dir, MANIFEST_FILE),
+           json.dumps(manifest, indent=2, sort_keys=True).encode('utf-8'))
+    return manifest
+
+def load_manifest(dist_dir: str = DIST_DIR) -> Dict[str, str]:
+    """
+    Load the asset manifest.
+
+    Args:
+        dist_dir (str): Build output directory
+
+    Returns:
+        Dict[str, str]: The manifest, or an empty dict if the assets were not built
+    """
+    try:
+        with open(os.path.join(dist_dir, MANIFEST_FILE), encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+    except Exception as e:
+        logger.error(f"Error loading asset manifest: {e}")
+        return {}
+
+def _accepted_encoding(path: str) -> Optional[str]:
+    """Return the preferred encoding the client accepts and that was built for a file."""
+    for encoding, suffix in ENCODINGS:
+        if encoding in request.accept_encodings and os.path.isfile(path + suffix):
+            return encoding
+    return None
+
+def init_app(app: Flask, dist_dir: str = DIST_DIR) -> None:
+    """
+    Register the asset route and the `asset_url` template global.
+
+    Args:
+        app (Flask): The application
+        dist_dir (str): Build output directory
+    """
+    manifest = load_manifest(dist_dir)
+    if manifest:
+        logger.info(f"Loaded asset manifest with {len(manifest)} entries")
+    hashed_names = set(manifest.values())
+
+    def asset_url(filename: str) -> str:
+        """URL of a static asset: its fingerprinted build if there is one, else the plain file."""
+        target = manifest.get(filename)
+        if target is None:
+            return url_for('static', filename=filename)
+        return url_for('assets', filename=target)
+
+    @app.route('/assets/<path:filename>', endpoint='assets')
+    def serve_asset(filename):
+        # Only names from the manifest, so nothing else under dist is reachable
+        if filename not in hashed_names:
+            abort(404)
+
+        path = os.path.join(dist_dir, filename)
+        encoding = _accepted_encoding(path)
+        suffix = dict(ENCODINGS)[encoding] if encoding else ''
+        mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+
+        response = send_file(path + suffix, mimetype=mimetype, conditional=True, etag=True)
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+        response.vary.add('Accept-Encoding')
+        response.headers['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+        return response
+
+    app.add_template_global(asset_url)
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="CheckTime static asset pipeline")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p_build = sub.add_parser('build', help="Minify, fingerprint and precompress the static assets")
+    p_build.add_argument('--static-dir', default=STATIC_DIR, help="Source directory")
+    p_build.add_argument('--dist-dir', default=DIST_DIR, help="Output directory")
+
+    args = parser.parse_args(argv)
+
+    manifest = build(args.static_dir, args.dist_dir)
+    for name, target in sorted(manifest.items()):
+        source_size = os.path.getsize(os.path.join(args.static_dir, name))
+        built = os.path.join(args.dist_dir, target)
+        sizes = [f"{os.path.getsize(built)} min"]
+        for encoding, suffix in ENCODINGS:
+            if os.path.isfile(built + suffix):
+                sizes.append(f"{os.path.getsize(built + suffix)} {encoding}")
+        print(f"{name:30} -> {target:40} {source_size} src, {', '.join(sizes)}")
+    if not HAS_BROTLI:
+        print("brotli is not installed; only gzip variants were built")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
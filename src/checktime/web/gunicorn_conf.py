@@ -0,0 +1,25 @@
+"""
+Gunicorn settings for the web app (gunicorn -c python:checktime.web.gunicorn_conf).
+
+The workers share their metrics through files in METRICS_DIR so that
+/metrics covers all of them (see checktime.shared.metrics_exporter). The
+files of a previous run are removed when the master starts, and each worker
+writes its file a last time when it exits so its final counts are kept.
+"""
+
+import os
+
+from checktime.shared.metrics_exporter import MultiProcessStore
+
+# Inherited by the workers, which create the app after the fork
+os.environ.setdefault('METRICS_DIR', '/tmp/checktime-metrics')
+
+def on_starting(server):
+    MultiProcessStore(os.environ['METRICS_DIR']).clear()
+
+def worker_exit(server, worker):
+    # Runs in the worker; between requests its file can be up to WRITE_INTERVAL_SECONDS old
+    try:
+        MultiProcessStore(os.environ['METRICS_DIR']).write(force=True)
+    except OSError as e:
+        server.log.error(f"Error writing metrics to {os.environ['METRICS_DIR']}: {e}")
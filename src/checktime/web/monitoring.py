@@ -0,0 +1,73 @@
+"""
+Request metrics, profiling and the /metrics endpoint of the web app.
+
+Every request's latency is observed per endpoint. Under gunicorn each worker
+shares its metrics through METRICS_DIR (set by checktime.web.gunicorn_conf),
+so a scrape sees the whole web process group whichever worker answers it.
+While profiling is on (see checktime.shared.profiler), a sample of the
+requests to PROFILE_ENDPOINTS is profiled.
+"""
+
+import logging
+import time
+from typing import List
+
+from flask import Flask, Response, abort, g, request
+
+from checktime.shared.config import get_metrics_dir, get_profile_endpoints
+from checktime.shared.metrics import LATENCY_BUCKETS, metrics
+from checktime.shared.metrics_exporter import CONTENT_TYPE, MultiProcessStore, is_authorized, render
+from checktime.shared.profiler import get_profiler
+
+logger = logging.getLogger(__name__)
+
+def is_profiled_endpoint(endpoint: str, selected: List[str]) -> bool:
+    """Whether an endpoint is one of the selected endpoints, or in one of the selected blueprints."""
+    if not selected:
+        return True
+    return any(endpoint == name or endpoint.startswith(f'{name}.') for name in selected)
+
+def init_app(app: Flask) -> None:
+    """
+    Time and sample requests for profiling, and register the /metrics route.
+
+    Args:
+        app (Flask): The application
+    """
+    directory = get_metrics_dir()
+    store = MultiProcessStore(directory) if directory else None
+    profiler = get_profiler()
+    profiled_endpoints = get_profile_endpoints()
+
+    @app.before_request
+    def start_timer():
+        g.request_started = time.perf_counter()
+        endpoint = request.endpoint
+        if endpoint and profiler.sampled() and is_profiled_endpoint(endpoint, profiled_endpoints):
+            g.profile_run = profiler.start('request', endpoint)
+
+    @app.teardown_request
+    def finish_profile(exc):
+        profiler.finish(g.pop('profile_run', None))
+
+    @app.after_request
+    def observe_request(response):
+        started = g.pop('request_started', None)
+        if started is not None:
+            metrics.observe_histogram(
+                'http_request_duration_seconds', time.perf_counter() - started, LATENCY_BUCKETS,
+                endpoint=request.endpoint or 'unmatched', method=request.method, status=response.status_code,
+            )
+        if store is not None:
+            try:
+                store.write()
+            except OSError as e:
+                logger.error(f"Error writing metrics to {directory}: {e}")
+        return response
+
+    @app.route('/metrics')
+    def prometheus_metrics():
+        if not is_authorized(request.headers.get('Authorization'), request.remote_addr):
+            abort(403)
+        snapshot = store.collect() if store is not None else metrics.snapshot()
+        return Response(render(snapshot), content_type=CONTENT_TYPE)
@@ -1,24 +1,32 @@
 """
 Admin-only routes.
 
-For now only the Telegram broadcast lives here. Other admin features
-can be added under the same blueprint.
+The Telegram broadcast, the state of the scheduler's CheckJC circuit
+breakers and recent checks, and the profiler.
 """
 
 import logging
 from functools import wraps
 
-from flask import Blueprint, flash, redirect, render_template, request, url_for
+from flask import Blueprint, abort, current_app, flash, redirect, render_template, request, send_file, url_for
 from flask_login import current_user, login_required
 
+from checktime.shared.config import get_profiling_enabled
+from checktime.shared.profiler import get_profiler
+from checktime.shared.services.broadcast_manager import BroadcastManager
+from checktime.shared.services.check_event_manager import CheckEventManager
+from checktime.shared.services.circuit_breaker_manager import CircuitBreakerManager
 from checktime.shared.services.user_manager import UserManager
-from checktime.utils.telegram import TelegramClient
+from checktime.utils.broadcast import start_broadcast
 
 
 logger = logging.getLogger(__name__)
 
 admin_bp = Blueprint("admin", __name__, url_prefix="/admin")
 
+# Days of check history summarized on the CheckJC status page
+STATS_DAYS = 7
+
 
 def admin_required(view):
     """Decorator that lets only authenticated admins reach the view.
@@ -47,6 +55,7 @@ def broadcast():
             "admin/broadcast.html",
             recipient_count=len(recipients),
             recipients=recipients,
+            recent_jobs=BroadcastManager().get_recent_jobs(),
         )
 
     message = (request.form.get("message") or "").strip()
@@ -54,30 +63,85 @@ def broadcast():
         flash("El mensaje no puede estar vacío.", "warning")
         return redirect(url_for("admin.broadcast"))
 
-    telegram = TelegramClient()
-    sent = []
-    failed = []
-    for user in recipients:
-        if not getattr(user, "telegram_chat_id", None):
-            continue
-        ok = telegram.send_message(
-            f"📢 *Aviso del administrador*\n\n{message}",
-            chat_id=user.telegram_chat_id,
-            parse_mode="Markdown",
-        )
-        (sent if ok else failed).append(user.username)
+    job = BroadcastManager().create_broadcast(
+        f"📢 *Aviso del administrador*\n\n{message}",
+        created_by=current_user.id,
+        recipients=recipients,
+    )
+    if job is None:
+        flash("No se pudo crear la comunicación.", "danger")
+        return redirect(url_for("admin.broadcast"))
 
     logger.info(
-        "Broadcast issued by %s: %d sent, %d failed",
-        current_user.username, len(sent), len(failed),
+        "Broadcast %d issued by %s for %d recipients",
+        job.id, current_user.username, job.total,
+    )
+    # Delivery runs in the background; the status page follows its progress
+    start_broadcast(current_app._get_current_object(), job.id)
+    return redirect(url_for("admin.broadcast_status", job_id=job.id))
+
+
+@admin_bp.route("/broadcast/<int:job_id>")
+@login_required
+@admin_required
+def broadcast_status(job_id):
+    job = BroadcastManager().get_job(job_id)
+    if job is None:
+        flash("Comunicación no encontrada.", "warning")
+        return redirect(url_for("admin.broadcast"))
+    return render_template("admin/broadcast_status.html", job=job)
+
+
+@admin_bp.route("/checkjc")
+@login_required
+@admin_required
+def checkjc_status():
+    # Written by the scheduler on every breaker transition and check attempt
+    return render_template(
+        "admin/checkjc_status.html",
+        breakers=CircuitBreakerManager().get_all_breakers(),
+        result_counts=CheckEventManager().get_result_counts(days=STATS_DAYS),
+        phase_percentiles=CheckEventManager().get_phase_percentiles(days=STATS_DAYS),
+        stats_days=STATS_DAYS,
+    )
+
+
+@admin_bp.route("/profiles")
+@login_required
+@admin_required
+def profiles():
+    profiler = get_profiler()
+    return render_template(
+        "admin/profiles.html",
+        profiles=profiler.list_profiles(),
+        enabled=profiler.is_enabled(),
+        enabled_by_env=get_profiling_enabled(),
+        keep=profiler.keep,
+        directory=profiler.directory,
     )
 
-    if failed:
-        flash(
-            f"Enviado a {len(sent)} usuarios. Falló para: {', '.join(failed)}.",
-            "warning",
-        )
-    else:
-        flash(f"Enviado a {len(sent)} usuarios.", "success")
 
-    return redirect(url_for("admin.broadcast"))
+@admin_bp.route("/profiles/toggle", methods=["POST"])
+@login_required
+@admin_required
+def toggle_profiling():
+    enabled = request.form.get("enabled") == "1"
+    try:
+        get_profiler().set_enabled(enabled)
+    except OSError as e:
+        logger.error(f"Error toggling profiling: {e}")
+        flash("No se pudo cambiar el estado del profiler.", "danger")
+        return redirect(url_for("admin.profiles"))
+    logger.info("Profiling turned %s by %s", "on" if enabled else "off", current_user.username)
+    return redirect(url_for("admin.profiles"))
+
+
+@admin_bp.route("/profiles/<filename>")
+@login_required
+@admin_required
+def download_profile(filename):
+    # Only names of kept profiles, so nothing else in the directory is reachable
+    path = get_profiler().path_of(filename)
+    if path is None:
+        abort(404)
+    return send_file(path, mimetype="application/octet-stream", as_attachment=True, download_name=filename)
@@ -47,6 +47,11 @@ class RegistrationForm(FlaskForm):
         if user is not None:
             lang = get_language()
             raise ValidationError(get_translation('email_taken', lang))
+    
+    def validate_telegram_chat_id(self, telegram_chat_id):
+        if telegram_chat_id.data and UserManager().is_chat_id_taken(telegram_chat_id.data):
+            lang = get_language()
+            raise ValidationError(get_translation('telegram_chat_id_taken', lang))
 
 class ProfileForm(FlaskForm):
     username = StringField('Username', validators=[DataRequired()])
@@ -88,6 +93,11 @@ class TelegramSettingsForm(FlaskForm):
     telegram_chat_id = StringField('Telegram Chat ID', validators=[Optional()])
     telegram_notifications_enabled = BooleanField('Enable Telegram Notifications', default=True)
     submit = SubmitField('Save Telegram Settings')
+    
+    def validate_telegram_chat_id(self, telegram_chat_id):
+        if telegram_chat_id.data and UserManager().is_chat_id_taken(telegram_chat_id.data, current_user.id):
+            lang = get_language()
+            raise ValidationError(get_translation('telegram_chat_id_taken', lang))
 
 @auth_bp.route('/login', methods=['GET', 'POST'])
 def login():
@@ -202,6 +212,10 @@ def profile():
     
     # Handle Telegram form submission
     if telegram_form.is_submitted() and 'telegram_submit' in request.form:
+        if not telegram_form.validate():
+            for error in telegram_form.telegram_chat_id.errors:
+                flash(error, 'danger')
+            return redirect(url_for('auth.profile') + '#telegram-config')
         user_manager.set_telegram_settings(
             user_id=current_user.id,
             chat_id=telegram_form.telegram_chat_id.data,
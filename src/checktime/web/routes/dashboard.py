@@ -1,13 +1,15 @@
 from datetime import datetime, date, timedelta
-import calendar
-from flask import Blueprint, render_template, g, url_for
+from flask import Blueprint, render_template, g, url_for, request, jsonify
 from flask_login import login_required, current_user
 
 from checktime.shared.services.schedule_manager import ScheduleManager
 from checktime.shared.services.holiday_manager import HolidayManager
-from checktime.shared.services.day_override_manager import DayOverrideManager
+from checktime.shared.services.year_calendar import count_days
+from checktime.shared.data_version import get_data_version
 from checktime.web.translations import get_translation
-from checktime.web.utils.calendar_utils import generate_calendar_data
+from checktime.web.utils.calendar_utils import generate_calendar_data, get_calendar_range, MAX_CALENDAR_RANGE_DAYS
+from checktime.web.utils.fragment_cache import fragment_cache
+from checktime.web.utils.http_cache import conditional_response
 
 dashboard_bp = Blueprint('dashboard', __name__, url_prefix='/dashboard')
 
@@ -51,13 +53,9 @@ def index(year=None, month=None):
         next_month = month + 1
         next_year = year
     
-    # Get the last day of the month
-    last_day_of_month = date(year, month, calendar.monthrange(year, month)[1])
-    
     # Initialize managers
     schedule_manager = ScheduleManager(current_user.id)
     holiday_manager = HolidayManager(current_user.id)
-    override_manager = DayOverrideManager(current_user.id)
     
     # Get upcoming holidays (next 30 days)
     future_date = today + timedelta(days=30)
@@ -78,38 +76,13 @@ def index(year=None, month=None):
     if current_schedule:
         day_schedules = schedule_manager.get_all_day_schedules(current_schedule.id)
     
-    # Count working days this week
+    # Count working days this week: overrides plus scheduled days that aren't holidays
     days_this_week = 0
-    
-    # If we have a current schedule, count days based on schedule
     if current_schedule and day_schedules:
-        # Create a set of days of the week that are working days
-        working_weekdays = {day_schedule.day_of_week for day_schedule in day_schedules}
-        
-        # Get holidays for the current week
-        week_holidays = holiday_manager.get_holidays_for_date_range(start_of_week, end_of_week)
-        holiday_dates = {h.date for h in week_holidays}
-        
-        # Get overrides for the current week
-        week_overrides = override_manager.get_overrides_in_range(start_of_week, end_of_week)
-        override_dates = {o.date for o in week_overrides}
-        
-        # Count days
-        current_day = start_of_week
-        while current_day <= end_of_week:
-            # If there's an override for this day, it's a working day
-            if current_day in override_dates:
-                days_this_week += 1
-            # Otherwise check if this is a regular working day (in schedule and not a holiday)
-            elif current_day.weekday() in working_weekdays and current_day not in holiday_dates:
-                days_this_week += 1
-            current_day += timedelta(days=1)
-    
-    # Get all active schedule periods that overlap with the selected month
-    month_periods = schedule_manager.get_periods_for_date_range(current_date, last_day_of_month, current_user.id)
+        days_this_week = count_days(current_user.id, start_of_week, end_of_week)
     
     # Generate calendar data using the shared function
-    calendar_data = generate_calendar_data(year, month, month_periods, current_user.id)
+    calendar_data = generate_calendar_data(year, month, current_user.id)
     
     # Format month name
     month_name = current_date.strftime('%B %Y')
@@ -117,6 +90,7 @@ def index(year=None, month=None):
     # Add URLs for JavaScript API calls
     holiday_api_url = url_for('holidays.api_add')
     calendar_partial_url = url_for('dashboard.calendar_partial', year=0, month=0)
+    calendar_api_url = url_for('dashboard.api_calendar')
     
     return render_template('dashboard/index.html',
                          calendar_data=calendar_data,
@@ -135,7 +109,8 @@ def index(year=None, month=None):
                          days_this_week=days_this_week,
                          today=today,
                          api_holiday_url=holiday_api_url,
-                         calendar_partial_url=calendar_partial_url)
+                         calendar_partial_url=calendar_partial_url,
+                         calendar_api_url=calendar_api_url)
 
 @dashboard_bp.route('/calendar-partial/<int:year>/<int:month>')
 @login_required
@@ -149,7 +124,6 @@ def calendar_partial(year, month):
     
     # Create the selected date
     current_date = date(year, month, 1)
-    last_day_of_month = date(year, month, calendar.monthrange(year, month)[1])
     
     # Calculate previous and next month
     if month == 1:
@@ -166,35 +140,37 @@ def calendar_partial(year, month):
         next_month = month + 1
         next_year = year
     
-    # Initialize manager
-    schedule_manager = ScheduleManager(current_user.id)
-    
-    # Get all active schedule periods that overlap with the selected month
-    active_periods = schedule_manager.get_periods_for_date_range(current_date, last_day_of_month, current_user.id)
-    
-    # Generate calendar data for all active periods that overlap with this month
-    calendar_data = generate_calendar_data(year, month, active_periods, current_user.id)
-    
-    # Get the month name in the appropriate language
-    month_name = current_date.strftime('%B')
     lang = getattr(g, 'language', 'en')
-    month_key = f'month_{month_name.lower()}'
-    month_translation = get_translation(month_key, lang)
-    
-    return render_template(
-        'dashboard/calendar_partial.html',
-        calendar_data=calendar_data,
-        current_month=f"{month_translation} {year}",
-        current_month_num=today.month,
-        current_year=today.year,
-        is_current_month=(year == today.year and month == today.month),
-        year=year,
-        month=month,
-        prev_year=prev_year,
-        prev_month=prev_month,
-        next_year=next_year,
-        next_month=next_month
-    )
+    
+    def render():
+        # Generate calendar data for all active periods that overlap with this month
+        calendar_data = generate_calendar_data(year, month, current_user.id)
+        
+        # Get the month name in the appropriate language
+        month_name = current_date.strftime('%B')
+        month_key = f'month_{month_name.lower()}'
+        month_translation = get_translation(month_key, lang)
+        
+        return render_template(
+            'dashboard/calendar_partial.html',
+            calendar_data=calendar_data,
+            current_month=f"{month_translation} {year}",
+            current_month_num=today.month,
+            current_year=today.year,
+            is_current_month=(year == today.year and month == today.month),
+            year=year,
+            month=month,
+            prev_year=prev_year,
+            prev_month=prev_month,
+            next_year=next_year,
+            next_month=next_month
+        )
+    
+    # Reuse the rendered fragment until the user's data changes or the day rolls over;
+    # the same key is the ETag, so a browser that has it gets a 304
+    cache_key = ('calendar_partial', current_user.id, year, month, lang,
+                 get_data_version(current_user.id), today)
+    return conditional_response(cache_key, lambda: fragment_cache.get_or_render(cache_key, render))
 
 @dashboard_bp.route('/upcoming-holidays-partial')
 @login_required
@@ -205,14 +181,66 @@ def upcoming_holidays_partial():
     # Get upcoming holidays (next 30 days)
     future_date = today + timedelta(days=30)
     
-    # Initialize holiday manager
-    holiday_manager = HolidayManager(current_user.id)
+    def render():
+        # Initialize holiday manager
+        holiday_manager = HolidayManager(current_user.id)
+        
+        # Get upcoming holidays
+        upcoming_holidays = holiday_manager.get_holidays_for_date_range(today, future_date)
+        
+        return render_template(
+            'dashboard/upcoming_holidays_partial.html',
+            upcoming_holidays=upcoming_holidays,
+            today=today
+        )
+    
+    etag_parts = ('upcoming_holidays', current_user.id, getattr(g, 'language', 'en'),
+                  get_data_version(current_user.id), today)
+    return conditional_response(etag_parts, render)
+
+@dashboard_bp.route('/api/calendar')
+@login_required
+def api_calendar():
+    """Return the effective state of every notable day between `start` and `end`.
     
-    # Get upcoming holidays
-    upcoming_holidays = holiday_manager.get_holidays_for_date_range(today, future_date)
+    Used by the dashboard to prefetch adjacent months and to draw the year view
+    from a single request. Days not listed have no holiday, override or schedule.
+    """
+    lang = getattr(g, 'language', 'en')
+    try:
+        start_date = datetime.strptime(request.args.get('start', ''), '%Y-%m-%d').date()
+        end_date = datetime.strptime(request.args.get('end', ''), '%Y-%m-%d').date()
+    except ValueError:
+        return jsonify({
+            'success': False,
+            'message': get_translation('invalid_date_format', lang)
+        }), 400
+    
+    if end_date < start_date:
+        return jsonify({
+            'success': False,
+            'message': get_translation('end_date_after_start', lang)
+        }), 400
+    
+    if (end_date - start_date).days + 1 > MAX_CALENDAR_RANGE_DAYS:
+        return jsonify({
+            'success': False,
+            'message': get_translation('date_range_too_long', lang).format(days=MAX_CALENDAR_RANGE_DAYS)
+        }), 400
+    
+    today = datetime.now().date()
     
-    return render_template(
-        'dashboard/upcoming_holidays_partial.html',
-        upcoming_holidays=upcoming_holidays,
-        today=today
-    ) 
\ No newline at end of file
+    def build():
+        days, summary = get_calendar_range(current_user.id, start_date, end_date)
+        return jsonify({
+            'success': True,
+            'start': start_date.strftime('%Y-%m-%d'),
+            'end': end_date.strftime('%Y-%m-%d'),
+            'today': today.strftime('%Y-%m-%d'),
+            'days': [days[d] for d in sorted(days)],
+            'summary': summary
+        })
+    
+    etag_parts = ('calendar', current_user.id, start_date, end_date,
+                  get_data_version(current_user.id), today)
+    return conditional_response(etag_parts, build)
@@ -5,21 +5,21 @@ from flask_wtf.file import FileField, FileRequired, FileAllowed
 from wtforms import StringField, DateField, SubmitField
 from wtforms.validators import DataRequired, ValidationError
 from datetime import datetime, timedelta
+import importlib.util
 import os
 import tempfile
 import logging
 import json
 
-# Importación segura de icalendar
-try:
-    from icalendar import Calendar
-    HAS_ICALENDAR = True
-except ImportError:
-    HAS_ICALENDAR = False
+# icalendar is only imported by HolidayManager when an ICS file is actually
+# imported; at startup we just check that it is installed.
+HAS_ICALENDAR = importlib.util.find_spec('icalendar') is not None
 
 from checktime.shared.models.holiday import Holiday
 from checktime.shared.services.holiday_manager import HolidayManager
+from checktime.shared.data_version import get_data_version
 from checktime.web.translations import get_translation
+from checktime.web.utils.http_cache import conditional_response
 
 holidays_bp = Blueprint('holidays', __name__, url_prefix='/holidays')
 
@@ -60,27 +60,23 @@ class HolidayRangeForm(FlaskForm):
             lang = get_language()
             raise ValidationError(get_translation('end_date_after_start', lang))
 
-# Import from iCalendar if the library is available
-try:
-    from icalendar import Calendar
+# Import from iCalendar, only usable if the library is available
+class ICalendarImportForm(FlaskForm):
+    ics_file = FileField('ICS File', validators=[
+        FileRequired(),
+        FileAllowed(['ics'], 'Only ICS files are allowed!')
+    ])
+    submit = SubmitField('Import Holidays')
     
-    class ICalendarImportForm(FlaskForm):
-        ics_file = FileField('ICS File', validators=[
-            FileRequired(),
-            FileAllowed(['ics'], 'Only ICS files are allowed!')
-        ])
-        submit = SubmitField('Import Holidays')
-        
-        def __init__(self, *args, **kwargs):
-            super(ICalendarImportForm, self).__init__(*args, **kwargs)
-            # Set translated labels
-            lang = get_language()
-            self.ics_file.label.text = get_translation('ics_file', lang)
-            self.submit.label.text = get_translation('btn_import_holidays', lang)
-    
-    ICALENDAR_AVAILABLE = True
-except ImportError:
-    ICALENDAR_AVAILABLE = False
+    def __init__(self, *args, **kwargs):
+        super(ICalendarImportForm, self).__init__(*args, **kwargs)
+        # Set translated labels
+        lang = get_language()
+        self.ics_file.label.text = get_translation('ics_file', lang)
+        self.submit.label.text = get_translation('btn_import_holidays', lang)
+
+ICALENDAR_AVAILABLE = HAS_ICALENDAR
+if not ICALENDAR_AVAILABLE:
     logging.warning("icalendar library not available. ICS import disabled.")
 
 def flash_message(key, category='success'):
@@ -192,9 +188,12 @@ if ICALENDAR_AVAILABLE:
 def get_dates():
     """Get all holiday dates as JSON for calendar integration."""
     try:
-        holiday_manager = HolidayManager(current_user.id)
-        dates = holiday_manager.get_all_dates()
-        return jsonify(dates)
+        def build():
+            holiday_manager = HolidayManager(current_user.id)
+            dates = holiday_manager.get_all_dates()
+            return jsonify(dates)
+        
+        return conditional_response(('holiday_dates', current_user.id, get_data_version(current_user.id)), build)
     except Exception as e:
         logging.error(f"Error fetching holiday dates: {str(e)}")
         return jsonify([]), 500 
@@ -513,6 +512,10 @@ def api_delete_by_date(date):
 @login_required
 def partial():
     """Return partial HTML for holiday list to support AJAX updates."""
-    holiday_manager = HolidayManager(current_user.id)
-    holidays = holiday_manager.get_all_holidays()
-    return render_template('holidays/partials/holiday_list.html', holidays=holidays) 
\ No newline at end of file
+    def render():
+        holiday_manager = HolidayManager(current_user.id)
+        holidays = holiday_manager.get_all_holidays()
+        return render_template('holidays/partials/holiday_list.html', holidays=holidays)
+    
+    etag_parts = ('holiday_list', current_user.id, getattr(g, 'language', 'en'), get_data_version(current_user.id))
+    return conditional_response(etag_parts, render) 
\ No newline at end of file
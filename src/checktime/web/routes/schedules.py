@@ -8,7 +8,11 @@ import logging
 
 from checktime.shared.models.schedule import SchedulePeriod, DaySchedule
 from checktime.shared.repository import schedule_period_repository, day_schedule_repository
+from checktime.shared.repository.schedule_repository import PeriodOverlapError
+from checktime.shared.services.schedule_manager import ScheduleManager
+from checktime.shared.data_version import get_data_version
 from checktime.web.translations import get_translation
+from checktime.web.utils.http_cache import conditional_response
 
 schedules_bp = Blueprint('schedules', __name__, url_prefix='/schedules')
 
@@ -98,7 +102,24 @@ def add():
     form = SchedulePeriodForm()
     if form.validate_on_submit():
         # Check for overlapping periods
-        if schedule_period_repository.check_overlap(form.start_date.data, form.end_date.data, current_user.id) and form.is_active.data:
+        overlap = form.is_active.data and ScheduleManager(current_user.id).check_overlap(
+            form.start_date.data, form.end_date.data)
+        
+        # Create new period
+        if not overlap:
+            try:
+                period = schedule_period_repository.create_period(
+                    name=form.name.data,
+                    start_date=form.start_date.data,
+                    end_date=form.end_date.data,
+                    is_active=form.is_active.data,
+                    user_id=current_user.id
+                )
+            except PeriodOverlapError:
+                # A concurrent request won the race; the database constraint caught it
+                overlap = True
+        
+        if overlap:
             if is_ajax_request():
                 return jsonify({
                     'success': False,
@@ -108,15 +129,6 @@ def add():
                 flash_message('period_overlap_error', 'danger')
                 return redirect(url_for('schedules.add'))
         
-        # Create new period
-        period = schedule_period_repository.create_period(
-            name=form.name.data,
-            start_date=form.start_date.data,
-            end_date=form.end_date.data,
-            is_active=form.is_active.data,
-            user_id=current_user.id
-        )
-        
         if is_ajax_request():
             return jsonify({
                 'success': True,
@@ -151,7 +163,24 @@ def edit(period_id):
     
     if form.validate_on_submit():
         # Check for overlapping periods
-        if schedule_period_repository.check_overlap(form.start_date.data, form.end_date.data, current_user.id, period_id) and form.is_active.data:
+        overlap = form.is_active.data and ScheduleManager(current_user.id).check_overlap(
+            form.start_date.data, form.end_date.data, exclude_id=period_id)
+        
+        # Update period
+        if not overlap:
+            try:
+                schedule_period_repository.update_period(
+                    period=period,
+                    name=form.name.data,
+                    start_date=form.start_date.data,
+                    end_date=form.end_date.data,
+                    is_active=form.is_active.data
+                )
+            except PeriodOverlapError:
+                # A concurrent request won the race; the database constraint caught it
+                overlap = True
+        
+        if overlap:
             if is_ajax_request():
                 return jsonify({
                     'success': False,
@@ -161,15 +190,6 @@ def edit(period_id):
                 flash_message('period_overlap_error', 'danger')
                 return redirect(url_for('schedules.edit', period_id=period_id))
         
-        # Update period
-        schedule_period_repository.update_period(
-            period=period,
-            name=form.name.data,
-            start_date=form.start_date.data,
-            end_date=form.end_date.data,
-            is_active=form.is_active.data
-        )
-        
         if is_ajax_request():
             return jsonify({
                 'success': True,
@@ -308,21 +328,28 @@ def api_add():
         is_active = data.get('is_active', False)
         
         # Check for overlapping periods
-        if schedule_period_repository.check_overlap(start_date, end_date, current_user.id) and is_active:
+        overlap = is_active and ScheduleManager(current_user.id).check_overlap(start_date, end_date)
+        
+        # Create new period
+        if not overlap:
+            try:
+                period = schedule_period_repository.create_period(
+                    name=data['name'],
+                    start_date=start_date,
+                    end_date=end_date,
+                    is_active=is_active,
+                    user_id=current_user.id
+                )
+            except PeriodOverlapError:
+                # A concurrent request won the race; the database constraint caught it
+                overlap = True
+        
+        if overlap:
             return jsonify({
                 'success': False, 
                 'message': get_translation('period_overlap_error', get_language())
             }), 409
         
-        # Create new period
-        period = schedule_period_repository.create_period(
-            name=data['name'],
-            start_date=start_date,
-            end_date=end_date,
-            is_active=is_active,
-            user_id=current_user.id
-        )
-        
         return jsonify({
             'success': True,
             'message': get_translation('period_added', get_language()),
@@ -381,21 +408,28 @@ def api_update(period_id):
         is_active = data.get('is_active', False)
         
         # Check for overlapping periods
-        if schedule_period_repository.check_overlap(start_date, end_date, current_user.id, period_id) and is_active:
+        overlap = is_active and ScheduleManager(current_user.id).check_overlap(start_date, end_date, exclude_id=period_id)
+        
+        # Update period
+        if not overlap:
+            try:
+                schedule_period_repository.update_period(
+                    period=period,
+                    name=data['name'],
+                    start_date=start_date,
+                    end_date=end_date,
+                    is_active=is_active
+                )
+            except PeriodOverlapError:
+                # A concurrent request won the race; the database constraint caught it
+                overlap = True
+        
+        if overlap:
             return jsonify({
                 'success': False, 
                 'message': get_translation('period_overlap_error', get_language())
             }), 409
         
-        # Update period
-        schedule_period_repository.update_period(
-            period=period,
-            name=data['name'],
-            start_date=start_date,
-            end_date=end_date,
-            is_active=is_active
-        )
-        
         return jsonify({
             'success': True,
             'message': get_translation('period_updated', get_language()),
@@ -509,5 +543,10 @@ def api_update_days(period_id):
 @login_required
 def partial():
     """Return partial HTML for schedule list to support AJAX updates."""
-    periods = schedule_period_repository.get_all(current_user.id)
-    return render_template('schedules/partials/schedule_list.html', periods=periods) 
\ No newline at end of file
+    def render():
+        periods = schedule_period_repository.get_all(current_user.id)
+        return render_template('schedules/partials/schedule_list.html', periods=periods)
+    
+    etag_parts = ('schedule_list', current_user.id, getattr(g, 'language', get_language()),
+                  get_data_version(current_user.id))
+    return conditional_response(etag_parts, render) 
\ No newline at end of file
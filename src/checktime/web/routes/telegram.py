@@ -0,0 +1,49 @@
+"""
+Telegram webhook endpoint.
+
+In webhook mode (TELEGRAM_UPDATE_MODE=webhook) Telegram POSTs each update
+here instead of the bot process fetching it with getUpdates. The update is
+stored in the telegram_update table before the request returns, and the bot
+process, the only consumer, handles the stored updates in order with the
+same command handlers as in polling mode. Telegram resends an update it got
+no timely 2xx for; the resend is recognised by its update ID, whichever web
+worker receives it, and is not handled again.
+"""
+
+import hmac
+import logging
+
+from flask import Blueprint, abort, jsonify, request
+
+from checktime.shared.config import get_telegram_update_mode, get_telegram_webhook_secret
+from checktime.shared.metrics import metrics
+from checktime.shared.services.bot_state_manager import BotStateManager
+
+logger = logging.getLogger(__name__)
+
+telegram_bp = Blueprint("telegram", __name__, url_prefix="/telegram")
+
+SECRET_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+
+
+@telegram_bp.route("/webhook", methods=["POST"])
+def webhook():
+    if get_telegram_update_mode() != "webhook":
+        abort(404)
+
+    secret = get_telegram_webhook_secret()
+    received = request.headers.get(SECRET_HEADER, "")
+    if not secret or not hmac.compare_digest(received.encode(), secret.encode()):
+        logger.warning("Rejected Telegram webhook request with a wrong secret token")
+        abort(403)
+
+    update = request.get_json(silent=True)
+    if not isinstance(update, dict) or "update_id" not in update:
+        return jsonify({"ok": False, "error": "invalid update"}), 400
+
+    queued = BotStateManager().queue_update(update)
+    if queued is None:
+        # Not stored: a non-2xx makes Telegram resend the update later
+        return jsonify({"ok": False, "error": "update not stored"}), 503
+    metrics.inc('bot_updates_total', outcome='received' if queued else 'duplicate')
+    return jsonify({"ok": True})
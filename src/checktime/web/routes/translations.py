@@ -1,36 +1,68 @@
-from flask import Blueprint, jsonify, session, g
-from checktime.web.translations import get_translation, TRANSLATIONS
+from flask import Blueprint, Response, jsonify, redirect, session, g, url_for
+from checktime.web.translations import get_translation, TRANSLATIONS, BUNDLES, BUNDLE_HASHES
+from checktime.web.utils.http_cache import conditional_response
 
 translations_bp = Blueprint('translations', __name__, url_prefix='/api/translations')
 
+# Bundle URLs carry their content hash, so the response never changes
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
 def get_current_language():
     """Get the current user language from session or g"""
     return getattr(g, 'language', session.get('language', 'en'))
 
+def bundle_response(lang):
+    """Build a response with the precompiled bundle of a language"""
+    return Response(BUNDLES[lang], mimetype='application/json')
+
 @translations_bp.route('/')
 def get_all_translations():
     """Return all translations for the current language"""
     lang = get_current_language()
-    return jsonify(TRANSLATIONS.get(lang, TRANSLATIONS['en']))
+    if lang not in TRANSLATIONS:
+        lang = 'en'
+    return conditional_response(('all', lang, BUNDLE_HASHES[lang]),
+                                lambda: bundle_response(lang))
 
 @translations_bp.route('/<lang>')
 def get_translations_for_language(lang):
     """Return all translations for a specific language"""
     if lang not in TRANSLATIONS:
         lang = 'en'  # Default to English for unknown languages
-    return jsonify(TRANSLATIONS[lang])
+    # The language is in the URL, so the response is the same for every session
+    return conditional_response(('all', lang, BUNDLE_HASHES[lang]),
+                                lambda: bundle_response(lang), private=False)
+
+@translations_bp.route('/bundle/<lang>.<bundle_hash>.json')
+def get_translation_bundle(lang, bundle_hash):
+    """Return the content-hashed bundle of a language, cacheable forever"""
+    if lang not in TRANSLATIONS:
+        lang = 'en'
+    if bundle_hash != BUNDLE_HASHES[lang]:
+        # A page from before a deploy; send it to the current bundle
+        return redirect(url_for('translations.get_translation_bundle',
+                                lang=lang, bundle_hash=BUNDLE_HASHES[lang]))
+    
+    response = bundle_response(lang)
+    response.headers['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+    response.set_etag(BUNDLE_HASHES[lang])
+    return response
 
 @translations_bp.route('/keys/<keys>')
 def get_translation_keys(keys):
     """Return translations for specific keys"""
     lang = get_current_language()
     keys_list = keys.split(',')
-    translations = {}
     
-    for key in keys_list:
-        translations[key] = get_translation(key, lang)
+    def build():
+        translations = {}
         
-    return jsonify(translations)
+        for key in keys_list:
+            translations[key] = get_translation(key, lang)
+            
+        return jsonify(translations)
+    
+    return conditional_response(('keys', keys, lang, BUNDLE_HASHES.get(lang)), build)
 
 @translations_bp.route('/group/<group>')
 def get_translation_group(group):
@@ -74,6 +106,32 @@ def get_translation_group(group):
             'error_missing_id',
             'error_creating_override',
             'error_updating_override',
+            'year_view',
+            'month_view',
+            'previous',
+            'next',
+            'working_day',
+            'override',
+            'holiday',
+            'day_mon',
+            'day_tue',
+            'day_wed',
+            'day_thu',
+            'day_fri',
+            'day_sat',
+            'day_sun',
+            'month_january',
+            'month_february',
+            'month_march',
+            'month_april',
+            'month_may',
+            'month_june',
+            'month_july',
+            'month_august',
+            'month_september',
+            'month_october',
+            'month_november',
+            'month_december',
         ],
         'schedules': [
             'schedule_periods',
@@ -138,8 +196,13 @@ def get_translation_group(group):
     if not keys_list:
         return jsonify({})
     
-    translations = {}
-    for key in keys_list:
-        translations[key] = get_translation(key, lang)
+    def build():
+        translations = {}
+        for key in keys_list:
+            translations[key] = get_translation(key, lang)
+        
+        return jsonify(translations)
     
-    return jsonify(translations) 
\ No newline at end of file
+    # The key list is part of the tag: it changes with the code, not with TRANSLATIONS
+    etag_parts = ('group', group, tuple(keys_list), lang, BUNDLE_HASHES.get(lang))
+    return conditional_response(etag_parts, build) 
\ No newline at end of file
@@ -67,6 +67,16 @@ function setupEventHandlers(holidayApiUrl, createOverrideModal, editOverrideModa
                 navEl.getAttribute('data-year'), 
                 navEl.getAttribute('data-month')
             );
+        } else if (e.target.closest('.calendar-year-view')) {
+            e.preventDefault();
+            loadYearView(parseInt(e.target.closest('.calendar-year-view').getAttribute('data-year')));
+        } else if (e.target.closest('.year-month')) {
+            e.preventDefault();
+            const monthEl = e.target.closest('.year-month');
+            loadCalendar(
+                monthEl.getAttribute('data-year'),
+                monthEl.getAttribute('data-month')
+            );
         }
     });
     
@@ -492,6 +502,9 @@ function handleDeleteHoliday(editHolidayModal) {
 
 // Helper function to reload current calendar view
 function reloadCurrentCalendar() {
+    // Data changed: drop prefetched months so they are rendered again
+    calendarCache.clear();
+    
     const calendarDataEl = document.getElementById('calendar-data');
     const currentYear = parseInt(calendarDataEl.getAttribute('data-current-year'));
     const currentMonth = parseInt(calendarDataEl.getAttribute('data-current-month'));
@@ -504,24 +517,57 @@ function resetValidation(formId) {
     invalidInputs.forEach(input => input.classList.remove('is-invalid'));
 }
 
+// Rendered month partials keyed by "year-month", filled by loadCalendar and
+// prefetchAdjacentMonths. Cleared whenever the user changes calendar data.
+const calendarCache = new Map();
+
+function calendarPartialUrlFor(year, month) {
+    const calendarDataEl = document.getElementById('calendar-data');
+    const calendarPartialUrl = calendarDataEl.getAttribute('data-calendar-partial-url') || '/dashboard/calendar-partial';
+    return calendarPartialUrl.replace('/0/0', `/${year}/${month}`);
+}
+
+// Fetch a month partial, sharing in-flight and finished requests through the cache
+function fetchCalendarPartial(year, month) {
+    const key = `${year}-${month}`;
+    if (!calendarCache.has(key)) {
+        // Use fetch directly here as we're expecting HTML, not JSON
+        const request = fetch(calendarPartialUrlFor(year, month), { cache: 'no-cache' })
+            .then(response => {
+                if (!response.ok) {
+                    throw new Error('Calendar load error: ' + response.statusText);
+                }
+                return response.text();
+            })
+            .catch(error => {
+                calendarCache.delete(key);
+                throw error;
+            });
+        calendarCache.set(key, request);
+    }
+    return calendarCache.get(key);
+}
+
+// Warm the cache with the months around the one being shown
+function prefetchAdjacentMonths(year, month) {
+    year = parseInt(year);
+    month = parseInt(month);
+    const prev = month === 1 ? [year - 1, 12] : [year, month - 1];
+    const next = month === 12 ? [year + 1, 1] : [year, month + 1];
+    [prev, next].forEach(([y, m]) => {
+        fetchCalendarPartial(y, m).catch(() => {});
+    });
+}
+
 // Function to load calendar content
 function loadCalendar(year, month) {
     console.log('Loading calendar:', year, month);
     const calendarDataEl = document.getElementById('calendar-data');
-    const calendarPartialUrl = calendarDataEl.getAttribute('data-calendar-partial-url') || '/dashboard/calendar-partial';
-    const url = calendarPartialUrl.replace('/0/0', `/${year}/${month}`);
     
     const calendarContainer = document.getElementById('calendar-container');
     calendarContainer.classList.add('loading');
     
-    // Use fetch directly here as we're expecting HTML, not JSON
-    fetch(url)
-        .then(response => {
-            if (!response.ok) {
-                throw new Error('Calendar load error: ' + response.statusText);
-            }
-            return response.text();
-        })
+    fetchCalendarPartial(year, month)
         .then(html => {
             calendarContainer.innerHTML = html;
             calendarContainer.classList.remove('loading');
@@ -532,6 +578,8 @@ function loadCalendar(year, month) {
             
             // Initialize tooltips for the new content
             initializeTooltips();
+            
+            prefetchAdjacentMonths(year, month);
         })
         .catch(error => {
             console.error('Calendar load error:', error);
@@ -541,6 +589,130 @@ function loadCalendar(year, month) {
         });
 }
 
+function escapeHtml(text) {
+    const div = document.createElement('div');
+    div.textContent = text == null ? '' : text;
+    return div.innerHTML;
+}
+
+// Function to load the whole-year overview with a single API request
+function loadYearView(year) {
+    console.log('Loading year view:', year);
+    const calendarDataEl = document.getElementById('calendar-data');
+    const calendarApiUrl = calendarDataEl.getAttribute('data-calendar-api-url') || '/dashboard/api/calendar';
+    
+    const calendarContainer = document.getElementById('calendar-container');
+    calendarContainer.classList.add('loading');
+    
+    fetch(`${calendarApiUrl}?start=${year}-01-01&end=${year}-12-31`, { cache: 'no-cache' })
+        .then(response => {
+            if (!response.ok) {
+                throw new Error('Calendar load error: ' + response.statusText);
+            }
+            return response.json();
+        })
+        .then(data => {
+            calendarContainer.innerHTML = renderYearView(year, data);
+            calendarContainer.classList.remove('loading');
+            initializeTooltips();
+        })
+        .catch(error => {
+            console.error('Year view load error:', error);
+            calendarContainer.classList.remove('loading');
+            calendarContainer.innerHTML = `<div class='alert alert-danger mt-3'>${t('error_loading_calendar')}</div>`;
+            showNotification(t('error_loading_calendar'), 'error');
+        });
+}
+
+function renderYearView(year, data) {
+    const monthKeys = ['january', 'february', 'march', 'april', 'may', 'june', 'july',
+                       'august', 'september', 'october', 'november', 'december'];
+    const dayKeys = ['mon', 'tue', 'wed', 'thu', 'fri', 'sat', 'sun'];
+    const pad = n => String(n).padStart(2, '0');
+    
+    // Only notable days are returned; everything else is an empty day
+    const days = {};
+    data.days.forEach(day => { days[day.date] = day; });
+    
+    const dayHeader = dayKeys.map(key => `<th>${t('day_' + key)}</th>`).join('');
+    let months = '';
+    for (let month = 1; month <= 12; month++) {
+        const firstWeekday = (new Date(year, month - 1, 1).getDay() + 6) % 7;  // Monday = 0
+        const numDays = new Date(year, month, 0).getDate();
+        
+        let cells = '<td></td>'.repeat(firstWeekday);
+        let rows = '';
+        for (let dayNum = 1; dayNum <= numDays; dayNum++) {
+            const date = `${year}-${pad(month)}-${pad(dayNum)}`;
+            const day = days[date];
+            let cls = 'year-day';
+            let title = '';
+            if (day && day.is_holiday) {
+                cls += ' holiday';
+                title = day.holiday_name || t('holiday');
+            } else if (day && day.is_override) {
+                cls += ' override';
+                title = `${t('override')}: ${day.check_in_time} - ${day.check_out_time}`;
+            } else if (day && day.is_working_day) {
+                cls += ' working';
+                title = `${day.check_in_time} - ${day.check_out_time}`;
+            }
+            if (date === data.today) {
+                cls += ' today';
+            }
+            cells += `<td class="${cls}"${title ? ` title="${escapeHtml(title)}"` : ''}>${dayNum}</td>`;
+            if ((firstWeekday + dayNum) % 7 === 0) {
+                rows += `<tr>${cells}</tr>`;
+                cells = '';
+            }
+        }
+        if (cells) {
+            rows += `<tr>${cells}</tr>`;
+        }
+        
+        months += `
+            <div class="col-6 col-md-4 col-xl-3 mb-2">
+                <div class="year-month p-1" data-year="${year}" data-month="${month}">
+                    <div class="fw-bold small mb-1">${t('month_' + monthKeys[month - 1])}</div>
+                    <table class="year-month-table">
+                        <thead class="text-muted"><tr>${dayHeader}</tr></thead>
+                        <tbody>${rows}</tbody>
+                    </table>
+                </div>
+            </div>`;
+    }
+    
+    const summary = data.summary || {};
+    // Back to the month view: today's month in the current year, January otherwise
+    const [todayYear, todayMonth] = (data.today || '').split('-').map(Number);
+    const monthViewMonth = todayYear === year ? todayMonth : 1;
+    return `
+        <div class="card-header bg-primary text-white">
+            <div class="d-flex justify-content-between align-items-center">
+                <h5 class="mb-0"><i class="bi bi-grid-3x3-gap"></i> ${year}</h5>
+                <div class="d-flex gap-1">
+                    <button data-year="${year}" data-month="${monthViewMonth}" class="btn btn-sm btn-light calendar-nav">
+                        <i class="bi bi-calendar3"></i><span class="d-none d-md-inline"> ${t('month_view')}</span>
+                    </button>
+                    <button data-year="${year - 1}" class="btn btn-sm btn-light calendar-year-view">
+                        <i class="bi bi-chevron-left"></i><span class="d-none d-md-inline"> ${t('previous')}</span>
+                    </button>
+                    <button data-year="${year + 1}" class="btn btn-sm btn-light calendar-year-view">
+                        <span class="d-none d-md-inline">${t('next')} </span><i class="bi bi-chevron-right"></i>
+                    </button>
+                </div>
+            </div>
+        </div>
+        <div class="card-body p-2">
+            <div class="row g-2">${months}</div>
+            <div class="d-flex mt-1 justify-content-end flex-wrap">
+                <span class="badge bg-success me-2 mb-1">${t('working_day')}: ${summary.working_days || 0}</span>
+                <span class="badge bg-warning text-dark me-2 mb-1">${t('override')}: ${summary.overrides || 0}</span>
+                <span class="badge bg-info me-2 mb-1">${t('holiday')}: ${summary.holidays || 0}</span>
+            </div>
+        </div>`;
+}
+
 // Function to reload upcoming holidays section
 function reloadUpcomingHolidays() {
     console.log('Reloading upcoming holidays');
@@ -554,7 +726,7 @@ function reloadUpcomingHolidays() {
     upcomingHolidaysContainer.classList.add('loading');
     
     // Use fetch directly here as we're expecting HTML, not JSON
-    fetch('/dashboard/upcoming-holidays-partial')
+    fetch('/dashboard/upcoming-holidays-partial', { cache: 'no-cache' })
         .then(response => {
             if (!response.ok) {
                 throw new Error('Upcoming holidays load error: ' + response.statusText);
@@ -264,7 +264,7 @@ function reloadHolidayList() {
     holidayListContainer.style.opacity = '0.6';
     
     // Fetch updated holiday list HTML
-    fetch('/holidays/partial')
+    fetch('/holidays/partial', { cache: 'no-cache' })
         .then(response => {
             if (!response.ok) {
                 throw new Error('Failed to load holiday list');
@@ -19,6 +19,44 @@ function t(key, defaultValue = key) {
     return window.translationsData[key] || defaultValue;
 }
 
+// Promise of the full translation bundle, fetched at most once per page.
+// Some pages include this file twice, so it must not be a `let` binding.
+window.translationBundlePromise = window.translationBundlePromise || null;
+
+/**
+ * Load the content-hashed translation bundle of the current language
+ * 
+ * The bundle URL is set by the base template and changes whenever a string
+ * changes, so the browser caches it for good and later pages load it
+ * without a request.
+ * 
+ * @returns {Promise|null} - Promise that resolves with all translations, or null if there is no bundle URL
+ */
+function loadTranslationBundle() {
+    if (!window.translationsBundleUrl) {
+        return null;
+    }
+    if (!window.translationBundlePromise) {
+        window.translationBundlePromise = fetch(window.translationsBundleUrl)
+            .then(response => {
+                if (!response.ok) {
+                    throw new Error(`HTTP error! Status: ${response.status}`);
+                }
+                return response.json();
+            })
+            .then(data => {
+                window.translationsData = {...data, ...window.translationsData};
+                return data;
+            })
+            .catch(error => {
+                // Let the next caller fall back to the group and key endpoints
+                window.translationBundlePromise = null;
+                throw error;
+            });
+    }
+    return window.translationBundlePromise;
+}
+
 /**
  * Load translations from the API for the given keys
  * 
@@ -26,7 +64,15 @@ function t(key, defaultValue = key) {
  * @returns {Promise} - Promise that resolves when translations are loaded
  */
 function loadTranslations(keys) {
-    return fetch(`/api/translations/keys/${keys.join(',')}`)
+    const bundle = loadTranslationBundle();
+    if (bundle) {
+        return bundle.catch(() => fetchTranslationKeys(keys));
+    }
+    return fetchTranslationKeys(keys);
+}
+
+function fetchTranslationKeys(keys) {
+    return fetch(`/api/translations/keys/${keys.join(',')}`, { cache: 'no-cache' })
         .then(response => response.json())
         .then(data => {
             // Merge the new translations with the existing ones
@@ -42,7 +88,15 @@ function loadTranslations(keys) {
  * @returns {Promise} - Promise that resolves when translations are loaded
  */
 function loadTranslationGroup(group) {
-    return fetch(`/api/translations/group/${group}`)
+    const bundle = loadTranslationBundle();
+    if (bundle) {
+        return bundle.catch(() => fetchTranslationGroup(group));
+    }
+    return fetchTranslationGroup(group);
+}
+
+function fetchTranslationGroup(group) {
+    return fetch(`/api/translations/group/${group}`, { cache: 'no-cache' })
         .then(response => response.json())
         .then(data => {
             // Merge the new translations with the existing ones
@@ -389,7 +389,7 @@ function reloadScheduleList() {
     scheduleListContainer.appendChild(loadingOverlay);
     
     // Fetch updated schedule list HTML
-    fetch('/schedules/partial')
+    fetch('/schedules/partial', { cache: 'no-cache' })
         .then(response => {
             if (!response.ok) {
                 throw new Error('Failed to load schedule list');
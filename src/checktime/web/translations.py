@@ -1,3 +1,6 @@
+import hashlib
+import json
+
 from checktime.shared.config import get_telegram_bot_name
 """
 Translation module for CheckTime web interface.
@@ -75,6 +78,7 @@ EN = {
     'password_mismatch': 'Passwords do not match',
     'username_taken': 'Username already taken',
     'email_taken': 'Email already registered',
+    'telegram_chat_id_taken': 'This Telegram chat ID is already linked to another user',
     'invalid_username_or_password': 'Invalid username or password',
     'username': 'Username',
     
@@ -269,6 +273,7 @@ EN = {
     'error_importing_ics': 'Error importing ICS file',
     'error_processing_file': 'Error processing the file',
     'end_date_after_start': 'End date must be after start date',
+    'date_range_too_long': 'Date range too long (max {days} days)',
     'period_overlap_error': 'This period overlaps with another period. Please adjust the dates.',
     'period_added': 'Schedule period added successfully',
     'period_updated': 'Schedule period updated successfully',
@@ -296,6 +301,8 @@ EN = {
     'error_saving_override': 'Error saving override',
     'error_deleting_override': 'Error deleting override day',
     'error_loading_upcoming_holidays': 'Error loading upcoming holidays',
+    'year_view': 'Year',
+    'month_view': 'Month',
     # Month names
     'month_january': 'January',
     'month_february': 'February',
@@ -321,6 +328,59 @@ EN = {
     'broadcast_markdown_hint': 'You can use *bold*, _italic_ and `code`. The message will be prefixed with "📢 Aviso del administrador".',
     'broadcast_send': 'Send broadcast',
     'broadcast_confirm': 'Send this message to ALL Telegram users?',
+    'broadcast_status': 'Broadcast status',
+    'broadcast_recent': 'Recent broadcasts',
+    'broadcast_progress': 'Progress',
+    'broadcast_sent': 'Sent',
+    'broadcast_failed': 'Failed',
+    'broadcast_pending': 'Pending',
+    'broadcast_recipient': 'Recipient',
+    'broadcast_error': 'Error',
+    'broadcast_new': 'New broadcast',
+    'broadcast_state_queued': 'Queued',
+    'broadcast_state_running': 'Sending',
+    'broadcast_state_completed': 'Completed',
+    'broadcast_state_failed': 'Failed',
+    # Admin CheckJC status
+    'checkjc_status': 'CheckJC status',
+    'checkjc_status_intro': 'Circuit breakers of the scheduler. While one is open, checks through that route are held until CheckJC lifts the IP block; then a single check probes it.',
+    'checkjc_no_breakers': 'No blocks or rejected logins recorded yet.',
+    'breaker_subdomain': 'Subdomain',
+    'breaker_egress': 'Egress',
+    'breaker_open_until': 'Blocked until',
+    'breaker_opens': 'Opens in a row',
+    'breaker_rejections': 'Rejected logins',
+    'breaker_last_error': 'Last error',
+    'breaker_updated': 'Updated',
+    'breaker_state_closed': 'Closed',
+    'breaker_state_open': 'Open',
+    'breaker_state_half_open': 'Probing',
+    'checkjc_checks_last_days': 'Scheduled checks, last days',
+    'checkjc_phase_latency': 'Check phase latency, last days',
+    'checkjc_phase': 'Phase',
+    'checkjc_samples': 'Samples',
+    'checkjc_no_phase_data': 'No timed checks yet.',
+    # Admin profiler
+    'profiles': 'Profiles',
+    'profiles_intro': 'cProfile dumps of the slowest scheduler ticks and web requests recorded while profiling is on. Open them with python -m pstats or snakeviz.',
+    'profiling_on': 'Profiling on',
+    'profiling_off': 'Profiling off',
+    'profiling_enabled_by_env': 'Enabled by PROFILING_ENABLED',
+    'profiling_turn_on': 'Turn on',
+    'profiling_turn_off': 'Turn off',
+    'profiles_kept': 'Slowest kept per kind',
+    'profiles_none': 'No profiles recorded yet.',
+    'profile_kind': 'Kind',
+    'profile_kind_tick': 'Scheduler tick',
+    'profile_kind_request': 'Web request',
+    'profile_name': 'Run',
+    'profile_seconds': 'Seconds',
+    'profile_created': 'Recorded',
+    'profile_download': 'Download',
+    'check_result_succeeded': 'Succeeded',
+    'check_result_failed': 'Failed',
+    'check_result_running': 'In progress',
+    'check_result_unconfirmed': 'Clicked, unconfirmed',
 }
 
 # Spanish translations
@@ -393,6 +453,7 @@ ES = {
     'password_mismatch': 'Las contraseñas no coinciden',
     'username_taken': 'Nombre de usuario ya tomado',
     'email_taken': 'Correo electrónico ya registrado',
+    'telegram_chat_id_taken': 'Este chat ID de Telegram ya está vinculado a otro usuario',
     'invalid_username_or_password': 'Nombre de usuario o contraseña inválida',
     'username': 'Usuario',
     
@@ -588,6 +649,7 @@ ES = {
     'error_importing_ics': 'Error al importar archivo ICS',
     'error_processing_file': 'Error al procesar el archivo',
     'end_date_after_start': 'La fecha de fin debe ser posterior a la fecha de inicio',
+    'date_range_too_long': 'Rango de fechas demasiado largo (máximo {days} días)',
     'period_overlap_error': 'Este período se solapa con otro período. Por favor ajusta las fechas.',
     'period_added': 'Período de horario añadido correctamente',
     'period_updated': 'Período de horario actualizado correctamente',
@@ -615,6 +677,8 @@ ES = {
     'error_saving_override': 'Error al guardar la modificación',
     'error_deleting_override': 'Error al eliminar el día modificado',
     'error_loading_upcoming_holidays': 'Error al cargar los próximos festivos',
+    'year_view': 'Año',
+    'month_view': 'Mes',
     # Month names
     'month_january': 'Enero',
     'month_february': 'Febrero',
@@ -640,6 +704,59 @@ ES = {
     'broadcast_markdown_hint': 'Puedes usar *negrita*, _cursiva_ y `código`. El mensaje se enviará con el prefijo "📢 Aviso del administrador".',
     'broadcast_send': 'Enviar comunicación',
     'broadcast_confirm': '¿Enviar este mensaje a TODOS los usuarios de Telegram?',
+    'broadcast_status': 'Estado de la comunicación',
+    'broadcast_recent': 'Comunicaciones recientes',
+    'broadcast_progress': 'Progreso',
+    'broadcast_sent': 'Enviados',
+    'broadcast_failed': 'Fallidos',
+    'broadcast_pending': 'Pendientes',
+    'broadcast_recipient': 'Destinatario',
+    'broadcast_error': 'Error',
+    'broadcast_new': 'Nueva comunicación',
+    'broadcast_state_queued': 'En cola',
+    'broadcast_state_running': 'Enviando',
+    'broadcast_state_completed': 'Completada',
+    'broadcast_state_failed': 'Fallida',
+    # Admin CheckJC status
+    'checkjc_status': 'Estado de CheckJC',
+    'checkjc_status_intro': 'Circuit breakers del planificador. Mientras uno está abierto, los fichajes por esa ruta esperan a que CheckJC levante el bloqueo de la IP; después un único fichaje la prueba.',
+    'checkjc_no_breakers': 'Aún no se ha registrado ningún bloqueo ni login rechazado.',
+    'breaker_subdomain': 'Subdominio',
+    'breaker_egress': 'Salida',
+    'breaker_open_until': 'Bloqueado hasta',
+    'breaker_opens': 'Aperturas seguidas',
+    'breaker_rejections': 'Logins rechazados',
+    'breaker_last_error': 'Último error',
+    'breaker_updated': 'Actualizado',
+    'breaker_state_closed': 'Cerrado',
+    'breaker_state_open': 'Abierto',
+    'breaker_state_half_open': 'Probando',
+    'checkjc_checks_last_days': 'Fichajes programados, últimos días',
+    'checkjc_phase_latency': 'Latencia por fase de los fichajes, últimos días',
+    'checkjc_phase': 'Fase',
+    'checkjc_samples': 'Muestras',
+    'checkjc_no_phase_data': 'Aún no hay fichajes medidos.',
+    # Admin profiler
+    'profiles': 'Perfiles',
+    'profiles_intro': 'Volcados de cProfile de los ciclos del scheduler y peticiones web más lentos registrados con el profiler activo. Ábrelos con python -m pstats o snakeviz.',
+    'profiling_on': 'Profiler activo',
+    'profiling_off': 'Profiler inactivo',
+    'profiling_enabled_by_env': 'Activado por PROFILING_ENABLED',
+    'profiling_turn_on': 'Activar',
+    'profiling_turn_off': 'Desactivar',
+    'profiles_kept': 'Más lentos guardados por tipo',
+    'profiles_none': 'Aún no hay perfiles.',
+    'profile_kind': 'Tipo',
+    'profile_kind_tick': 'Ciclo del scheduler',
+    'profile_kind_request': 'Petición web',
+    'profile_name': 'Ejecución',
+    'profile_seconds': 'Segundos',
+    'profile_created': 'Registrado',
+    'profile_download': 'Descargar',
+    'check_result_succeeded': 'Correctos',
+    'check_result_failed': 'Fallidos',
+    'check_result_running': 'En curso',
+    'check_result_unconfirmed': 'Pulsados sin confirmar',
 }
 
 # Dictionary containing all translations
@@ -668,4 +785,40 @@ def get_translation(key, lang='en'):
 # Create a shorthand function for translations
 def t(key, lang='en'):
     """Shorthand for get_translation."""
-    return get_translation(key, lang) 
\ No newline at end of file
+    return get_translation(key, lang)
+
+def _compile_bundle(strings):
+    """Serialize a language's translations into the JSON served to browsers."""
+    return json.dumps(strings, ensure_ascii=False, sort_keys=True, separators=(',', ':')).encode('utf-8')
+
+# Per-language JSON bundles and their content hashes, built once at import.
+# The hash goes in the bundle URL, so a bundle can be cached forever and a
+# deploy that changes any string produces a new URL.
+BUNDLES = {lang: _compile_bundle(strings) for lang, strings in TRANSLATIONS.items()}
+BUNDLE_HASHES = {lang: hashlib.sha1(bundle).hexdigest()[:12] for lang, bundle in BUNDLES.items()}
+
+def _make_translator(strings):
+    """Bind a translate function to one language's dictionary."""
+    lookup = strings.get
+
+    def translate(key, default=None):
+        # Unknown keys fall back to the default if given, else to the key itself
+        return lookup(key, key if default is None else default)
+
+    return translate
+
+# One translate function per language, shared by every request
+TRANSLATORS = {lang: _make_translator(strings) for lang, strings in TRANSLATIONS.items()}
+
+def get_translator(lang='en'):
+    """
+    Get the translate function of a language.
+    
+    Args:
+        lang (str): The language code (e.g., 'en', 'es')
+        
+    Returns:
+        Callable: translate(key, default=None), bound to the language's
+        translations (English for unknown languages)
+    """
+    return TRANSLATORS.get(lang, TRANSLATORS['en']) 
\ No newline at end of file
@@ -0,0 +1,88 @@
+"""
+Cache of rendered HTML fragments for the web workers.
+
+Keys include the user's data version (see checktime.shared.data_version), so
+a write anywhere makes the user's old entries unreachable; they are never
+served again and fall out through LRU eviction. Each gunicorn worker keeps
+its own cache, bounded by FRAGMENT_CACHE_MAX_BYTES.
+"""
+
+import logging
+import threading
+from collections import OrderedDict
+from typing import Callable, Hashable, Optional
+
+from checktime.shared.config import get_fragment_cache_max_bytes
+
+# Create logger
+logger = logging.getLogger(__name__)
+
+class FragmentCache:
+    """Size-bounded LRU cache of rendered fragments."""
+
+    def __init__(self, max_bytes: int):
+        """
+        Initialize the cache.
+
+        Args:
+            max_bytes (int): Total size of the cached fragments (0 disables the cache)
+        """
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Hashable, str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[str]:
+        """Return the cached fragment for a key, or None."""
+        with self._lock:
+            html = self._entries.get(key)
+            if html is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return html
+
+    def set(self, key: Hashable, html: str) -> None:
+        """Store a fragment, evicting the least recently used ones to stay under the limit."""
+        # str length is a close enough stand-in for the memory used
+        size = len(html)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.size -= len(old)
+            self._entries[key] = html
+            self.size += size
+            while self.size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= len(evicted)
+
+    def get_or_render(self, key: Hashable, render: Callable[[], str]) -> str:
+        """
+        Return the cached fragment for a key, rendering and storing it on a miss.
+
+        Args:
+            key (Hashable): Cache key; must include everything the fragment depends on
+            render (Callable[[], str]): Renders the fragment
+
+        Returns:
+            str: The fragment
+        """
+        html = self.get(key)
+        if html is None:
+            html = render()
+            self.set(key, html)
+        return html
+
+    def clear(self) -> None:
+        """Drop every cached fragment."""
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+# Shared by every request handled by this worker
+fragment_cache = FragmentCache(get_fragment_cache_max_bytes())
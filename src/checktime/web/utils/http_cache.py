@@ -0,0 +1,57 @@
+"""
+Conditional GET support for the web views.
+
+Views describe what their response depends on (typically the user's data
+version, see checktime.shared.data_version, or a content hash for static
+data) and `conditional_response` turns that into a strong ETag. A client
+that sends a matching If-None-Match gets an empty 304 and the view never
+builds the body.
+"""
+
+import hashlib
+from typing import Any, Callable, Iterable
+
+from flask import Response, make_response, request
+
+def make_etag(parts: Iterable[Any]) -> str:
+    """
+    Build an ETag from the values a response depends on.
+
+    Args:
+        parts (Iterable[Any]): Values with a stable repr (ints, strings, dates, tuples)
+
+    Returns:
+        str: The ETag, without quotes
+    """
+    return hashlib.sha1(repr(tuple(parts)).encode('utf-8')).hexdigest()
+
+def conditional_response(etag_parts: Iterable[Any], build: Callable[[], Any], private: bool = True) -> Response:
+    """
+    Answer 304 Not Modified if the client already has this version, else build the response.
+
+    Responses are marked `no-cache`, so browsers keep them but revalidate on
+    every use. Private responses also vary on the session cookie, since the
+    user and the language come from it.
+
+    Args:
+        etag_parts (Iterable[Any]): Everything the response body depends on
+        build (Callable[[], Any]): Builds the response (anything a view may return)
+        private (bool): Whether the response is specific to the session
+
+    Returns:
+        Response: A 304 or the built response, with ETag and Cache-Control set
+    """
+    etag = make_etag(etag_parts)
+    if etag in request.if_none_match:
+        response = Response(status=304)
+    else:
+        response = make_response(build())
+        if response.status_code != 200:
+            # Errors are never tagged, so the next request rebuilds them
+            return response
+
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'private, no-cache' if private else 'public, no-cache'
+    if private:
+        response.vary.add('Cookie')
+    return response